@@ -0,0 +1,89 @@
+"""
+Compare serialization of /api/animals response through pydantic models with the fast path used by the server.
+
+Run from the repository root:
+
+    $ PYTHONPATH=src python benchmarks/serialization.py --animals 800 --repeat 20
+"""
+from argparse import ArgumentParser
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from server_dataclasses.rest_models import AnimalDataOutput, AnimalsResult, Metadata
+from rest.serialization import animals_json, animals_result_json, json_array, model_json
+import json
+import time
+
+
+def create_animals(count: int) -> list[dict]:
+    """
+    Create documents similar to those stored by the web scraper.
+    """
+    pen: dict = {
+        '_id': 1, 'name': 'Pavilon', 'is_animal_pen': True, 'is_building': False,
+        'geometry': {'_type': 'Polygon', 'coordinates': [[[14.4 + i / 10000, 50.1] for i in range(20)]]}
+    }
+    text: str = 'Žirafa síťovaná žije v afrických savanách. ' * 20
+
+    return [{
+        '_id': i, 'name': f'Zvíře {i}', 'latin_name': f'Animalia {i}', 'base_summary': text, 'image': 'www.zoopraha.cz/image.jpg',
+        'class_': 'Savci', 'class_latin': 'Mammalia', 'order': 'Sudokopytníci', 'order_latin': 'Artiodactyla',
+        'continent': 'Afrika', 'continent_detail': text, 'biotop': 'Savany, lesy', 'biotop_detail': text,
+        'food': 'Listí', 'food_detail': text, 'sizes': text, 'reproduction': text, 'interesting_data': text,
+        'about_placement_in_zoo_prague': text, 'location_in_zoo': 'Pavilon', 'is_currently_available': True,
+        'map_locations': [pen], 'filter_values': {'class_': ['Savci'], 'biotop': ['Savany', 'Lesy']}
+    } for i in range(count)]
+
+
+def pydantic_path(metadata: dict, documents: list[dict]) -> bytes:
+    """
+    What FastAPI does with a `response_model`: validate every document, validate the result again and encode it.
+    """
+    data: list[AnimalDataOutput] = [AnimalDataOutput(**d) for d in documents]
+    res: AnimalsResult = AnimalsResult(metadata=Metadata(**metadata), data=data)
+    res = AnimalsResult.validate(res)
+
+    return json.dumps(jsonable_encoder(res, by_alias=True), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def fast_path(metadata: dict, documents: list[dict]) -> bytes:
+    """
+    The path used for documents loaded from the DB.
+    """
+    return animals_result_json(model_json(Metadata(**metadata)), json_array(animals_json(documents)))
+
+
+def measure(function, repeat: int, *args) -> float:
+    start: float = time.perf_counter()
+    for _ in range(repeat):
+        function(*args)
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--animals', type=int, default=800, help='Number of serialized animals.')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of measured runs.')
+    args = parser.parse_args()
+
+    now: datetime = datetime.now()
+    metadata: dict = {'_id': 0, 'next_update': now, 'last_update_start': now, 'last_update_end': now, 'scheduler_state': 0}
+    documents: list[dict] = create_animals(args.animals)
+
+    # Both paths have to produce the same response
+    assert json.loads(pydantic_path(metadata, documents)) == json.loads(fast_path(metadata, documents))
+
+    # Whole-collection responses are served from a snapshot where animals are serialized once per dataset version
+    data_json: bytes = json_array(animals_json(documents))
+
+    pydantic_ms: float = measure(pydantic_path, args.repeat, metadata, documents)
+    fast_ms: float = measure(fast_path, args.repeat, metadata, documents)
+    snapshot_ms: float = measure(lambda: animals_result_json(model_json(Metadata(**metadata)), data_json), args.repeat)
+    print(f'{args.animals} animals, {len(data_json) / 1024:.0f} kB')
+    print(f'pydantic models:   {pydantic_ms:8.2f} ms')
+    print(f'fast path:         {fast_ms:8.2f} ms ({pydantic_ms / fast_ms:.1f}x faster)')
+    print(f'cached snapshot:   {snapshot_ms:8.2f} ms ({pydantic_ms / snapshot_ms:.1f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,8 @@ deps_required = [
 	'fastapi>=0.63.0', 'requests>=2.25.1', 'beautifulsoup4>=4.9.3', 
     'uvicorn>=0.13.4', 'aiofiles>=0.6.0',
 	'boto3>=1.17.16', 'rq>=1.7.0', 'heroku3>=4.2.3',
-    'pymongo[srv]>=3.11.3', 'croniter>=1.0.6', 'feedparser>=6.0.2',
+    'pymongo[srv]>=3.11.3', 'motor>=2.3.0', 'croniter>=1.0.6', 'feedparser>=6.0.2',
+    'brotli>=1.0.9', 'redis>=4.2.0', 'orjson>=3.4.0', 'prometheus-client>=0.9.0',
     'tilepack @ git+https://github.com/tilezen/tilepacks@v1.0.0#egg=tilepack'
 ]
 
@@ -42,6 +43,8 @@ setup(
     entry_points={
         'masters_thesis_server.db_handlers': [
             'mongodb = scrapers.mongodb_handler:MongoDBHandler',
+            'motor = scrapers.motor_handler:MotorDBHandler',
+            'sqlite = scrapers.sqlite_handler:SQLiteDBHandler',
         ]
     },
     # package_data={
@@ -3,6 +3,7 @@ from rq import Queue
 from .worker import conn
 import scrapers.zoo_scraper as zoo_scraper
 import scrapers.map_downloader as map_downloader
+from scrapers.notifications import publish_metadata_changed
 import logging
 import os
 import traceback
@@ -66,6 +67,7 @@ def handle_update(handler: DBHandlerInterface, heroku_api_key: str, config: dict
     if(scheduler_state is None):
         scheduler_state = SchedulerStates.WAIT
         handler.update_one({"_id": 0}, data={'$set': {'scheduler_state': scheduler_state}})
+        publish_metadata_changed()
 
     if(scheduler_state == SchedulerStates.WAIT):
         if(next_update <= datetime.now()):
@@ -75,6 +77,7 @@ def handle_update(handler: DBHandlerInterface, heroku_api_key: str, config: dict
             # Start worker dyno and update scheduler_state in DB
             __change_worker_dyno_state__(DynoStates.UP, heroku_api_key)
             handler.update_one({"_id": 0}, {"$set": {"scheduler_state": SchedulerStates.UPDATING}})
+            publish_metadata_changed()
         else:
             logger.info('WAIT')
         
@@ -86,6 +89,7 @@ def handle_update(handler: DBHandlerInterface, heroku_api_key: str, config: dict
             logger.info('UPDATING -> WAIT')
             __change_worker_dyno_state__(DynoStates.DOWN, heroku_api_key)
             handler.update_one({"_id": 0}, {"$set": {"scheduler_state": SchedulerStates.WAIT}})
+            publish_metadata_changed()
 
     elif(scheduler_state == SchedulerStates.WORK_DONE):
         # This state should be set only by zoo_scraper
@@ -96,6 +100,7 @@ def handle_update(handler: DBHandlerInterface, heroku_api_key: str, config: dict
         crontab_schedule: str = os.getenv('CRONTAB_SCHEDULE', config['default_crontab_schedule'])
         crontab: croniter = croniter(crontab_schedule, datetime.now())
         handler.update_one({"_id": 0}, {"$set": {"next_update": crontab.get_next(datetime), "scheduler_state": SchedulerStates.WAIT}})
+        publish_metadata_changed()
     else:
         raise RuntimeError(f'Unknown scheduler state: {scheduler_state}')
 
@@ -1,100 +1,259 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
 from server_dataclasses.interfaces import DBHandlerInterface
-import boto3
+from scrapers.zoo_scraper import split_multi_value
 from botocore.exceptions import ClientError
+from scrapers.datasets import DatasetVersion, current_dataset
 from .config import get_settings
+from .db import get_db_handler
+from .cache import AnimalsSnapshot, MetadataCache, VersionedCache, get_animals_cache, get_facets_cache, get_metadata_cache
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor
+from .routing import RoadGraph, get_road_graph_cache, is_valid_point
+from .spatial import MapLocation, SpatialIndex, get_spatial_index_cache
+from .serialization import animal_document, animals_json, animals_result_json, dumps, json_array, model_json
+from .search import SearchIndex, get_search_index_cache
+from .changes import normalize_version, merge_changes
+from .streaming import NDJSON_MEDIA_TYPE, accepts_ndjson, iter_documents, ndjson_line, stream_ndjson
+from .http_cache import validator_headers, is_not_modified, not_modified_response, select_encoding, ranged_file_response
+from .mbtiles import MBTilesCache, TileReader, get_mbtiles_cache
+from .map_artifacts import get_map_artifact_cache, splice_map_metadata
 from types import SimpleNamespace
-from server_dataclasses.rest_models import AnimalsResult, Metadata, BaseResult, AnimalDataOutput, MapMetadata, Road, RoadNode
+from datetime import datetime
+import hashlib
+from server_dataclasses.rest_models import AnimalsResult, AnimalChangesResult, Metadata, BaseResult, FacetResult, AnimalDataOutput, MapMetadata, MapGraph, Road, RoadNode, RouteResult, MapLocationOutput, MapLocationsResult
 
 api_router = APIRouter(prefix='/api')
 
+def facet_result(metadata: dict, values: list[dict]) -> FacetResult:
+    """
+    Create a response with values of one facet precomputed by the web scraper.
+    """
+    return FacetResult(metadata=Metadata(**metadata), data=[v['value'] for v in values], counts={v['value']: v['count'] for v in values})
+
+def animals_filter(include_currently_unavailable: bool, filter_values: dict[str, str]) -> dict:
+    """
+    Create a DB filter of animals which uses indexes of normalized filter values.
+
+    Args:
+        include_currently_unavailable (bool): If False then only currently available animals are accepted.
+        filter_values (dict[str, str]): Key is an attribute from ANIMAL_FILTERS, value is a comma-separated list of accepted values or None.
+
+    Returns:
+        dict: The DB filter.
+    """
+    filter_ = {} if include_currently_unavailable else {'is_currently_available': True}
+    for attr, value in filter_values.items():
+        if(value is not None):
+            filter_[f'filter_values.{attr}'] = {'$in': split_multi_value(value)}
+
+    return filter_
+
+def parse_ids(ids: str) -> list[int]:
+    """
+    Parse a comma-separated list of animal IDs.
+
+    Raises:
+        HTTPException: Raised when an ID is not an integer or when there are too many IDs.
+    """
+    try:
+        res: list[int] = sorted({int(id_) for id_ in ids.split(',') if id_.strip() != ''})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid ids")
+
+    if(len(res) > MAX_PAGE_SIZE):
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} ids can be requested")
+
+    return res
+
 @api_router.get('/animals', response_model=AnimalsResult)
-async def animals(include_currently_unavailable: bool = False, settings: SimpleNamespace = Depends(get_settings)):
+async def animals(request: Request, include_currently_unavailable: bool = False, limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE), after: str = None, ids: str = None,
+    class_: str = None, biotop: str = None, food: str = None, continent: str = None, location_in_zoo: str = None,
+    settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), animals_cache: VersionedCache = Depends(get_animals_cache)):
     """
     Return information about all animals that live in Zoo Prague.
+
+    Animals can be filtered by `class_`, `biotop`, `food`, `continent` and `location_in_zoo`.
+    Each filter is a comma-separated list of values, an animal is returned if it has any of them. Values are case-insensitive.
+    Filtered animals are sorted by their ID.
+
+    `ids` is a comma-separated list of IDs of requested animals. They are loaded using a single query.
+
+    If `limit` or `after` is set then one page of animals sorted by their ID is returned.
+    The `next` cursor of the result is passed as `after` to get the next page.
+
+    Otherwise all animals are streamed as newline-delimited JSON if the `Accept` header prefers `application/x-ndjson`.
+    The first line is `{"metadata": {...}}`, each following line is `{"animal": {...}}`.
     """
-    with settings.handler_class(**settings.config_data) as db_handler:
-        metadata: dict = db_handler.find({'_id': 0}, collection_name='metadata')[0]
-        filter_ = {} if include_currently_unavailable else {'is_currently_available': True}
-        data: list[dict] = db_handler.find(filter_, collection_name='animals_data')
-        data: list[AnimalDataOutput] = [AnimalDataOutput(**d) for d in data]
+    paginated: bool = limit is not None or after is not None
+    after_id: int = decode_cursor(after) if after is not None else None
+    page_size: int = limit or DEFAULT_PAGE_SIZE
+    filter_values: dict[str, str] = {'class_': class_, 'biotop': biotop, 'food': food, 'continent': continent, 'location_in_zoo': location_in_zoo}
+    filtered: bool = ids is not None or any(value is not None for value in filter_values.values())
+    filter_: dict = animals_filter(include_currently_unavailable, filter_values)
+    if(ids is not None):
+        filter_['_id'] = {'$in': parse_ids(ids)}
 
-    res = AnimalsResult(metadata=Metadata(**metadata),data=data)
-    return res
+    next_cursor: str = None
+    # Pages are always JSON
+    ndjson: bool = not paginated and accepts_ndjson(request)
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata, media_type=NDJSON_MEDIA_TYPE if ndjson else 'application/json')
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+
+        animals_collection: str = current_dataset(metadata, 'animals').collection('animals_data')
+        if(paginated):
+            # Range query on the '_id' index, one more document is loaded to find out whether there is a next page
+            if(after_id is not None):
+                filter_['_id'] = filter_.get('_id', {}) | {'$gt': after_id}
+            data: list[dict] = await db_handler.find(filter_, sort=[('_id', 1)], limit=page_size + 1, collection_name=animals_collection)
+            if(len(data) > page_size):
+                data = data[:page_size]
+                next_cursor = encode_cursor(data[-1]['_id'])
+            data_json: bytes = json_array(animals_json(data))
+        elif(ndjson):
+            # Stream animals from the DB one at a time
+            parts = [('animal', iter_documents(settings, filter_, animals_collection), AnimalDataOutput)]
+            header: bytes = ndjson_line('metadata', Metadata(**metadata))
+            return StreamingResponse(stream_ndjson(header, parts), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+        elif(filtered):
+            # Filter values and IDs are read from the indexes sorted by ID, each document is serialized as soon as it is loaded
+            data_json: bytes = json_array([dumps(animal_document(d)) async for d in db_handler.find_iter(filter_, sort=[('_id', 1)], collection_name=animals_collection)])
+        else:
+            snapshot: AnimalsSnapshot = await animals_cache.get(db_handler, current_dataset(metadata, 'animals'))
+            data_json: bytes = snapshot.animals_json if include_currently_unavailable else snapshot.available_animals_json
+
+    # Documents come from our own scraper, they are serialized without validation in the shape of AnimalsResult
+    return Response(animals_result_json(model_json(Metadata(**metadata)), data_json, next_cursor), media_type='application/json', headers=headers)
+
+@api_router.get('/animals/search', response_model=AnimalsResult)
+async def animals_search(request: Request, response: Response, q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100), include_currently_unavailable: bool = False,
+    settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), search_index_cache: VersionedCache = Depends(get_search_index_cache)):
+    """
+    Search animals by their name, latin name and summary.
+
+    Case and diacritics are ignored and words of the query also match longer words, so `zir` finds `Žirafa`.
+    Animals have to match all words of the query, the best matches are returned first.
+    """
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata)
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        search_index: SearchIndex = await search_index_cache.get(db_handler, current_dataset(metadata, 'animals'))
+
+    response.headers.update(headers)
+    data: list[AnimalDataOutput] = search_index.search(q, limit=limit, include_currently_unavailable=include_currently_unavailable)
+
+    return AnimalsResult(metadata=Metadata(**metadata),data=data)
+
+@api_router.get('/animals/changes', response_model=AnimalChangesResult)
+async def animal_changes(since: datetime, request: Request, response: Response, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), animals_cache: VersionedCache = Depends(get_animals_cache)):
+    """
+    Return animals that were inserted or updated since the given dataset version and IDs of removed animals.
+
+    `since` is the `last_update_end` value of metadata the client already has.
+    If changes since that version are not known then `full_sync` is True and all animals are returned.
+    Currently unavailable animals are always included so that the client can see their availability change.
+    """
+    since = normalize_version(since)
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata)
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+
+        changes: tuple[set[int], set[int]] = (set(), set())
+        if(since != metadata.get('last_update_end')):
+            change_logs: list[dict] = await db_handler.find({'_id': {'$gt': since}}, projection={'hashes': 0}, sort=[('_id', 1)], collection_name='animals_changes')
+            changes = merge_changes(since, metadata.get('last_update_end'), change_logs)
+
+        snapshot: AnimalsSnapshot = await animals_cache.get(db_handler, current_dataset(metadata, 'animals'))
+
+    response.headers.update(headers)
+    if(changes is None):
+        return AnimalChangesResult(metadata=Metadata(**metadata), full_sync=True, data=snapshot.animals)
+
+    changed, removed = changes
+    data: list[AnimalDataOutput] = [snapshot.animals_by_id[id_] for id_ in sorted(changed) if id_ in snapshot.animals_by_id]
+
+    return AnimalChangesResult(metadata=Metadata(**metadata), data=data, removed=sorted(removed))
 
 @api_router.get('/animals/{animal_id}', response_model=AnimalsResult)
-async def animal(animal_id: int, include_currently_unavailable: bool = False, settings: SimpleNamespace = Depends(get_settings)):
+async def animal(animal_id: int, request: Request, include_currently_unavailable: bool = False, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), animals_cache: VersionedCache = Depends(get_animals_cache)):
     """
     Return information about an animal of a specific ID.
     """
-    with settings.handler_class(**settings.config_data) as db_handler:
-        metadata: dict = db_handler.find({'_id': 0}, collection_name='metadata')[0]
-        filter_ = {'_id': animal_id} if include_currently_unavailable else {'is_currently_available': True, '_id': animal_id}
-        data: list[dict] = db_handler.find(filter_, collection_name='animals_data')
-        data: list[AnimalDataOutput] = [AnimalDataOutput(**d) for d in data]
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata)
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        snapshot: AnimalsSnapshot = await animals_cache.get(db_handler, current_dataset(metadata, 'animals'))
 
-    if(len(data) == 0):
+    data: AnimalDataOutput = snapshot.animals_by_id.get(animal_id)
+    if(data is None or not (include_currently_unavailable or data.is_currently_available)):
         raise HTTPException(status_code=404, detail="Item not found")
-    
-    res = AnimalsResult(metadata=Metadata(**metadata),data=data)
-    return res
 
-@api_router.get('/classes', response_model=BaseResult)
-async def classes(settings: SimpleNamespace = Depends(get_settings)):
+    data_json: bytes = json_array([snapshot.animal_json[animal_id]])
+    return Response(animals_result_json(model_json(Metadata(**metadata)), data_json), media_type='application/json', headers=headers)
+
+@api_router.get('/classes', response_model=FacetResult)
+async def classes(request: Request, response: Response, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), facets_cache: VersionedCache = Depends(get_facets_cache)):
     """
     Return a list of zoological classes that animals from Zoo Prague are grouped under.
     """
-    with settings.handler_class(**settings.config_data) as db_handler:
-        metadata: dict = db_handler.find({'_id': 0}, collection_name='metadata')[0]
-        data: list[dict] = db_handler.find({}, projection={'class_': 1}, collection_name='animals_data')
-        data: set[str] = {d['class_'].capitalize() for d in data}
-        data: list[str] = list(data)
-        data.sort()
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata)
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        facets: dict[str, list[dict]] = await facets_cache.get(db_handler, current_dataset(metadata, 'animals'))
 
-    return BaseResult(metadata=Metadata(**metadata),data=data)
+    response.headers.update(headers)
+    return facet_result(metadata, facets.get('classes', []))
 
-@api_router.get('/biotops', response_model=BaseResult)
-async def biotops(settings: SimpleNamespace = Depends(get_settings)):
+@api_router.get('/biotops', response_model=FacetResult)
+async def biotops(request: Request, response: Response, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), facets_cache: VersionedCache = Depends(get_facets_cache)):
     """
     Return a list of biotops that animals from Zoo Prague usually live in.
     """
-    with settings.handler_class(**settings.config_data) as db_handler:
-        metadata: dict = db_handler.find({'_id': 0}, collection_name='metadata')[0]
-        data: list[dict] = db_handler.find({}, projection={'biotop': 1}, collection_name='animals_data')
-        data: set[str] = {d['biotop'].capitalize() for d in data}
-        data: set[str] = {substr.strip().capitalize() for fullString in data for substr in fullString.split(',') if fullString != ''}
-        data: list[str] = list(data)
-        data.sort()
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata)
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        facets: dict[str, list[dict]] = await facets_cache.get(db_handler, current_dataset(metadata, 'animals'))
 
-    return BaseResult(metadata=Metadata(**metadata),data=data)
+    response.headers.update(headers)
+    return facet_result(metadata, facets.get('biotops', []))
 
-@api_router.get('/foods', response_model=BaseResult)
-async def foods(settings: SimpleNamespace = Depends(get_settings)):
+@api_router.get('/foods', response_model=FacetResult)
+async def foods(request: Request, response: Response, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), facets_cache: VersionedCache = Depends(get_facets_cache)):
     """
     Return a list of foods that animals eat.
     """
-    with settings.handler_class(**settings.config_data) as db_handler:
-        metadata: dict = db_handler.find({'_id': 0}, collection_name='metadata')[0]
-        data: list[dict] = db_handler.find({}, projection={'food': 1}, collection_name='animals_data')
-        data: set[str] = {d['food'].capitalize() for d in data}
-        data: set[str] = {substr.strip().capitalize() for fullString in data for substr in fullString.split(',') if fullString != ''}
-        data: list[str] = list(data)
-        data.sort()
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata)
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        facets: dict[str, list[dict]] = await facets_cache.get(db_handler, current_dataset(metadata, 'animals'))
 
-    return BaseResult(metadata=Metadata(**metadata),data=data)
+    response.headers.update(headers)
+    return facet_result(metadata, facets.get('foods', []))
 
 @api_router.get('/zooHouses', response_model=BaseResult)
-async def foods(settings: SimpleNamespace = Depends(get_settings)):
+async def foods(settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache)):
     """
     Return a list of zoo houses.
     """
-    with settings.handler_class(**settings.config_data) as db_handler:
-        metadata: dict = db_handler.find({'_id': 0}, collection_name='metadata')[0]
-        data: list[dict] = db_handler.find({}, projection={'_id': 1}, collection_name='zoo_houses')
-        data: list[str] = [d['_id'].capitalize() for d in data]
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        data: list[str] = [d['_id'].capitalize() async for d in db_handler.find_iter({}, projection={'_id': 1}, collection_name='zoo_houses')]
         data.sort()
 
     return BaseResult(metadata=Metadata(**metadata),data=data)
@@ -103,38 +262,245 @@ async def foods(settings: SimpleNamespace = Depends(get_settings)):
         200: {
             'content': {'application/octet-stream': {}},
             'description': 'Successful response',
+        },
+        206: {
+            'content': {'application/octet-stream': {}},
+            'description': 'Requested range of the file',
         }
     })
-async def map_data(settings: SimpleNamespace = Depends(get_settings)):
+async def map_data(request: Request, settings: SimpleNamespace = Depends(get_settings), mbtiles_cache: MBTilesCache = Depends(get_mbtiles_cache)):
     """
     Return the current version of MBTiles file containing vector maps used by a map library.
+
+    Supports Range requests so that interrupted downloads can be resumed.
     """
     file_prefix: str = settings.map_file_prefix
-    filename: str = f'{file_prefix}.mbtiles'
-    mbtiles_path = Path(f'./tmp/{file_prefix}/{filename}')
 
-    if(not mbtiles_path.is_file()):
-        # Download & cache mbtiles file
-        os.makedirs(mbtiles_path.parent, exist_ok=True)
-        client = boto3.client('s3')
-        client.download_file(settings.aws_storage_bucket_name, filename, str(mbtiles_path))
+    try:
+        mbtiles_path: Path = await mbtiles_cache.get_path(settings.aws_storage_bucket_name, file_prefix)
+    except ClientError:
+        raise HTTPException(status_code=503, detail="Map data is not available")
 
-    return FileResponse(mbtiles_path, media_type='application/octet-stream', filename=filename)
+    return ranged_file_response(request, mbtiles_path, media_type='application/octet-stream', filename=f'{file_prefix}.mbtiles')
+
+@api_router.get('/map/tiles/{z}/{x}/{y}', responses={
+        200: {
+            'content': {'application/json': {}, 'application/x-protobuf': {}},
+            'description': 'Data of one map tile',
+        },
+        404: {'description': 'Tile not found'}
+    })
+async def map_tile(z: int, x: int, y: int, request: Request, settings: SimpleNamespace = Depends(get_settings), mbtiles_cache: MBTilesCache = Depends(get_mbtiles_cache)):
+    """
+    Return one vector map tile from the current version of MBTiles file. Tiles use the XYZ scheme.
+    """
+    if(not (0 <= z <= 24 and 0 <= x < 2 ** z and 0 <= y < 2 ** z)):
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    try:
+        mbtiles_path: Path = await mbtiles_cache.get_path(settings.aws_storage_bucket_name, settings.map_file_prefix)
+    except ClientError:
+        raise HTTPException(status_code=503, detail="Map data is not available")
+
+    reader: TileReader = mbtiles_cache.get_tile_reader(mbtiles_path, settings.tile_cache_size)
+    tile: bytes = await run_in_threadpool(reader.get_tile, z, x, y)
+    if(tile is None):
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    headers: dict[str, str] = {
+        'ETag': f'"{hashlib.md5(tile).hexdigest()}"',
+        # Map data changes at most once a week
+        'Cache-Control': 'public, max-age=604800'
+    }
+    if(is_not_modified(request, headers)):
+        return not_modified_response(headers)
+
+    if(tile[:2] == b'\x1f\x8b'):
+        # Tile is stored gzip compressed
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(tile, media_type=reader.media_type, headers=headers)
 
 @api_router.get('/map/metadata', response_model=MapMetadata)
-async def map_metadata(settings: SimpleNamespace = Depends(get_settings)):
+async def map_metadata(request: Request, response: Response, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), map_artifact_cache: VersionedCache = Depends(get_map_artifact_cache)):
     """
     Returns map metadata containg configuration and road map data.
+
+    The data is streamed as newline-delimited JSON if the `Accept` header prefers `application/x-ndjson`.
+    The first line is `{"metadata": {...}}`, following lines are `{"node": {...}}` and then `{"road": {...}}`.
     """
-    with settings.handler_class(**settings.config_data) as db_handler:
-        metadata: dict = db_handler.find({'_id': 0}, collection_name='metadata')[0]
-        metadata: Metadata = Metadata(**metadata)
+    ndjson: bool = accepts_ndjson(request)
+    async with get_db_handler(settings) as db_handler:
+        metadata_doc: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata_doc, ('map',), NDJSON_MEDIA_TYPE if ndjson else 'application/json')
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        metadata: Metadata = Metadata(**metadata_doc)
+        map_dataset: DatasetVersion = current_dataset(metadata_doc, 'map')
+
+        if(ndjson):
+            parts = [
+                ('node', iter_documents(settings, {}, map_dataset.collection('road_nodes')), RoadNode),
+                ('road', iter_documents(settings, {}, map_dataset.collection('roads')), Road)
+            ]
+            return StreamingResponse(stream_ndjson(ndjson_line('metadata', metadata), parts), media_type=NDJSON_MEDIA_TYPE, headers=headers)
 
-        roads: list[dict] = db_handler.find({}, collection_name='roads')
-        roads: list[Road] = [Road(**d) for d in roads]
+        artifact: dict = await map_artifact_cache.get(db_handler, map_dataset)
+        if(artifact is not None):
+            # Road graph was serialized by map_downloader
+            return Response(splice_map_metadata(metadata, artifact['json']), media_type='application/json', headers=headers)
 
-        road_nodes: list[dict] = db_handler.find({}, collection_name='road_nodes')
-        road_nodes: list[RoadNode] = [RoadNode(**d) for d in road_nodes]
+        roads: list[Road] = [Road(**d) async for d in db_handler.find_iter({}, collection_name=map_dataset.collection('roads'))]
+        road_nodes: list[RoadNode] = [RoadNode(**d) async for d in db_handler.find_iter({}, collection_name=map_dataset.collection('road_nodes'))]
 
+    response.headers.update(headers)
     res = MapMetadata(metadata=metadata,roads=roads,nodes=road_nodes)
-    return res
\ No newline at end of file
+    return res
+
+@api_router.get('/map/graph', response_model=MapGraph, responses={404: {'description': 'Map data has not been parsed yet'}})
+async def map_graph(request: Request, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), map_artifact_cache: VersionedCache = Depends(get_map_artifact_cache)):
+    """
+    Returns road map data serialized when the map data was parsed. The data is sent gzip or brotli compressed if the client accepts it.
+    """
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        artifact: dict = await map_artifact_cache.get(db_handler, current_dataset(metadata, 'map'))
+
+    if(artifact is None):
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    headers: dict[str, str] = {
+        # The same ETag is used for all encodings of the data
+        'ETag': f'W/"{artifact["hash"]}"',
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if(is_not_modified(request, headers)):
+        return not_modified_response(headers)
+
+    encoding: str = select_encoding(request, [encoding for encoding in ('br', 'gzip') if encoding in artifact])
+    if(encoding is not None):
+        headers['Content-Encoding'] = encoding
+
+    return Response(artifact[encoding or 'json'], media_type='application/json', headers=headers)
+
+def route_endpoint(value: str, graph: RoadGraph) -> int:
+    """
+    Find the road node of a route endpoint.
+
+    Args:
+        value (str): 'lat,lon' of a point, ID of a road node or ID of an animal pen or a zoo part.
+        graph (RoadGraph): The road graph.
+
+    Raises:
+        HTTPException: Raised when the value is invalid, when the point is far outside the map or when the node or the map location does not exist.
+
+    Returns:
+        int: ID of the road node.
+    """
+    try:
+        if(',' in value):
+            lat, lon = (float(part) for part in value.split(','))
+            if(not is_valid_point(lon, lat) or not graph.covers(lon, lat)):
+                raise ValueError(value)
+            node_id: int = graph.nearest_node(lon, lat)
+        else:
+            node_id: int = int(value)
+            if(node_id not in graph.nodes):
+                node_id = graph.location_node(node_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid route endpoint: {value}")
+
+    if(node_id is None):
+        raise HTTPException(status_code=404, detail=f"Route endpoint not found: {value}")
+
+    return node_id
+
+@api_router.get('/map/route', response_model=RouteResult, responses={404: {'description': 'An endpoint does not exist or the endpoints are not connected'}})
+async def map_route(request: Request, response: Response, from_: str = Query(..., alias='from'), to: str = Query(...),
+    settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache), road_graph_cache: VersionedCache = Depends(get_road_graph_cache)):
+    """
+    Return the shortest route between two places in the zoo.
+
+    `from` and `to` are either `lat,lon` of a point, ID of a road node or ID of an animal pen or a zoo part.
+    Points and map locations are routed from the road node nearest to them.
+    """
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata, ('map',))
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        graph: RoadGraph = await road_graph_cache.get(db_handler, current_dataset(metadata, 'map'))
+
+    start: int = route_endpoint(from_, graph)
+    goal: int = route_endpoint(to, graph)
+    route: tuple[list[int], float] = graph.shortest_path(start, goal)
+    if(route is None):
+        raise HTTPException(status_code=404, detail="Route not found")
+
+    response.headers.update(headers)
+    path, distance = route
+    nodes: list[dict] = [{'_id': node_id, 'lon': graph.nodes[node_id][0], 'lat': graph.nodes[node_id][1]} for node_id in path]
+
+    return RouteResult(metadata=Metadata(**metadata), distance=distance, nodes=nodes)
+
+def map_location_output(location: MapLocation, snapshot: AnimalsSnapshot, include_currently_unavailable: bool, distance: float = None) -> MapLocationOutput:
+    """
+    Create a response item of a map location with IDs of animals located there.
+    """
+    animal_ids: list[int] = snapshot.animals_by_location.get(location.id, [])
+    if(not include_currently_unavailable):
+        animal_ids = [animal_id for animal_id in animal_ids if snapshot.animals_by_id[animal_id].is_currently_available]
+
+    return MapLocationOutput(_id=location.id, name=location.name, is_animal_pen=location.is_animal_pen, is_building=location.is_building, distance=distance, animal_ids=animal_ids)
+
+@api_router.get('/map/nearby', response_model=MapLocationsResult)
+async def map_nearby(request: Request, response: Response, lat: float = Query(..., ge=-90, le=90), lon: float = Query(..., ge=-180, le=180), radius: float = Query(100, gt=0, le=5000),
+    include_currently_unavailable: bool = False, settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache),
+    spatial_index_cache: VersionedCache = Depends(get_spatial_index_cache), animals_cache: VersionedCache = Depends(get_animals_cache)):
+    """
+    Return animal pens and zoo parts at most `radius` meters from the given point, the nearest first.
+
+    Each location contains IDs of animals located there.
+    """
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata, ('map', 'animals'))
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        spatial_index: SpatialIndex = await spatial_index_cache.get(db_handler, current_dataset(metadata, 'map'))
+        snapshot: AnimalsSnapshot = await animals_cache.get(db_handler, current_dataset(metadata, 'animals'))
+
+    response.headers.update(headers)
+    data: list[MapLocationOutput] = [map_location_output(location, snapshot, include_currently_unavailable, distance) for distance, location in spatial_index.nearby(lon, lat, radius)]
+
+    return MapLocationsResult(metadata=Metadata(**metadata), data=data)
+
+@api_router.get('/map/locations', response_model=MapLocationsResult)
+async def map_locations(request: Request, response: Response, bbox: str = Query(..., description='min_lon,min_lat,max_lon,max_lat'), include_currently_unavailable: bool = False,
+    settings: SimpleNamespace = Depends(get_settings), metadata_cache: MetadataCache = Depends(get_metadata_cache),
+    spatial_index_cache: VersionedCache = Depends(get_spatial_index_cache), animals_cache: VersionedCache = Depends(get_animals_cache)):
+    """
+    Return animal pens and zoo parts whose bounding boxes overlap the given bounding box.
+
+    Each location contains IDs of animals located there.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid bbox")
+    if(not is_valid_point(min_lon, min_lat) or not is_valid_point(max_lon, max_lat)):
+        raise HTTPException(status_code=400, detail="Invalid bbox")
+
+    async with get_db_handler(settings) as db_handler:
+        metadata: dict = await metadata_cache.get(db_handler)
+        headers: dict[str, str] = validator_headers(metadata, ('map', 'animals'))
+        if(is_not_modified(request, headers)):
+            return not_modified_response(headers)
+        spatial_index: SpatialIndex = await spatial_index_cache.get(db_handler, current_dataset(metadata, 'map'))
+        snapshot: AnimalsSnapshot = await animals_cache.get(db_handler, current_dataset(metadata, 'animals'))
+
+    response.headers.update(headers)
+    data: list[MapLocationOutput] = [map_location_output(location, snapshot, include_currently_unavailable) for location in spatial_index.within_bbox((min_lon, min_lat, max_lon, max_lat))]
+
+    return MapLocationsResult(metadata=Metadata(**metadata), data=data)
@@ -0,0 +1,236 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Awaitable, Callable
+import asyncio
+import time
+from server_dataclasses.interfaces import AsyncDBHandlerInterface
+from server_dataclasses.rest_models import AnimalDataOutput
+from scrapers.zoo_scraper import compute_facets
+from scrapers.datasets import DatasetVersion
+from .serialization import animals_json, json_array
+
+# Default number of seconds the metadata document is cached for
+METADATA_TTL: float = 5.0
+
+
+@dataclass
+class AnimalsSnapshot():
+    """
+    Immutable in-memory copy of the animals_data collection for one dataset version.
+    """
+
+    version: Any = None
+
+    # All animals sorted by their ID
+    animals: list[AnimalDataOutput] = field(default_factory=list)
+    animals_by_id: dict[int, AnimalDataOutput] = field(default_factory=dict)
+
+    # Key is the ID of an animal pen or a zoo part, value is a list of IDs of animals located there
+    animals_by_location: dict[int, list[int]] = field(default_factory=dict)
+
+    # Animals serialized once per version. Key is the animal ID, value is its JSON object.
+    animal_json: dict[int, bytes] = field(default_factory=dict)
+    # JSON arrays of all animals and of currently available animals
+    animals_json: bytes = b'[]'
+    available_animals_json: bytes = b'[]'
+
+    @property
+    def available_animals(self) -> list[AnimalDataOutput]:
+        return [animal for animal in self.animals if animal.is_currently_available]
+
+
+class VersionedCache():
+    """
+    Holds a value built for one dataset version.
+
+    The value is built once by the builder function and then returned for every read of the same version.
+    When another version is requested a new value is built and swapped in as a whole, so readers never see a half-built value.
+    """
+
+    def __init__(self, builder: Callable[[AsyncDBHandlerInterface, Any], Awaitable[Any]]):
+        """
+        Initialize VersionedCache.
+
+        Args:
+            builder (Callable[[AsyncDBHandlerInterface, Any], Awaitable[Any]]): Coroutine function which builds the cached value for the given DB handler and version.
+        """
+        self.builder = builder
+        self._current: tuple[Any, Any] = None
+        # Created lazily so that it belongs to the running event loop
+        self._lock: asyncio.Lock = None
+
+    async def get(self, db_handler: AsyncDBHandlerInterface, version: Any) -> Any:
+        """
+        Return the value of the given version. The value is built if the cached one belongs to another version.
+
+        Concurrent requests for a missing version wait for a single build.
+
+        Args:
+            db_handler (AsyncDBHandlerInterface): Handler used to build the value.
+            version (Any): Version of the dataset, e.g. :py:class:`scrapers.datasets.DatasetVersion` published in the metadata document.
+
+        Returns:
+            Any: The cached value.
+        """
+        current = self._current
+        if(current is not None and current[0] == version):
+            return current[1]
+
+        if(self._lock is None):
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # Some other request might have built the version while we were waiting
+            current = self._current
+            if(current is None or current[0] != version):
+                current = (version, await self.builder(db_handler, version))
+                self._current = current
+
+        return current[1]
+
+    def clear(self):
+        self._current = None
+
+
+class MetadataCache():
+    """
+    Holds the metadata document for a short time so that requests do not have to read it from the DB.
+
+    The cached document is dropped as soon as a writer of the metadata publishes a notification, see :py:func:`rest.notifications.listen_for_metadata_changes`.
+    The TTL only limits how long a stale document is served when a notification is lost.
+    """
+
+    def __init__(self, ttl: float = METADATA_TTL):
+        """
+        Initialize MetadataCache.
+
+        Args:
+            ttl (float, optional): Number of seconds the document is cached for. Defaults to METADATA_TTL.
+        """
+        self.ttl = ttl
+        self._current: tuple[float, dict] = None
+        # Incremented by every invalidation so that a document loaded before it is not cached
+        self._generation: int = 0
+        # Created lazily so that it belongs to the running event loop
+        self._lock: asyncio.Lock = None
+
+    def __is_fresh__(self, current: tuple[float, dict]) -> bool:
+        return current is not None and time.monotonic() - current[0] < self.ttl
+
+    async def get(self, db_handler: AsyncDBHandlerInterface) -> dict:
+        """
+        Return the metadata document. It is loaded from the DB if the cached one expired or was invalidated.
+
+        The returned document is shared by all requests and must not be modified.
+
+        Args:
+            db_handler (AsyncDBHandlerInterface): Handler used to load the document.
+
+        Returns:
+            dict: The metadata document.
+        """
+        current = self._current
+        if(self.__is_fresh__(current)):
+            return current[1]
+
+        if(self._lock is None):
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # Some other request might have loaded the document while we were waiting
+            current = self._current
+            if(not self.__is_fresh__(current)):
+                generation: int = self._generation
+                current = (time.monotonic(), (await db_handler.find({'_id': 0}, collection_name='metadata'))[0])
+                if(generation == self._generation):
+                    self._current = current
+
+        return current[1]
+
+    def invalidate(self):
+        self._generation += 1
+        self._current = None
+
+
+async def build_animals_snapshot(db_handler: AsyncDBHandlerInterface, version: DatasetVersion) -> AnimalsSnapshot:
+    """
+    Load the whole animals_data collection of the given version into a new snapshot.
+
+    Args:
+        db_handler (AsyncDBHandlerInterface): Handler used to load the data.
+        version (DatasetVersion): Version of the loaded 'animals' dataset.
+
+    Returns:
+        AnimalsSnapshot: The new snapshot.
+    """
+    data: list[dict] = sorted(await db_handler.find({}, collection_name=version.collection('animals_data')), key=lambda d: d['_id'])
+    animals: list[AnimalDataOutput] = [AnimalDataOutput(**d) for d in data]
+    animal_json: dict[int, bytes] = dict(zip((animal.id for animal in animals), animals_json(data)))
+    animals_by_location: dict[int, list[int]] = dict()
+    for animal in animals:
+        for location in animal.map_locations:
+            animals_by_location.setdefault(location.get('_id'), list()).append(animal.id)
+
+    return AnimalsSnapshot(
+        version=version.version,
+        animals=animals,
+        animals_by_id={animal.id: animal for animal in animals},
+        animals_by_location=animals_by_location,
+        animal_json=animal_json,
+        animals_json=json_array([animal_json[animal.id] for animal in animals]),
+        available_animals_json=json_array([animal_json[animal.id] for animal in animals if animal.is_currently_available])
+    )
+
+
+async def build_facets(db_handler: AsyncDBHandlerInterface, version: DatasetVersion) -> dict[str, list[dict]]:
+    """
+    Load facets precomputed by the web scraper.
+
+    Facets are computed from animals_data if the scraper has not stored them yet.
+
+    Args:
+        db_handler (AsyncDBHandlerInterface): Handler used to load the data.
+        version (DatasetVersion): Version of the loaded 'animals' dataset.
+
+    Returns:
+        dict[str, list[dict]]: Key is the facet name, value is a sorted list of {'value': str, 'count': int} dictionaries.
+    """
+    facets: dict[str, list[dict]] = {d['_id']: d['values'] for d in await db_handler.find({}, collection_name=version.collection('facets'))}
+    if(len(facets) == 0):
+        data: list[dict] = await db_handler.find({}, projection={'class_': 1, 'biotop': 1, 'food': 1}, collection_name=version.collection('animals_data'))
+        facets = compute_facets(data)
+
+    return facets
+
+
+@lru_cache
+def get_animals_cache() -> VersionedCache:
+    """
+    Return the process-wide cache of animals_data snapshots.
+
+    Returns:
+        VersionedCache: Cache of :py:class:`AnimalsSnapshot` objects.
+    """
+    return VersionedCache(build_animals_snapshot)
+
+
+@lru_cache
+def get_facets_cache() -> VersionedCache:
+    """
+    Return the process-wide cache of animal facets.
+
+    Returns:
+        VersionedCache: Cache of facets returned by :py:func:`build_facets`.
+    """
+    return VersionedCache(build_facets)
+
+
+@lru_cache
+def get_metadata_cache() -> MetadataCache:
+    """
+    Return the process-wide cache of the metadata document.
+
+    Returns:
+        MetadataCache: The cache.
+    """
+    return MetadataCache()
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+
+def normalize_version(version: datetime) -> datetime:
+    """
+    Convert a version received from a client to the naive UTC datetime stored in the DB.
+
+    Args:
+        version (datetime): Value of `last_update_end` the client has.
+
+    Returns:
+        datetime: Naive datetime comparable with stored versions.
+    """
+    if(version.tzinfo is not None):
+        version = version.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return version
+
+
+def merge_changes(since: datetime, version: datetime, change_logs: list[dict]) -> tuple[set[int], set[int]]:
+    """
+    Merge change logs of dataset versions between the one the client has and the published one.
+
+    Logs are followed from the published version through their `previous` versions, so logs of versions
+    replaced by a rollback are skipped.
+
+    Args:
+        since (datetime): Version the client has.
+        version (datetime): The published version.
+        change_logs (list[dict]): Documents of the animals_changes collection newer than `since`.
+
+    Returns:
+        tuple[set[int], set[int]]: IDs of inserted or updated animals and IDs of removed animals.
+            None if the change logs do not lead to the given version and the client has to download all animals.
+    """
+    logs: dict[datetime, dict] = {change_log['_id']: change_log for change_log in change_logs}
+    chain: list[dict] = list()
+    while(version != since):
+        if(version not in logs):
+            return None
+        chain.append(logs[version])
+        version = logs[version].get('previous')
+
+    changed: set[int] = set()
+    removed: set[int] = set()
+    for change_log in reversed(chain):
+        for id_ in change_log.get('inserted', []) + change_log.get('updated', []):
+            changed.add(id_)
+            removed.discard(id_)
+        for id_ in change_log.get('removed', []):
+            removed.add(id_)
+            changed.discard(id_)
+
+    return changed, removed
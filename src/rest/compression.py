@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from functools import lru_cache
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .http_cache import select_encoding
+import brotli
+import gzip
+import threading
+
+# Encodings the server can send ordered by preference
+ENCODINGS: list[str] = ['br', 'gzip']
+
+# Responses smaller than this are not worth compressing
+MINIMUM_SIZE: int = 1024
+
+# Media types which are compressed, others are usually already compressed
+COMPRESSIBLE_TYPES: tuple[str, ...] = ('application/json', 'application/x-ndjson', 'application/x-protobuf', 'text/')
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a response body using the given content encoding.
+    """
+    if(encoding == 'br'):
+        return brotli.compress(body, quality=6)
+
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressedBodyCache():
+    """
+    LRU cache of compressed response bodies bounded by their total size.
+
+    Bodies are keyed by the request and the ETag of the response, so an unchanged dataset version is compressed only once.
+    """
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024):
+        """
+        Initialize CompressedBodyCache.
+
+        Args:
+            max_size (int, optional): Maximum total size of cached bodies in bytes. Defaults to 64 MiB.
+        """
+        self.max_size = max_size
+        self.size: int = 0
+        self._bodies: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: tuple) -> bytes:
+        with self._lock:
+            body: bytes = self._bodies.get(key)
+            if(body is not None):
+                self._bodies.move_to_end(key)
+
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        if(len(body) > self.max_size):
+            return
+
+        with self._lock:
+            previous: bytes = self._bodies.pop(key, None)
+            if(previous is not None):
+                self.size -= len(previous)
+
+            self._bodies[key] = body
+            self.size += len(body)
+            while(self.size > self.max_size):
+                _, evicted = self._bodies.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+            self.size = 0
+
+
+@lru_cache
+def get_compression_cache() -> CompressedBodyCache:
+    """
+    Return the process-wide cache of compressed response bodies.
+    """
+    return CompressedBodyCache()
+
+
+class CompressionMiddleware():
+    """
+    ASGI middleware which compresses responses using brotli or gzip according to the Accept-Encoding header.
+
+    Only complete responses are compressed, streamed responses and responses that already have a Content-Encoding are sent as they are.
+    Compressed bodies of responses with an ETag are cached.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE, cache: CompressedBodyCache = None):
+        """
+        Initialize CompressionMiddleware.
+
+        Args:
+            app (ASGIApp): The wrapped application.
+            minimum_size (int, optional): Responses smaller than this number of bytes are not compressed. Defaults to MINIMUM_SIZE.
+            cache (CompressedBodyCache, optional): Cache of compressed bodies. Defaults to the process-wide cache.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache if cache is not None else get_compression_cache()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if(scope['type'] != 'http'):
+            await self.app(scope, receive, send)
+            return
+
+        encoding: str = select_encoding(Request(scope), ENCODINGS)
+        start_message: Message = None
+
+        async def send_compressed(message: Message):
+            nonlocal start_message
+            if(message['type'] == 'http.response.start'):
+                # Sent together with the first part of the body when it is known whether it is compressed
+                start_message = message
+                return
+
+            if(start_message is None):
+                await send(message)
+                return
+
+            headers: MutableHeaders = MutableHeaders(raw=start_message['headers'])
+            body: bytes = message.get('body', b'')
+            if(message.get('more_body', False) or not self.__is_compressible__(start_message['status'], headers, body)):
+                await send(start_message)
+                start_message = None
+                await send(message)
+                return
+
+            headers.add_vary_header('Accept-Encoding')
+            if(encoding is not None):
+                body = await self.__compress__(scope, headers.get('etag'), body, encoding)
+                headers['Content-Encoding'] = encoding
+                headers['Content-Length'] = str(len(body))
+                if(headers.get('etag') is not None and not headers['etag'].startswith('W/')):
+                    # The compressed representation is only semantically equivalent to the original one
+                    headers['ETag'] = f'W/{headers["etag"]}'
+
+            await send(start_message)
+            start_message = None
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def __is_compressible__(self, status: int, headers: Headers, body: bytes) -> bool:
+        content_type: str = headers.get('content-type', '')
+        return (
+            status == 200
+            and 'content-encoding' not in headers
+            and len(body) >= self.minimum_size
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    async def __compress__(self, scope: Scope, etag: str, body: bytes, encoding: str) -> bytes:
+        if(etag is None):
+            return await run_in_threadpool(compress_body, body, encoding)
+
+        key: tuple = (scope['path'], scope.get('query_string', b''), etag, encoding)
+        compressed: bytes = self.cache.get(key)
+        if(compressed is None):
+            compressed = await run_in_threadpool(compress_body, body, encoding)
+            self.cache.put(key, compressed)
+
+        return compressed
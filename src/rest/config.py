@@ -1,7 +1,7 @@
 from functools import lru_cache
 from configparser import ConfigParser
 import os
-from server_dataclasses.interfaces import DBHandlerInterface
+from server_dataclasses.interfaces import DBHandlerInterface, AsyncDBHandlerInterface
 from types import SimpleNamespace
 
 @lru_cache
@@ -24,20 +24,28 @@ def get_settings() -> SimpleNamespace:
     # Get data from the config file into a flat dictionary
     cfg: ConfigParser = ConfigParser()
     cfg.read('config/config.cfg')
-    cfg_dict: dict = cfg._sections['base']
+    cfg_dict: dict = cfg._sections['base'] | cfg._sections['rest']
     cfg_dict['collection_name'] = 'animals_data'
 
+    # All requests share one pooled DB client which is created on startup and closed on shutdown
+    cfg_dict['shared_client'] = True
+    cfg_dict['max_pool_size'] = int(os.getenv('DB_MAX_POOL_SIZE', cfg_dict['max_pool_size']))
+    cfg_dict['min_pool_size'] = int(os.getenv('DB_MIN_POOL_SIZE', cfg_dict['min_pool_size']))
+
     if cfg_dict.get('used_db') is None:
         raise RuntimeError(f'No DBHandler specified in config file.')
 
-    # Get the required db_handler instance
-    handler: DBHandlerInterface = next((handler for handler in DBHandlerInterface.__subclasses__() if handler.name == cfg_dict['used_db']), None)
+    # Get the required db_handler class, asynchronous handlers do not block the event loop
+    handlers: list = AsyncDBHandlerInterface.__subclasses__() + DBHandlerInterface.__subclasses__()
+    handler: AsyncDBHandlerInterface = next((handler for handler in handlers if handler.name == cfg_dict['used_db']), None)
     if handler is None:
         raise RuntimeError(f'DBHandler called "{cfg_dict["used_db"]}" not found.')
 
     res = {
         'aws_storage_bucket_name': os.getenv('AWS_STORAGE_BUCKET_NAME'),
         'map_file_prefix': cfg['mbtiles_downloader']['output'],
+        'tile_cache_size': int(cfg['rest']['tile_cache_size']),
+        'metadata_ttl': float(cfg['rest']['metadata_ttl']),
         'handler_class': handler,
         'config_data': cfg_dict
     }
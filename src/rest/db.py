@@ -0,0 +1,172 @@
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Iterator
+from starlette.concurrency import run_in_threadpool
+from server_dataclasses.interfaces import DBHandlerInterface, AsyncDBHandlerInterface
+from server_dataclasses.models import IndexDefinition, WriteOperation
+from .metrics import record_db_call
+import itertools
+import time
+
+
+class SyncHandlerAdapter(AsyncDBHandlerInterface):
+    """
+    Adapter which makes a synchronous DBHandler usable by async endpoints.
+
+    Every call is run in a thread pool so that it does not block the event loop.
+
+    Args:
+        AsyncDBHandlerInterface ([type]): Interface it implements.
+    """
+
+    name: str = None
+
+    def __init__(self, handler: DBHandlerInterface):
+        self.handler = handler
+
+    async def __aenter__(self):
+        await run_in_threadpool(self.handler.__enter__)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await run_in_threadpool(self.handler.__exit__, exc_type, exc_value, traceback)
+
+    async def insert_many(self, data: list[dict], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.insert_many, data, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def insert_one(self, data: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.insert_one, data, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def update_one(self, filter_: dict, data: dict, upsert: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.update_one, filter_, data, upsert=upsert, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.delete_many, filter_, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.rename_collection, collection_new_name, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def drop_collection(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.drop_collection, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+        return await run_in_threadpool(self.handler.find, filter_, projection=projection, sort=sort, limit=limit, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def find_iter(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, batch_size: int = 100, db_name: str = None, collection_name: str = None, **kwargs) -> AsyncIterator[dict]:
+        documents: Iterator[dict] = self.handler.find_iter(filter_, projection=projection, sort=sort, batch_size=batch_size, db_name=db_name, collection_name=collection_name, **kwargs)
+        try:
+            while True:
+                # One thread pool call per batch
+                batch: list[dict] = await run_in_threadpool(lambda: list(itertools.islice(documents, batch_size)))
+                for document in batch:
+                    yield document
+
+                if(len(batch) < batch_size):
+                    break
+        finally:
+            # Closes the cursor of the handler also when the consumer stops early, e.g. when a client disconnects during streaming
+            await run_in_threadpool(documents.close)
+
+    async def collection_exists(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.collection_exists, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def ensure_indexes(self, indexes: list[IndexDefinition], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.ensure_indexes, indexes, db_name=db_name, collection_name=collection_name, **kwargs)
+
+    async def bulk_write(self, operations: list[WriteOperation], ordered: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await run_in_threadpool(self.handler.bulk_write, operations, ordered=ordered, db_name=db_name, collection_name=collection_name, **kwargs)
+
+
+class InstrumentedHandler(AsyncDBHandlerInterface):
+    """
+    Proxy which records the number and duration of calls of the wrapped handler, see :py:mod:`rest.metrics`.
+
+    Args:
+        AsyncDBHandlerInterface ([type]): Interface it implements.
+    """
+
+    name: str = None
+
+    def __init__(self, handler: AsyncDBHandlerInterface):
+        self.handler = handler
+
+    async def __measure__(self, operation: str, collection_name: str, call: Awaitable) -> Any:
+        start: float = time.perf_counter()
+        try:
+            return await call
+        finally:
+            record_db_call(operation, collection_name, time.perf_counter() - start)
+
+    async def __aenter__(self):
+        await self.handler.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return await self.handler.__aexit__(exc_type, exc_value, traceback)
+
+    async def insert_many(self, data: list[dict], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('insert_many', collection_name, self.handler.insert_many(data, db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def insert_one(self, data: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('insert_one', collection_name, self.handler.insert_one(data, db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def update_one(self, filter_: dict, data: dict, upsert: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('update_one', collection_name, self.handler.update_one(filter_, data, upsert=upsert, db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('delete_many', collection_name, self.handler.delete_many(filter_, db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('rename_collection', collection_name, self.handler.rename_collection(collection_new_name, db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def drop_collection(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('drop_collection', collection_name, self.handler.drop_collection(db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+        return await self.__measure__('find', collection_name, self.handler.find(filter_, projection=projection, sort=sort, limit=limit, db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def find_iter(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, batch_size: int = 100, db_name: str = None, collection_name: str = None, **kwargs) -> AsyncIterator[dict]:
+        documents: AsyncIterator[dict] = self.handler.find_iter(filter_, projection=projection, sort=sort, batch_size=batch_size, db_name=db_name, collection_name=collection_name, **kwargs)
+        # Time spent waiting for documents is recorded as a single call when the iteration ends
+        duration: float = 0.0
+        try:
+            while True:
+                start: float = time.perf_counter()
+                try:
+                    document: dict = await documents.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    duration += time.perf_counter() - start
+
+                yield document
+        finally:
+            await documents.aclose()
+            record_db_call('find_iter', collection_name, duration)
+
+    async def collection_exists(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('collection_exists', collection_name, self.handler.collection_exists(db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def ensure_indexes(self, indexes: list[IndexDefinition], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('ensure_indexes', collection_name, self.handler.ensure_indexes(indexes, db_name=db_name, collection_name=collection_name, **kwargs))
+
+    async def bulk_write(self, operations: list[WriteOperation], ordered: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return await self.__measure__('bulk_write', collection_name, self.handler.bulk_write(operations, ordered=ordered, db_name=db_name, collection_name=collection_name, **kwargs))
+
+
+def get_db_handler(settings: SimpleNamespace) -> AsyncDBHandlerInterface:
+    """
+    Create a DBHandler for one request.
+
+    Synchronous handlers are wrapped in :py:class:`SyncHandlerAdapter`. All calls are measured by :py:class:`InstrumentedHandler`.
+
+    Args:
+        settings (SimpleNamespace): Global settings returned by :py:func:`rest.config.get_settings`.
+
+    Returns:
+        AsyncDBHandlerInterface: The handler which is to be used in an `async with` statement.
+    """
+    handler = settings.handler_class(**settings.config_data)
+    if(not isinstance(handler, AsyncDBHandlerInterface)):
+        handler = SyncHandlerAdapter(handler)
+
+    return InstrumentedHandler(handler)
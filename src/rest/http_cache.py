@@ -0,0 +1,230 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from scrapers.datasets import current_dataset
+import aiofiles
+import hashlib
+import os
+
+
+def validator_headers(metadata: dict, datasets: tuple[str, ...] = ('animals',), media_type: str = None) -> dict[str, str]:
+    """
+    Create HTTP cache validators of the current versions of the datasets a response is built from.
+
+    The ETag is a hash of the whole metadata document so that it changes whenever a dataset or the scheduler state changes.
+    The Last-Modified header is the newest version of the given datasets, so a response built from map data is not validated by an animals update only.
+
+    Args:
+        metadata (dict): The metadata document.
+        datasets (tuple[str, ...], optional): Names of the datasets from :py:data:`DATASETS` the response is built from. Defaults to ('animals',).
+        media_type (str, optional): Media type of the response when the URL has several representations selected by the Accept header.
+            It is part of the ETag and `Vary: Accept` is added. Defaults to None.
+
+    Returns:
+        dict[str, str]: ETag, Last-Modified and Cache-Control headers.
+    """
+    hashed: str = repr(sorted(metadata.items(), key=lambda item: str(item[0])))
+    if(media_type is not None):
+        hashed += media_type
+    headers: dict[str, str] = {
+        'ETag': f'"{hashlib.sha1(hashed.encode()).hexdigest()}"',
+        # Clients can store the response but have to revalidate it before every use
+        'Cache-Control': 'no-cache'
+    }
+    if(media_type is not None):
+        headers['Vary'] = 'Accept'
+
+    versions: list[datetime] = [current_dataset(metadata, dataset).version for dataset in datasets]
+    if(len(versions) > 0 and all(isinstance(version, datetime) for version in versions)):
+        # Dates are stored in UTC
+        last_modified: datetime = max(version.replace(tzinfo=timezone.utc) if version.tzinfo is None else version for version in versions)
+        headers['Last-Modified'] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict[str, str]) -> bool:
+    """
+    Check conditional headers of the request against validators of the current dataset version.
+
+    If-None-Match takes precedence over If-Modified-Since as defined in RFC 7232.
+
+    Args:
+        request (Request): The received request.
+        headers (dict[str, str]): Validators created by :py:func:`validator_headers`.
+
+    Returns:
+        bool: True if the client already has the current version and 304 Not Modified can be returned.
+    """
+    if_none_match: str = request.headers.get('if-none-match')
+    if(if_none_match is not None):
+        etag: str = headers['ETag']
+        tags: list[str] = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+    if_modified_since: str = request.headers.get('if-modified-since')
+    last_modified: str = headers.get('Last-Modified')
+    if(if_modified_since is None or last_modified is None):
+        return False
+
+    try:
+        since: datetime = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        # Invalid dates are ignored
+        return False
+
+    if(since.tzinfo is None):
+        since = since.replace(tzinfo=timezone.utc)
+
+    return parsedate_to_datetime(last_modified) <= since
+
+
+def not_modified_response(headers: dict[str, str]) -> Response:
+    """
+    Create an empty 304 Not Modified response.
+    """
+    return Response(status_code=304, headers=headers)
+
+
+def select_encoding(request: Request, available: list[str]) -> str:
+    """
+    Pick a content encoding accepted by the client using the Accept-Encoding header.
+
+    Args:
+        request (Request): The received request.
+        available (list[str]): Encodings the server can send, ordered by preference.
+
+    Returns:
+        str: The selected encoding or None if the response is to be sent unencoded.
+    """
+    accepted: dict[str, float] = dict()
+    for part in request.headers.get('accept-encoding', '').split(','):
+        name, _, params = part.partition(';')
+        quality: float = 1.0
+        params = params.strip()
+        if(params.startswith('q=')):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if(name.strip() != ''):
+            accepted[name.strip().lower()] = quality
+
+    for encoding in available:
+        if(accepted.get(encoding, accepted.get('*', 0.0)) > 0):
+            return encoding
+
+    return None
+
+
+def file_validator_headers(path: Path) -> dict[str, str]:
+    """
+    Create HTTP cache validators of a file from its modification time and size.
+
+    Args:
+        path (Path): Path to the file.
+
+    Returns:
+        dict[str, str]: ETag, Last-Modified and Accept-Ranges headers.
+    """
+    stat_result: os.stat_result = path.stat()
+    digest: str = hashlib.md5(f'{stat_result.st_mtime}-{stat_result.st_size}'.encode()).hexdigest()
+
+    return {
+        'ETag': f'"{digest}"',
+        'Last-Modified': formatdate(stat_result.st_mtime, usegmt=True),
+        'Accept-Ranges': 'bytes'
+    }
+
+
+def parse_byte_range(range_header: str, size: int) -> tuple[int, int]:
+    """
+    Parse a Range header with a single byte range.
+
+    Args:
+        range_header (str): Value of the Range header, e.g. 'bytes=100-199', 'bytes=100-' or 'bytes=-100'.
+        size (int): Size of the whole file.
+
+    Raises:
+        ValueError: Raised when the range is invalid or cannot be satisfied.
+
+    Returns:
+        tuple[int, int]: First and last byte of the range, both inclusive. None if the header is to be ignored.
+    """
+    unit, _, ranges = range_header.partition('=')
+    if(unit.strip() != 'bytes' or ',' in ranges):
+        # Unknown units and multiple ranges are not supported, the whole file is sent instead
+        return None
+
+    start, _, end = ranges.strip().partition('-')
+    if(start == ''):
+        # Suffix range contains the last N bytes
+        length: int = int(end)
+        if(length <= 0):
+            raise ValueError(f'Invalid range: {range_header}')
+        return max(size - length, 0), size - 1
+
+    start: int = int(start)
+    end: int = size - 1 if end == '' else min(int(end), size - 1)
+    if(start >= size or start > end):
+        raise ValueError(f'Unsatisfiable range: {range_header}')
+
+    return start, end
+
+
+async def iter_file_range(path: Path, start: int, end: int, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Read a part of a file in chunks.
+    """
+    async with aiofiles.open(path, mode='rb') as f:
+        await f.seek(start)
+        remaining: int = end - start + 1
+        while(remaining > 0):
+            chunk: bytes = await f.read(min(chunk_size, remaining))
+            if(not chunk):
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request: Request, path: Path, media_type: str, filename: str) -> Response:
+    """
+    Create a response with the whole file or its part requested by the Range header.
+
+    Supports conditional requests using If-None-Match, If-Modified-Since and If-Range headers.
+
+    Args:
+        request (Request): The received request.
+        path (Path): Path to the file.
+        media_type (str): Media type of the file.
+        filename (str): Name of the file used in Content-Disposition header.
+
+    Returns:
+        Response: 200, 206, 304 or 416 response.
+    """
+    headers: dict[str, str] = file_validator_headers(path)
+    if(is_not_modified(request, headers)):
+        return not_modified_response(headers)
+
+    range_header: str = request.headers.get('range')
+    if_range: str = request.headers.get('if-range')
+    if(range_header is not None and (if_range is None or if_range in (headers['ETag'], headers['Last-Modified']))):
+        size: int = path.stat().st_size
+        try:
+            byte_range: tuple[int, int] = parse_byte_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers=headers | {'Content-Range': f'bytes */{size}'})
+
+        if(byte_range is not None):
+            start, end = byte_range
+            headers |= {
+                'Content-Range': f'bytes {start}-{end}/{size}',
+                'Content-Length': str(end - start + 1),
+                'Content-Disposition': f'attachment; filename="{filename}"'
+            }
+            return StreamingResponse(iter_file_range(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+    return FileResponse(path, media_type=media_type, filename=filename, headers=headers)
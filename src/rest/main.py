@@ -1,10 +1,67 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from .api import api_router
+from .config import get_settings
+from .cache import get_metadata_cache
+from .compression import CompressionMiddleware
+from .metrics import MetricsMiddleware
+from .notifications import listen_for_metadata_changes
+import asyncio
+import os
 
 # Create app
 app = FastAPI()
 app.include_router(api_router)
+app.add_middleware(CompressionMiddleware)
+# Added last so that it measures compressed responses
+app.add_middleware(MetricsMiddleware)
+
+@app.on_event('startup')
+async def open_db_resources():
+    """
+    Create the pooled DB client that is shared by all requests.
+    """
+    settings = app.dependency_overrides.get(get_settings, get_settings)()
+    settings.handler_class.open_shared_resources(**settings.config_data)
+
+@app.on_event('startup')
+async def start_metadata_listener():
+    """
+    Configure the metadata cache and start listening for notifications about changed metadata.
+
+    Without REDISTOGO_URL environment variable the cached metadata document only expires after its TTL.
+    """
+    settings = app.dependency_overrides.get(get_settings, get_settings)()
+    metadata_cache = app.dependency_overrides.get(get_metadata_cache, get_metadata_cache)()
+    metadata_cache.ttl = settings.metadata_ttl
+
+    redis_url: str = os.getenv('REDISTOGO_URL')
+    app.state.metadata_listener = asyncio.create_task(listen_for_metadata_changes(redis_url, metadata_cache)) if redis_url else None
+
+@app.on_event('shutdown')
+async def close_db_resources():
+    """
+    Close the pooled DB client that is shared by all requests.
+    """
+    settings = app.dependency_overrides.get(get_settings, get_settings)()
+    settings.handler_class.close_shared_resources()
+
+@app.on_event('shutdown')
+async def stop_metadata_listener():
+    """
+    Stop listening for notifications about changed metadata.
+    """
+    listener: asyncio.Task = getattr(app.state, 'metadata_listener', None)
+    if(listener is not None):
+        listener.cancel()
 
 @app.get('/')
 async def index():
-    return {'status': 'FastAPI application running.'}
\ No newline at end of file
+    return {'status': 'FastAPI application running.'}
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    """
+    Return metrics of this process in Prometheus text format.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
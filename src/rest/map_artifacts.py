@@ -0,0 +1,59 @@
+from functools import lru_cache
+from fastapi.encoders import jsonable_encoder
+from server_dataclasses.interfaces import AsyncDBHandlerInterface
+from server_dataclasses.rest_models import Metadata
+from server_dataclasses.models import MAP_ARTIFACT_ID
+from scrapers.datasets import DatasetVersion
+from .cache import VersionedCache
+import json
+
+
+async def build_map_artifact(db_handler: AsyncDBHandlerInterface, version: DatasetVersion) -> dict:
+    """
+    Load the serialized road graph created by :py:func:`scrapers.map_downloader.create_map_artifacts`.
+
+    Args:
+        db_handler (AsyncDBHandlerInterface): Handler used to load the data.
+        version (DatasetVersion): Version of 'map' dataset.
+
+    Returns:
+        dict: The content hash and the serialized data keyed by the encoding ('json', 'gzip', 'br').
+            None if map data has not been parsed since artifacts were introduced or if the JSON was too large to be stored.
+    """
+    artifact: dict = dict()
+    for document in await db_handler.find({}, collection_name=version.collection('map_artifacts')):
+        if('encoding' in document):
+            artifact |= {'hash': document['hash'], document['encoding']: document['data']}
+        elif(document['_id'] == MAP_ARTIFACT_ID):
+            # Older versions stored all encodings in one document
+            artifact |= document
+
+    return artifact if 'json' in artifact else None
+
+
+def splice_map_metadata(metadata: Metadata, graph_json: bytes) -> bytes:
+    """
+    Create the body of :py:class:`MapMetadata` response from metadata and the already serialized road graph.
+
+    Only the small metadata object is encoded, the road graph is inserted as it is.
+
+    Args:
+        metadata (Metadata): Current metadata.
+        graph_json (bytes): JSON object with nodes and roads.
+
+    Returns:
+        bytes: The JSON body.
+    """
+    metadata_json: bytes = json.dumps(jsonable_encoder(metadata), ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+    return b'{"metadata":' + metadata_json + b',' + graph_json[1:]
+
+
+@lru_cache
+def get_map_artifact_cache() -> VersionedCache:
+    """
+    Return the process-wide cache of the serialized road graph.
+
+    Returns:
+        VersionedCache: Cache of artifacts returned by :py:func:`build_map_artifact`.
+    """
+    return VersionedCache(build_map_artifact)
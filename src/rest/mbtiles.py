@@ -0,0 +1,168 @@
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import fcntl
+import os
+import sqlite3
+import tempfile
+import boto3
+
+
+class MBTilesCache():
+    """
+    Local copies of MBTiles files stored in AWS S3.
+
+    A missing file is downloaded only once no matter how many requests wait for it.
+    The download is written into a temporary file which is renamed into place when it is complete, so a partially written file is never served.
+    """
+
+    def __init__(self, cache_dir: Path = Path('./tmp')):
+        """
+        Initialize MBTilesCache.
+
+        Args:
+            cache_dir (Path, optional): Directory where downloaded files are stored. Defaults to Path('./tmp').
+        """
+        self.cache_dir = cache_dir
+        self._locks: dict[Path, asyncio.Lock] = dict()
+        self._tile_readers: dict[Path, TileReader] = dict()
+
+    def local_path(self, file_prefix: str) -> Path:
+        return self.cache_dir / file_prefix / f'{file_prefix}.mbtiles'
+
+    async def get_path(self, bucket_name: str, file_prefix: str) -> Path:
+        """
+        Return the path of a local copy of the MBTiles file. The file is downloaded if it is not cached yet.
+
+        Args:
+            bucket_name (str): Name of the AWS S3 bucket where the file is stored.
+            file_prefix (str): Name of the file without the extension.
+
+        Returns:
+            Path: Path to the complete local copy.
+        """
+        path: Path = self.local_path(file_prefix)
+        if(path.is_file()):
+            return path
+
+        lock: asyncio.Lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            # The file might have been downloaded while we were waiting
+            if(not path.is_file()):
+                await run_in_threadpool(download_file, bucket_name, path.name, path)
+
+        return path
+
+    def get_tile_reader(self, path: Path, cache_size: int) -> 'TileReader':
+        """
+        Return a reader of single tiles of a local MBTiles file. A new reader is created when the file changes.
+
+        Args:
+            path (Path): Path to the local MBTiles file returned by :py:meth:`get_path`.
+            cache_size (int): Maximum number of tiles held in memory by the reader.
+
+        Returns:
+            TileReader: The reader.
+        """
+        mtime: float = path.stat().st_mtime
+        reader: TileReader = self._tile_readers.get(path)
+        if(reader is None or reader.mtime != mtime):
+            reader = TileReader(path, mtime, cache_size)
+            self._tile_readers[path] = reader
+
+        return reader
+
+
+class TileReader():
+    """
+    Reads single tiles out of an MBTiles SQLite database. Recently read tiles are held in a bounded LRU cache.
+    """
+
+    MEDIA_TYPES: dict[str, str] = {
+        'json': 'application/json',
+        'pbf': 'application/x-protobuf',
+        'mvt': 'application/x-protobuf',
+        'png': 'image/png',
+        'jpg': 'image/jpeg'
+    }
+
+    def __init__(self, path: Path, mtime: float, cache_size: int):
+        """
+        Initialize TileReader.
+
+        Args:
+            path (Path): Path to the MBTiles file.
+            mtime (float): Modification time of the file when the reader was created.
+            cache_size (int): Maximum number of tiles held in memory.
+        """
+        self.path = path
+        self.mtime = mtime
+        self.get_tile = lru_cache(maxsize=cache_size)(self.__read_tile__)
+
+        with self.__connect__() as conn:
+            tile_format = conn.execute("SELECT value FROM metadata WHERE name = 'format'").fetchone()
+        self.media_type: str = TileReader.MEDIA_TYPES.get(tile_format[0] if tile_format else None, 'application/octet-stream')
+
+    def __connect__(self) -> closing:
+        return closing(sqlite3.connect(f'file:{self.path}?mode=ro', uri=True))
+
+    def __read_tile__(self, z: int, x: int, y: int) -> bytes:
+        """
+        Read one tile from the database.
+
+        Args:
+            z (int): Zoom level.
+            x (int): Column of the tile in XYZ scheme.
+            y (int): Row of the tile in XYZ scheme.
+
+        Returns:
+            bytes: Data of the tile or None if the tile does not exist.
+        """
+        # MBTiles use TMS scheme where rows are numbered from the south
+        tms_y: int = (2 ** z - 1) - y
+        with self.__connect__() as conn:
+            row = conn.execute('SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?', (z, x, tms_y)).fetchone()
+
+        return bytes(row[0]) if row is not None else None
+
+
+def download_file(bucket_name: str, filename: str, path: Path):
+    """
+    Download a file from AWS S3 and atomically move it to the given path.
+
+    A lock file makes sure that only one process downloads the file at a time.
+
+    Args:
+        bucket_name (str): Name of the AWS S3 bucket where the file is stored.
+        filename (str): Name of the file in the bucket.
+        path (Path): Where the file is to be stored.
+    """
+    os.makedirs(path.parent, exist_ok=True)
+    with open(path.with_suffix('.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if(path.is_file()):
+                # Downloaded by another process
+                return
+
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'{path.name}.', suffix='.part')
+            os.close(fd)
+            try:
+                client = boto3.client('s3')
+                client.download_file(bucket_name, filename, tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@lru_cache
+def get_mbtiles_cache() -> MBTilesCache:
+    """
+    Return the process-wide cache of MBTiles files.
+    """
+    return MBTilesCache()
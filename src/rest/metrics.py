@@ -0,0 +1,101 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from prometheus_client import Histogram
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import re
+import time
+
+# Latency buckets in seconds, the API is expected to answer in milliseconds
+LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS: tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Time spent processing a request.', ['method', 'route', 'status'], buckets=LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Size of response bodies as sent, i.e. after compression.', ['method', 'route'], buckets=SIZE_BUCKETS)
+DB_CALLS_PER_REQUEST = Histogram('db_calls_per_request', 'Number of DBHandler calls made by one request.', ['route'], buckets=COUNT_BUCKETS)
+DB_TIME_PER_REQUEST = Histogram('db_time_per_request_seconds', 'Total time one request spent waiting for DBHandler calls.', ['route'], buckets=LATENCY_BUCKETS)
+DB_CALL_LATENCY = Histogram('db_call_duration_seconds', 'Duration of DBHandler calls.', ['operation', 'collection'], buckets=LATENCY_BUCKETS)
+
+# Label of requests that do not match any route, so that unknown paths do not create new time series
+UNMATCHED_ROUTE: str = '<unmatched>'
+
+# Suffix of collections of one dataset version, see scrapers.datasets.versioned_name. It is not used in labels so that every run does not create new time series.
+VERSION_SUFFIX = re.compile(r'_v\d+$')
+
+
+@dataclass
+class RequestStats():
+    """
+    DB usage of one request.
+    """
+
+    db_calls: int = 0
+    db_time: float = 0.0
+
+
+_request_stats: ContextVar[RequestStats] = ContextVar('request_stats', default=None)
+
+
+def record_db_call(operation: str, collection_name: str, duration: float):
+    """
+    Record one DBHandler call in the global metrics and in the statistics of the current request.
+
+    Args:
+        operation (str): Name of the called method, e.g. 'find'.
+        collection_name (str): Name of the used collection, None for the default one. Versioned collections are labelled by their unversioned name.
+        duration (float): Duration of the call in seconds.
+    """
+    DB_CALL_LATENCY.labels(operation, VERSION_SUFFIX.sub('', collection_name or 'default')).observe(duration)
+
+    stats: RequestStats = _request_stats.get()
+    if(stats is not None):
+        stats.db_calls += 1
+        stats.db_time += duration
+
+
+class MetricsMiddleware():
+    """
+    ASGI middleware which records latency, response size and DB usage of every request labelled by its route.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def __route__(self, scope: Scope) -> str:
+        # The app is the FastAPI application under all middlewares
+        for route in scope['app'].router.routes:
+            match, _ = route.matches(scope)
+            if(match == Match.FULL):
+                return route.path
+
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if(scope['type'] != 'http'):
+            await self.app(scope, receive, send)
+            return
+
+        route: str = self.__route__(scope)
+        stats: RequestStats = RequestStats()
+        token = _request_stats.set(stats)
+        status: int = 500
+        size: int = 0
+
+        async def send_measured(message: Message):
+            nonlocal status, size
+            if(message['type'] == 'http.response.start'):
+                status = message['status']
+            elif(message['type'] == 'http.response.body'):
+                size += len(message.get('body', b''))
+            await send(message)
+
+        start: float = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            REQUEST_LATENCY.labels(scope['method'], route, str(status)).observe(time.perf_counter() - start)
+            RESPONSE_SIZE.labels(scope['method'], route).observe(size)
+            DB_CALLS_PER_REQUEST.labels(route).observe(stats.db_calls)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_time)
+            _request_stats.reset(token)
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+import redis.asyncio as redis
+from scrapers.notifications import METADATA_CHANNEL
+from .cache import MetadataCache
+
+logger = logging.getLogger(__name__)
+
+
+async def listen_for_metadata_changes(redis_url: str, metadata_cache: MetadataCache, retry_delay: float = 5.0):
+    """
+    Invalidate the cached metadata document whenever a writer publishes a change notification.
+
+    Runs until it is cancelled. A lost connection is reopened after a delay.
+
+    Args:
+        redis_url (str): URL of the Redis server the notifications are published to.
+        metadata_cache (MetadataCache): The invalidated cache.
+        retry_delay (float, optional): Number of seconds to wait before reconnecting. Defaults to 5.0.
+    """
+    while True:
+        client = redis.from_url(redis_url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(METADATA_CHANNEL)
+            # Notifications published while we were not subscribed are lost
+            metadata_cache.invalidate()
+            async for message in pubsub.listen():
+                if(message['type'] == 'message'):
+                    metadata_cache.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning('Metadata change notifications are not received, reconnecting.', exc_info=True)
+            await asyncio.sleep(retry_delay)
+        finally:
+            await pubsub.reset()
+            await client.close()
@@ -0,0 +1,45 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from fastapi import HTTPException
+import binascii
+import json
+
+# Page size used when only the 'after' cursor is given
+DEFAULT_PAGE_SIZE: int = 50
+MAX_PAGE_SIZE: int = 500
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Create an opaque cursor which points behind the document with the given ID.
+
+    Args:
+        last_id (int): ID of the last document of the current page.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    return urlsafe_b64encode(json.dumps({'after': last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Get the ID of the last document of the previous page from a cursor created by :py:func:`encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Raises:
+        HTTPException: Raised when the cursor is invalid.
+
+    Returns:
+        int: ID of the last document of the previous page.
+    """
+    try:
+        last_id = json.loads(urlsafe_b64decode(cursor.encode()))['after']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if(not isinstance(last_id, int)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return last_id
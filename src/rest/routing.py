@@ -0,0 +1,285 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterator
+import heapq
+import math
+from server_dataclasses.interfaces import AsyncDBHandlerInterface
+from scrapers.datasets import DatasetVersion
+from .cache import VersionedCache
+
+# Mean radius of the Earth in meters
+EARTH_RADIUS: float = 6371008.8
+
+# Size of cells of the grid used to find the nearest road node, in degrees
+GRID_CELL_SIZE: float = 0.0005
+
+# Points farther than this many degrees from the road nodes are not routed, about 5 km in Prague
+MAX_ENDPOINT_OFFSET: float = 0.05
+
+# The A* heuristic uses a flat projection which slightly overestimates long distances, the factor keeps it admissible
+HEURISTIC_FACTOR: float = 0.99
+
+
+def haversine(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    """
+    Compute the great-circle distance between two points.
+
+    Returns:
+        float: The distance in meters.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi: float = phi2 - phi1
+    d_lambda: float = math.radians(lon2 - lon1)
+    a: float = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def is_valid_point(lon: float, lat: float) -> bool:
+    """
+    Check that the point has finite coordinates within the ranges of longitude and latitude.
+    """
+    return math.isfinite(lon) and math.isfinite(lat) and -180 <= lon <= 180 and -90 <= lat <= 90
+
+
+def iter_coordinates(coordinates: list) -> Iterator[tuple[float, float]]:
+    """
+    Iterate over all (lon, lat) points of nested GeoJSON coordinates of any geometry type.
+    """
+    if(len(coordinates) > 0 and isinstance(coordinates[0], (int, float))):
+        yield coordinates[0], coordinates[1]
+        return
+
+    for item in coordinates:
+        yield from iter_coordinates(item)
+
+
+@dataclass
+class RoadGraph():
+    """
+    Road map of the zoo prepared for routing. Nodes are road nodes, edges connect consecutive nodes of roads.
+    """
+
+    # Key is the node ID, value is (lon, lat)
+    nodes: dict[int, tuple[float, float]] = field(default_factory=dict)
+
+    # Key is the node ID, value is a list of (neighbour ID, distance in meters)
+    adjacency: dict[int, list[tuple[int, float]]] = field(default_factory=dict)
+
+    # Points of animal pens and zoo parts. Key is the map location ID.
+    locations: dict[int, list[tuple[float, float]]] = field(default_factory=dict)
+
+    # Node IDs in grid cells, key is (column, row)
+    cells: dict[tuple[int, int], list[int]] = field(default_factory=dict)
+
+    # Smallest and largest (column, row) of non-empty cells
+    cell_bounds: tuple[int, int, int, int] = None
+
+    # Positions of nodes in meters in a local flat projection used by the A* heuristic
+    projected: dict[int, tuple[float, float]] = field(default_factory=dict)
+
+    # Cache of road nodes nearest to map locations
+    location_nodes: dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, roads: list[dict], locations: list[dict]) -> 'RoadGraph':
+        """
+        Create the graph from roads whose geometry coordinates are road nodes.
+
+        Args:
+            roads (list[dict]): Documents of roads collection.
+            locations (list[dict]): Documents of animal_pens and zoo_parts collections.
+
+        Returns:
+            RoadGraph: The new graph.
+        """
+        graph: RoadGraph = cls()
+        for road in roads:
+            previous_id: int = None
+            for node in road['geometry']['coordinates']:
+                node_id: int = node['_id'] if '_id' in node else node['id']
+                graph.__add_node__(node_id, node['lon'], node['lat'])
+                if(previous_id is not None and previous_id != node_id):
+                    graph.__add_edge__(previous_id, node_id)
+                previous_id = node_id
+
+        for location in locations:
+            graph.locations[location['_id']] = list(iter_coordinates(location['geometry']['coordinates']))
+
+        if(len(graph.cells) > 0):
+            columns: list[int] = [column for column, _ in graph.cells]
+            rows: list[int] = [row for _, row in graph.cells]
+            graph.cell_bounds = (min(columns), min(rows), max(columns), max(rows))
+
+        # Equirectangular projection is precise enough within the zoo
+        mean_lat: float = sum(lat for _, lat in graph.nodes.values()) / max(len(graph.nodes), 1)
+        meters_per_degree: float = math.pi / 180 * EARTH_RADIUS * HEURISTIC_FACTOR
+        lon_scale: float = meters_per_degree * math.cos(math.radians(mean_lat))
+        graph.projected = {node_id: (lon * lon_scale, lat * meters_per_degree) for node_id, (lon, lat) in graph.nodes.items()}
+
+        return graph
+
+    @staticmethod
+    def __cell__(lon: float, lat: float) -> tuple[int, int]:
+        return math.floor(lon / GRID_CELL_SIZE), math.floor(lat / GRID_CELL_SIZE)
+
+    def __add_node__(self, node_id: int, lon: float, lat: float):
+        if(node_id not in self.nodes):
+            self.nodes[node_id] = (lon, lat)
+            self.adjacency[node_id] = list()
+            self.cells.setdefault(RoadGraph.__cell__(lon, lat), list()).append(node_id)
+
+    def __add_edge__(self, node_a: int, node_b: int):
+        distance: float = haversine(*self.nodes[node_a], *self.nodes[node_b])
+        self.adjacency[node_a].append((node_b, distance))
+        self.adjacency[node_b].append((node_a, distance))
+
+    def covers(self, lon: float, lat: float) -> bool:
+        """
+        Check that the point is at most :py:data:`MAX_ENDPOINT_OFFSET` degrees outside the cells with road nodes.
+        Every point is covered by an empty graph since no node can be found for it anyway.
+        """
+        if(self.cell_bounds is None):
+            return True
+
+        min_column, min_row, max_column, max_row = self.cell_bounds
+        return (min_column * GRID_CELL_SIZE - MAX_ENDPOINT_OFFSET <= lon <= (max_column + 1) * GRID_CELL_SIZE + MAX_ENDPOINT_OFFSET
+            and min_row * GRID_CELL_SIZE - MAX_ENDPOINT_OFFSET <= lat <= (max_row + 1) * GRID_CELL_SIZE + MAX_ENDPOINT_OFFSET)
+
+    def nearest_node(self, lon: float, lat: float) -> int:
+        """
+        Find the road node nearest to the given point. Cells of the grid are searched in growing rings around the point.
+
+        Once a ring covers more cells than there are non-empty cells all nodes are checked instead, so far points do not scan empty cells.
+
+        Returns:
+            int: ID of the node or None if the graph is empty.
+        """
+        if(len(self.cells) == 0):
+            return None
+
+        column, row = RoadGraph.__cell__(lon, lat)
+        # Smallest side of a cell in meters, used to find out when no closer node can exist
+        cell_side: float = GRID_CELL_SIZE * math.pi / 180 * EARTH_RADIUS * math.cos(math.radians(min(abs(lat) + GRID_CELL_SIZE, 90)))
+        min_column, min_row, max_column, max_row = self.cell_bounds
+        max_ring: int = max(abs(min_column - column), abs(max_column - column), abs(min_row - row), abs(max_row - row))
+
+        best: tuple[float, int] = None
+        for ring in range(max_ring + 1):
+            if((2 * ring + 1) ** 2 > len(self.cells)):
+                # The searched area is larger than the indexed one, it is faster to check all nodes
+                return min(self.nodes, key=lambda node_id: haversine(lon, lat, *self.nodes[node_id]))
+
+            for cell in RoadGraph.__ring_cells__(column, row, ring):
+                for node_id in self.cells.get(cell, []):
+                    distance: float = haversine(lon, lat, *self.nodes[node_id])
+                    if(best is None or distance < best[0]):
+                        best = (distance, node_id)
+
+            # Nodes in the following rings are at least this far away
+            if(best is not None and best[0] <= ring * cell_side):
+                break
+
+        return best[1]
+
+    @staticmethod
+    def __ring_cells__(column: int, row: int, ring: int) -> Iterator[tuple[int, int]]:
+        if(ring == 0):
+            yield column, row
+            return
+
+        for c in range(column - ring, column + ring + 1):
+            yield c, row - ring
+            yield c, row + ring
+        for r in range(row - ring + 1, row + ring):
+            yield column - ring, r
+            yield column + ring, r
+
+    def location_node(self, location_id: int) -> int:
+        """
+        Find the road node nearest to an animal pen or a zoo part.
+
+        Returns:
+            int: ID of the node or None if the location does not exist.
+        """
+        if(location_id not in self.location_nodes):
+            points: list[tuple[float, float]] = self.locations.get(location_id)
+            if(not points):
+                return None
+
+            nearest: list[int] = [self.nearest_node(lon, lat) for lon, lat in points]
+            self.location_nodes[location_id] = min(nearest, key=lambda node_id: min(haversine(*point, *self.nodes[node_id]) for point in points))
+
+        return self.location_nodes[location_id]
+
+    def shortest_path(self, start: int, goal: int) -> tuple[list[int], float]:
+        """
+        Find the shortest path between two nodes using A* with the straight-line distance as the heuristic.
+
+        Args:
+            start (int): ID of the first node.
+            goal (int): ID of the last node.
+
+        Returns:
+            tuple[list[int], float]: IDs of nodes of the path and its length in meters. None if the nodes are not connected.
+        """
+        goal_x, goal_y = self.projected[goal]
+
+        def heuristic(node_id: int) -> float:
+            x, y = self.projected[node_id]
+            return math.hypot(x - goal_x, y - goal_y)
+
+        distances: dict[int, float] = {start: 0.0}
+        previous: dict[int, int] = dict()
+        queue: list[tuple[float, int]] = [(heuristic(start), start)]
+        closed: set[int] = set()
+
+        while(len(queue) > 0):
+            _, node_id = heapq.heappop(queue)
+            if(node_id == goal):
+                path: list[int] = [goal]
+                while(path[-1] != start):
+                    path.append(previous[path[-1]])
+                return path[::-1], distances[goal]
+
+            if(node_id in closed):
+                continue
+            closed.add(node_id)
+
+            for neighbour_id, edge_length in self.adjacency[node_id]:
+                distance: float = distances[node_id] + edge_length
+                if(distance < distances.get(neighbour_id, math.inf)):
+                    distances[neighbour_id] = distance
+                    previous[neighbour_id] = node_id
+                    heapq.heappush(queue, (distance + heuristic(neighbour_id), neighbour_id))
+
+        return None
+
+
+async def build_road_graph(db_handler: AsyncDBHandlerInterface, version: DatasetVersion) -> RoadGraph:
+    """
+    Load roads and map locations and build the graph used for routing.
+
+    Args:
+        db_handler (AsyncDBHandlerInterface): Handler used to load the data.
+        version (DatasetVersion): Version of 'map' dataset.
+
+    Returns:
+        RoadGraph: The new graph.
+    """
+    roads: list[dict] = await db_handler.find({}, projection={'geometry': 1}, collection_name=version.collection('roads'))
+    locations: list[dict] = await db_handler.find({}, projection={'geometry': 1}, collection_name=version.collection('animal_pens'))
+    locations += await db_handler.find({}, projection={'geometry': 1}, collection_name=version.collection('zoo_parts'))
+
+    return RoadGraph.build(roads, locations)
+
+
+@lru_cache
+def get_road_graph_cache() -> VersionedCache:
+    """
+    Return the process-wide cache of the road graph.
+
+    Returns:
+        VersionedCache: Cache of :py:class:`RoadGraph` objects.
+    """
+    return VersionedCache(build_road_graph)
@@ -0,0 +1,147 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from functools import lru_cache
+import re
+import unicodedata
+from server_dataclasses.interfaces import AsyncDBHandlerInterface
+from server_dataclasses.rest_models import AnimalDataOutput
+from scrapers.datasets import DatasetVersion
+from .cache import AnimalsSnapshot, VersionedCache, get_animals_cache
+
+_WORD = re.compile(r'\w+')
+
+# Searched attributes of animals and weights of their matches
+SEARCH_FIELDS: dict[str, float] = {
+    'name': 3.0,
+    'latin_name': 2.0,
+    'base_summary': 1.0
+}
+
+# Weight of a match where the query term is only a prefix of the word
+PREFIX_MATCH_WEIGHT: float = 0.5
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase the text and remove diacritics, e.g. 'Žirafa' becomes 'zirafa'.
+    """
+    decomposed: str = unicodedata.normalize('NFKD', text.lower())
+
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split the text into folded words.
+    """
+    return _WORD.findall(fold(text)) if text else []
+
+
+@dataclass
+class SearchIndex():
+    """
+    Inverted index of searched attributes of animals for one dataset version.
+    """
+
+    animals_by_id: dict[int, AnimalDataOutput] = field(default_factory=dict)
+
+    # Key is a folded word, value is a dictionary of animal IDs and weights of the word in the animal's attributes
+    postings: dict[str, dict[int, float]] = field(default_factory=dict)
+
+    # All indexed words sorted so that words with a common prefix can be found by a binary search
+    words: list[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, animals: list[AnimalDataOutput]) -> 'SearchIndex':
+        """
+        Create an index of the given animals.
+
+        Args:
+            animals (list[AnimalDataOutput]): Indexed animals.
+
+        Returns:
+            SearchIndex: The new index.
+        """
+        postings: dict[str, dict[int, float]] = dict()
+        for animal in animals:
+            for attr, weight in SEARCH_FIELDS.items():
+                for word in tokenize(getattr(animal, attr)):
+                    weights: dict[int, float] = postings.setdefault(word, dict())
+                    weights[animal.id] = weights.get(animal.id, 0.0) + weight
+
+        return cls(
+            animals_by_id={animal.id: animal for animal in animals},
+            postings=postings,
+            words=sorted(postings)
+        )
+
+    def __prefixed_words__(self, prefix: str) -> list[str]:
+        start: int = bisect_left(self.words, prefix)
+        end: int = start
+        while(end < len(self.words) and self.words[end].startswith(prefix)):
+            end += 1
+
+        return self.words[start:end]
+
+    def search(self, query: str, limit: int = 20, include_currently_unavailable: bool = False) -> list[AnimalDataOutput]:
+        """
+        Find animals whose attributes contain all words of the query. Every query word also matches words it is a prefix of.
+
+        Args:
+            query (str): The searched text. Diacritics and case are ignored.
+            limit (int, optional): Maximum number of returned animals. Defaults to 20.
+            include_currently_unavailable (bool, optional): If False then only currently available animals are returned. Defaults to False.
+
+        Returns:
+            list[AnimalDataOutput]: Found animals, the best match first.
+        """
+        terms: list[str] = tokenize(query)
+        if(len(terms) == 0):
+            return []
+
+        scores: dict[int, float] = None
+        for term in terms:
+            term_scores: dict[int, float] = dict()
+            for word in self.__prefixed_words__(term):
+                match_weight: float = 1.0 if word == term else PREFIX_MATCH_WEIGHT
+                for animal_id, weight in self.postings[word].items():
+                    term_scores[animal_id] = max(term_scores.get(animal_id, 0.0), weight * match_weight)
+
+            # Animals have to match all terms
+            scores = term_scores if scores is None else {animal_id: score + term_scores[animal_id] for animal_id, score in scores.items() if animal_id in term_scores}
+            if(len(scores) == 0):
+                return []
+
+        animals: list[AnimalDataOutput] = [self.animals_by_id[animal_id] for animal_id in scores]
+        if(not include_currently_unavailable):
+            animals = [animal for animal in animals if animal.is_currently_available]
+        animals.sort(key=lambda animal: (-scores[animal.id], animal.id))
+
+        return animals[:limit]
+
+
+async def build_search_index(db_handler: AsyncDBHandlerInterface, version: DatasetVersion) -> SearchIndex:
+    """
+    Build a search index from the animals snapshot of the given version.
+
+    Args:
+        db_handler (AsyncDBHandlerInterface): Handler used to load the snapshot if it is not cached.
+        version (DatasetVersion): Version of 'animals' dataset.
+
+    Returns:
+        SearchIndex: The new index.
+    """
+    snapshot: AnimalsSnapshot = await get_animals_cache().get(db_handler, version)
+
+    return SearchIndex.build(snapshot.animals)
+
+
+@lru_cache
+def get_search_index_cache() -> VersionedCache:
+    """
+    Return the process-wide cache of search indexes.
+
+    Returns:
+        VersionedCache: Cache of :py:class:`SearchIndex` objects.
+    """
+    return VersionedCache(build_search_index)
@@ -0,0 +1,82 @@
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from server_dataclasses.rest_models import AnimalDataOutput
+import copy
+import orjson
+
+# (output key, attribute name, default value) of every field of AnimalDataOutput in the order of the response schema
+_ANIMAL_FIELDS: list[tuple[str, str, Any]] = [(f.alias, f.name, f.default) for f in AnimalDataOutput.__fields__.values()]
+
+
+def animal_document(document: dict) -> dict:
+    """
+    Shape a trusted animals_data document exactly like a serialized :py:class:`AnimalDataOutput` without validating it.
+
+    Missing attributes get their default values and attributes that are not part of the schema are dropped.
+
+    Args:
+        document (dict): Document loaded from animals_data collection.
+
+    Returns:
+        dict: Dictionary with the same keys and order as `AnimalDataOutput(**document).dict(by_alias=True)`.
+    """
+    res: dict = dict()
+    for key, name, default in _ANIMAL_FIELDS:
+        if(key in document):
+            res[key] = document[key]
+        elif(name in document):
+            res[key] = document[name]
+        else:
+            res[key] = copy.copy(default)
+
+    return res
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serialize JSON-compatible data, datetimes and dataclasses into compact JSON bytes.
+    """
+    return orjson.dumps(data)
+
+
+def model_json(model: BaseModel) -> bytes:
+    """
+    Serialize a pydantic model the same way FastAPI serializes a `response_model`.
+    """
+    return dumps(jsonable_encoder(model, by_alias=True))
+
+
+def animals_json(documents: list[dict]) -> list[bytes]:
+    """
+    Serialize trusted animals_data documents, each one into its own JSON object.
+
+    Args:
+        documents (list[dict]): Documents loaded from animals_data collection.
+
+    Returns:
+        list[bytes]: JSON objects matching the schema of :py:class:`AnimalDataOutput`.
+    """
+    return [dumps(animal_document(document)) for document in documents]
+
+
+def json_array(items: list[bytes]) -> bytes:
+    """
+    Join already serialized JSON values into a JSON array.
+    """
+    return b'[' + b','.join(items) + b']'
+
+
+def animals_result_json(metadata_json: bytes, data_json: bytes, next_cursor: str = None) -> bytes:
+    """
+    Create the body of :py:class:`AnimalsResult` response from already serialized parts.
+
+    Args:
+        metadata_json (bytes): Serialized :py:class:`Metadata`.
+        data_json (bytes): JSON array of serialized animals.
+        next_cursor (str, optional): Cursor of the next page. Defaults to None.
+
+    Returns:
+        bytes: The JSON body.
+    """
+    return b'{"metadata":' + metadata_json + b',"data":' + data_json + b',"next":' + dumps(next_cursor) + b'}'
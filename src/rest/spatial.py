@@ -0,0 +1,269 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterator
+import math
+from server_dataclasses.interfaces import AsyncDBHandlerInterface
+from scrapers.datasets import DatasetVersion
+from .cache import VersionedCache
+from .routing import EARTH_RADIUS, is_valid_point
+
+# Size of cells of the spatial grid in degrees, about 35x55 meters in Prague
+GRID_CELL_SIZE: float = 0.0005
+
+METERS_PER_DEGREE: float = math.pi / 180 * EARTH_RADIUS
+
+# Items whose bounding box overlaps more cells are not stored in cells, they are candidates of every query
+MAX_ITEM_CELLS: int = 10000
+
+
+def iter_rings(coordinates: list) -> Iterator[list[tuple[float, float]]]:
+    """
+    Iterate over innermost lists of (lon, lat) points of nested GeoJSON coordinates of any geometry type.
+    """
+    if(len(coordinates) == 0):
+        return
+
+    if(isinstance(coordinates[0], (int, float))):
+        # A single point
+        yield [(coordinates[0], coordinates[1])]
+    elif(len(coordinates[0]) > 0 and isinstance(coordinates[0][0], (int, float))):
+        yield [(point[0], point[1]) for point in coordinates]
+    else:
+        for item in coordinates:
+            yield from iter_rings(item)
+
+
+@dataclass
+class MapLocation():
+    """
+    Geometry of an animal pen or a zoo part prepared for spatial queries.
+    """
+
+    id: int
+    name: str = None
+    is_animal_pen: bool = False
+    is_building: bool = False
+    is_polygon: bool = False
+    rings: list[list[tuple[float, float]]] = field(default_factory=list)
+
+    # (min_lon, min_lat, max_lon, max_lat)
+    bbox: tuple[float, float, float, float] = None
+
+    @classmethod
+    def from_document(cls, document: dict) -> 'MapLocation':
+        geometry: dict = document['geometry']
+        rings: list[list[tuple[float, float]]] = [ring for ring in iter_rings(geometry['coordinates']) if len(ring) > 0]
+        points: list[tuple[float, float]] = [point for ring in rings for point in ring]
+
+        return cls(
+            id=document['_id'],
+            name=document.get('name'),
+            is_animal_pen=document.get('is_animal_pen', False),
+            is_building=document.get('is_building', False),
+            is_polygon='Polygon' in geometry.get('_type', geometry.get('type', '')),
+            rings=rings,
+            bbox=(min(lon for lon, _ in points), min(lat for _, lat in points), max(lon for lon, _ in points), max(lat for _, lat in points)) if points else None
+        )
+
+    def distance(self, lon: float, lat: float) -> float:
+        """
+        Compute the distance between the point and the geometry. Points inside a polygon have zero distance.
+
+        A local flat projection around the point is used which is precise enough within the zoo.
+
+        Returns:
+            float: The distance in meters.
+        """
+        lon_scale: float = METERS_PER_DEGREE * math.cos(math.radians(lat))
+        projected: list[list[tuple[float, float]]] = [[((p_lon - lon) * lon_scale, (p_lat - lat) * METERS_PER_DEGREE) for p_lon, p_lat in ring] for ring in self.rings]
+
+        if(self.is_polygon and MapLocation.__contains_origin__(projected)):
+            return 0.0
+
+        best: float = math.inf
+        for ring in projected:
+            if(len(ring) == 1):
+                best = min(best, math.hypot(*ring[0]))
+            for a, b in zip(ring, ring[1:]):
+                best = min(best, MapLocation.__origin_segment_distance__(a, b))
+
+        return best
+
+    @staticmethod
+    def __contains_origin__(rings: list[list[tuple[float, float]]]) -> bool:
+        # Even-odd rule, holes are rings inside the outer ring
+        inside: bool = False
+        for ring in rings:
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+                if((y1 > 0) != (y2 > 0) and 0 < x1 + (0 - y1) * (x2 - x1) / (y2 - y1)):
+                    inside = not inside
+
+        return inside
+
+    @staticmethod
+    def __origin_segment_distance__(a: tuple[float, float], b: tuple[float, float]) -> float:
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        length: float = dx * dx + dy * dy
+        t: float = 0.0 if length == 0 else max(0.0, min(1.0, -(a[0] * dx + a[1] * dy) / length))
+
+        return math.hypot(a[0] + t * dx, a[1] + t * dy)
+
+
+class GridIndex():
+    """
+    Uniform grid of bounding boxes. Every item is stored in all cells its bounding box overlaps,
+    so a query only has to look at items in the cells the queried area overlaps.
+
+    Items with very large bounding boxes are kept apart so that inserting them does not fill a huge number of cells.
+    """
+
+    def __init__(self, cell_size: float = GRID_CELL_SIZE):
+        """
+        Initialize GridIndex.
+
+        Args:
+            cell_size (float, optional): Size of cells in degrees. Defaults to GRID_CELL_SIZE.
+        """
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list[int]] = dict()
+        self.large_items: set[int] = set()
+
+    def __cell_range__(self, bbox: tuple[float, float, float, float]) -> Iterator[tuple[int, int]]:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        for column in range(math.floor(min_lon / self.cell_size), math.floor(max_lon / self.cell_size) + 1):
+            for row in range(math.floor(min_lat / self.cell_size), math.floor(max_lat / self.cell_size) + 1):
+                yield column, row
+
+    def __cell_count__(self, bbox: tuple[float, float, float, float]) -> int:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        return (math.floor(max_lon / self.cell_size) - math.floor(min_lon / self.cell_size) + 1) * (math.floor(max_lat / self.cell_size) - math.floor(min_lat / self.cell_size) + 1)
+
+    def insert(self, item_id: int, bbox: tuple[float, float, float, float]):
+        if(self.__cell_count__(bbox) > MAX_ITEM_CELLS):
+            self.large_items.add(item_id)
+            return
+
+        for cell in self.__cell_range__(bbox):
+            self.cells.setdefault(cell, list()).append(item_id)
+
+    def query(self, bbox: tuple[float, float, float, float]) -> set[int]:
+        """
+        Find items whose cells overlap the bounding box. The result can contain items that do not overlap the box itself.
+
+        Args:
+            bbox (tuple[float, float, float, float]): (min_lon, min_lat, max_lon, max_lat) with finite coordinates.
+
+        Returns:
+            set[int]: IDs of candidate items.
+        """
+        min_lon, min_lat, max_lon, max_lat = bbox
+        min_column, min_row = math.floor(min_lon / self.cell_size), math.floor(min_lat / self.cell_size)
+        max_column, max_row = math.floor(max_lon / self.cell_size), math.floor(max_lat / self.cell_size)
+
+        res: set[int] = set(self.large_items)
+        if(self.__cell_count__(bbox) > len(self.cells)):
+            # The box is larger than the indexed area, it is faster to check non-empty cells
+            for (column, row), item_ids in self.cells.items():
+                if(min_column <= column <= max_column and min_row <= row <= max_row):
+                    res.update(item_ids)
+        else:
+            for cell in self.__cell_range__(bbox):
+                res.update(self.cells.get(cell, []))
+
+        return res
+
+
+@dataclass
+class SpatialIndex():
+    """
+    Animal pens and zoo parts of one map version indexed by their location.
+    """
+
+    locations: dict[int, MapLocation] = field(default_factory=dict)
+    grid: GridIndex = field(default_factory=GridIndex)
+
+    @classmethod
+    def build(cls, documents: list[dict]) -> 'SpatialIndex':
+        """
+        Create an index of the given animal_pens and zoo_parts documents.
+        """
+        index: SpatialIndex = cls()
+        for document in documents:
+            location: MapLocation = MapLocation.from_document(document)
+            if(location.bbox is not None and is_valid_point(*location.bbox[:2]) and is_valid_point(*location.bbox[2:])):
+                index.locations[location.id] = location
+                index.grid.insert(location.id, location.bbox)
+
+        return index
+
+    def within_bbox(self, bbox: tuple[float, float, float, float]) -> list[MapLocation]:
+        """
+        Find locations whose bounding boxes overlap the given one.
+
+        Args:
+            bbox (tuple[float, float, float, float]): (min_lon, min_lat, max_lon, max_lat)
+
+        Returns:
+            list[MapLocation]: Found locations sorted by their ID.
+        """
+        min_lon, min_lat, max_lon, max_lat = bbox
+        res: list[MapLocation] = list()
+        for location_id in sorted(self.grid.query(bbox)):
+            location: MapLocation = self.locations[location_id]
+            l_min_lon, l_min_lat, l_max_lon, l_max_lat = location.bbox
+            if(l_min_lon <= max_lon and min_lon <= l_max_lon and l_min_lat <= max_lat and min_lat <= l_max_lat):
+                res.append(location)
+
+        return res
+
+    def nearby(self, lon: float, lat: float, radius: float) -> list[tuple[float, MapLocation]]:
+        """
+        Find locations at most `radius` meters from the point.
+
+        Args:
+            lon (float): Longitude of the point.
+            lat (float): Latitude of the point.
+            radius (float): Maximum distance in meters.
+
+        Returns:
+            list[tuple[float, MapLocation]]: Pairs of the distance and the location, the nearest first.
+        """
+        d_lat: float = radius / METERS_PER_DEGREE
+        d_lon: float = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(abs(lat) + d_lat)), 1e-6))
+        res: list[tuple[float, MapLocation]] = list()
+        for location in self.within_bbox((lon - d_lon, lat - d_lat, lon + d_lon, lat + d_lat)):
+            distance: float = location.distance(lon, lat)
+            if(distance <= radius):
+                res.append((distance, location))
+
+        res.sort(key=lambda item: (item[0], item[1].id))
+        return res
+
+
+async def build_spatial_index(db_handler: AsyncDBHandlerInterface, version: DatasetVersion) -> SpatialIndex:
+    """
+    Load animal pens and zoo parts and index them by their location.
+
+    Args:
+        db_handler (AsyncDBHandlerInterface): Handler used to load the data.
+        version (DatasetVersion): Version of 'map' dataset.
+
+    Returns:
+        SpatialIndex: The new index.
+    """
+    projection: dict = {'geometry': 1, 'name': 1, 'is_animal_pen': 1, 'is_building': 1}
+    documents: list[dict] = await db_handler.find({}, projection=projection, collection_name=version.collection('animal_pens'))
+    documents += await db_handler.find({}, projection=projection, collection_name=version.collection('zoo_parts'))
+
+    return SpatialIndex.build(documents)
+
+
+@lru_cache
+def get_spatial_index_cache() -> VersionedCache:
+    """
+    Return the process-wide cache of the spatial index of map locations.
+
+    Returns:
+        VersionedCache: Cache of :py:class:`SpatialIndex` objects.
+    """
+    return VersionedCache(build_spatial_index)
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from typing import AsyncIterator, Callable
+from fastapi import Request
+from pydantic import BaseModel
+from .db import get_db_handler
+
+NDJSON_MEDIA_TYPE: str = 'application/x-ndjson'
+
+# Number of documents loaded from a DB at once when streaming
+STREAM_BATCH_SIZE: int = 100
+
+
+def media_type_quality(accept: str, media_type: str, wildcards: bool = True) -> float:
+    """
+    Find the quality value the Accept header gives to the media type. The most specific matching media range is used.
+
+    Args:
+        accept (str): Value of the Accept header.
+        media_type (str): The media type, e.g. 'application/json'.
+        wildcards (bool, optional): Whether media ranges like `*/*` match the media type. Defaults to True.
+
+    Returns:
+        float: The quality value, 0 if the media type is not acceptable.
+    """
+    type_, subtype = media_type.split('/')
+    best: tuple[int, float] = (-1, 0.0)
+    for media_range in accept.split(','):
+        range_type, *params = [part.strip() for part in media_range.split(';')]
+        specificity: int = {media_type: 2, f'{type_}/*': 1, '*/*': 0}.get(range_type.lower(), -1)
+        if(specificity < 0 or (specificity < 2 and not wildcards) or specificity <= best[0]):
+            continue
+
+        quality: float = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if(name.strip().lower() == 'q'):
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        best = (specificity, quality)
+
+    return best[1]
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """
+    Check whether the client prefers a newline-delimited JSON response using the Accept header.
+
+    Only an explicit `application/x-ndjson` media range selects it, its quality has to be nonzero and at least the quality of JSON.
+    """
+    accept: str = request.headers.get('accept', '')
+    ndjson_quality: float = media_type_quality(accept, NDJSON_MEDIA_TYPE, wildcards=False)
+
+    return ndjson_quality > 0 and ndjson_quality >= media_type_quality(accept, 'application/json')
+
+
+def ndjson_line(key: str, model: BaseModel) -> bytes:
+    """
+    Serialize one model into a line of a newline-delimited JSON response.
+
+    Every line is an object with a single key which tells the type of the model, e.g. `{"animal": {...}}`.
+
+    Args:
+        key (str): Type of the model.
+        model (BaseModel): The model to serialize.
+
+    Returns:
+        bytes: The serialized line including the newline character.
+    """
+    return f'{{"{key}":{model.json(by_alias=True)}}}\n'.encode()
+
+
+async def iter_documents(settings: SimpleNamespace, filter_: dict, collection_name: str, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[dict]:
+    """
+    Iterate over all documents of a collection sorted by their ID.
+
+    Documents are loaded from a single cursor in batches so that only one batch is held in memory.
+
+    Args:
+        settings (SimpleNamespace): Global settings returned by :py:func:`rest.config.get_settings`.
+        filter_ (dict): Defines what kinds of documents are to be found.
+        collection_name (str): Name of the collection which is to be used.
+        batch_size (int, optional): Number of documents loaded at once. Defaults to STREAM_BATCH_SIZE.
+
+    Yields:
+        Iterator[AsyncIterator[dict]]: Documents of the collection.
+    """
+    async with get_db_handler(settings) as db_handler:
+        async for document in db_handler.find_iter(filter_, sort=[('_id', 1)], batch_size=batch_size, collection_name=collection_name):
+            yield document
+
+
+async def stream_ndjson(header: bytes, parts: list[tuple[str, AsyncIterator[dict], Callable[..., BaseModel]]]) -> AsyncIterator[bytes]:
+    """
+    Serialize documents into newline-delimited JSON one at a time.
+
+    Args:
+        header (bytes): The first line of the response.
+        parts (list[tuple[str, AsyncIterator[dict], Callable[..., BaseModel]]]): Key of lines, iterator of documents and the model documents are validated with.
+
+    Yields:
+        Iterator[AsyncIterator[bytes]]: Lines of the response.
+    """
+    yield header
+    for key, documents, model in parts:
+        async for document in documents:
+            yield ndjson_line(key, model(**document))
@@ -2,10 +2,13 @@ from sys import argv
 import scrapers.zoo_scraper as zoo_scraper
 import scrapers.map_downloader as map_downloader
 import scrapers.rss_parser as rss_parser
+import scrapers.datasets as datasets
 
 # This code is run when "python -m scrapers" is invoked. Not run when "scrapers" entry_point is used
-usage_msg = "Usage: python -m scrapers [zoo_scraper|map_downloader]"
-if len(argv) == 2:
+usage_msg = "Usage: python -m scrapers [zoo_scraper|map_downloader|rss_parser|rollback (animals|map)]"
+if len(argv) == 3 and argv[1] == 'rollback' and argv[2] in datasets.DATASETS:
+    datasets.main(argv[2])
+elif len(argv) == 2:
     command: str = argv[1]
 
     if command == 'zoo_scraper':
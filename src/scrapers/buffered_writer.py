@@ -0,0 +1,85 @@
+from server_dataclasses.interfaces import DBHandlerInterface
+from server_dataclasses.models import WriteOperation
+from pymongo.errors import BulkWriteError
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter():
+    """
+    Collects writes to one collection and sends them using :py:meth:`DBHandlerInterface.bulk_write`
+    when enough writes are buffered or when the oldest buffered write waits too long.
+
+    Remaining writes are sent when the writer is used as a context manager and the block ends without an exception.
+    Failed writes are logged, skipped and collected in :py:attr:`failed`, so one bad document does not stop the whole run.
+    """
+
+    def __init__(self, db_handler: DBHandlerInterface, collection_name: str = None, db_name: str = None, max_size: int = 100, max_delay: float = 30.0, ordered: bool = False):
+        """
+        Initialize BufferedWriter.
+
+        Args:
+            db_handler (DBHandlerInterface): Handler used to send the writes.
+            collection_name (str, optional): Name of the collection. Defaults to the collection of the handler.
+            db_name (str, optional): Name of the database. Defaults to the database of the handler.
+            max_size (int, optional): Number of buffered writes which causes a flush. Defaults to 100.
+            max_delay (float, optional): Number of seconds after which the oldest buffered write causes a flush. None disables time based flushes. Defaults to 30.
+            ordered (bool, optional): Whether writes of one flush have to be applied in order. Defaults to False.
+        """
+        self.db_handler = db_handler
+        self.collection_name = collection_name
+        self.db_name = db_name
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.ordered = ordered
+        self.operations: list[WriteOperation] = list()
+        # Writes that were not applied
+        self.failed: list[WriteOperation] = list()
+        self._first_buffered: float = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if(exc_type is None):
+            self.flush()
+
+    def insert_one(self, data: dict):
+        self.write(WriteOperation.insert(data))
+
+    def update_one(self, filter_: dict, data: dict, upsert: bool = False):
+        self.write(WriteOperation.update(filter_, data, upsert=upsert))
+
+    def write(self, operation: WriteOperation):
+        """
+        Buffer the write and flush the buffer if it is full or too old.
+        """
+        if(len(self.operations) == 0):
+            self._first_buffered = time.monotonic()
+        self.operations.append(operation)
+
+        if(len(self.operations) >= self.max_size or (self.max_delay is not None and time.monotonic() - self._first_buffered >= self.max_delay)):
+            self.flush()
+
+    def flush(self):
+        """
+        Send all buffered writes in one bulk write. Writes that failed are logged, other writes of the flush are kept.
+        """
+        if(len(self.operations) == 0):
+            return
+
+        operations, self.operations = self.operations, list()
+        try:
+            self.db_handler.bulk_write(operations, ordered=self.ordered, db_name=self.db_name, collection_name=self.collection_name)
+        except BulkWriteError as ex:
+            errors: list[dict] = ex.details.get('writeErrors', [])
+            for error in errors:
+                logger.error(f'Write to "{self.collection_name}" failed: {error.get("errmsg")}')
+
+            if(self.ordered and len(errors) > 0):
+                # Writes after the first failed one are not applied either
+                self.failed.extend(operations[errors[0]['index']:])
+            else:
+                self.failed.extend(operations[error['index']] for error in errors)
@@ -0,0 +1,205 @@
+from server_dataclasses.interfaces import DBHandlerInterface
+from server_dataclasses.models import DatasetDefinition, DATASETS, COLLECTION_INDEXES
+from scrapers.notifications import publish_metadata_changed
+from dataclasses import dataclass
+from configparser import ConfigParser
+from datetime import datetime
+from typing import Any
+
+# ID of the document in 'metadata' collection which holds collections of versions that are being written.
+# It is kept apart from the main metadata document so that starting a run does not change what readers see.
+PENDING_DATASETS_ID: str = 'pending_datasets'
+
+
+@dataclass(frozen=True)
+class DatasetVersion():
+    """
+    One published version of a dataset. It is hashable so that caches can be keyed by it.
+    """
+
+    version: Any = None
+
+    # Sorted (collection, versioned collection) pairs. Empty for data written before datasets were versioned.
+    collections: tuple[tuple[str, str], ...] = ()
+
+    def collection(self, name: str) -> str:
+        """
+        Return the name of the collection which holds the given collection of this version.
+        """
+        return dict(self.collections).get(name, name)
+
+
+def versioned_name(collection_name: str, tag: str) -> str:
+    return f'{collection_name}_v{tag}'
+
+
+def load_metadata(db_handler: DBHandlerInterface, id_: Any = 0) -> dict:
+    return next(iter(db_handler.find({'_id': id_}, collection_name='metadata')), None) or dict()
+
+
+def current_dataset(metadata: dict, dataset: str) -> DatasetVersion:
+    """
+    Find the currently published version of a dataset.
+
+    Args:
+        metadata (dict): The metadata document.
+        dataset (str): Name of the dataset from :py:data:`DATASETS`.
+
+    Returns:
+        DatasetVersion: The published version. Its collections are the unversioned ones if no version was published yet.
+    """
+    published: dict = (metadata.get('datasets') or dict()).get(dataset)
+    if(published is None):
+        return DatasetVersion(version=metadata.get(DATASETS[dataset].version_attribute))
+
+    return DatasetVersion(version=published['version'], collections=tuple(sorted(published['collections'].items())))
+
+
+class DatasetWriter():
+    """
+    Writes a new version of a dataset into its own collections and publishes it by a single update of the metadata document.
+
+    Readers use the collections the metadata points to, so they never see a half-written version.
+    The previously published version is kept so that it can be restored by :py:func:`rollback_dataset`, older versions are dropped.
+    """
+
+    def __init__(self, db_handler: DBHandlerInterface, dataset: str):
+        """
+        Initialize DatasetWriter. Collections left by a run which failed before publishing are dropped.
+
+        Args:
+            db_handler (DBHandlerInterface): A DBHandlerInterface instance of chosen database.
+            dataset (str): Name of the dataset from :py:data:`DATASETS`.
+        """
+        self.db_handler = db_handler
+        self.dataset = dataset
+        self.definition: DatasetDefinition = DATASETS[dataset]
+        self.tag: str = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        self.collections: dict[str, str] = dict()
+
+        pending: dict = load_metadata(db_handler, PENDING_DATASETS_ID).get(dataset)
+        if(pending is not None):
+            self.__drop_unused__(pending, load_metadata(db_handler))
+
+        new_collections: dict[str, str] = {name: versioned_name(name, self.tag) for name in self.definition.collections}
+        db_handler.update_one({'_id': PENDING_DATASETS_ID}, {'$set': {dataset: {'collections': new_collections}}}, upsert=True, collection_name='metadata')
+
+    def collection(self, name: str) -> str:
+        """
+        Return the name of the collection of the new version which holds the given collection.
+        """
+        if(name not in self.collections):
+            self.collections[name] = versioned_name(name, self.tag)
+
+        return self.collections[name]
+
+    def replace(self, name: str, data: list[dict]):
+        """
+        Write all documents of a collection of the new version and create its indexes from :py:data:`COLLECTION_INDEXES`.
+
+        Args:
+            name (str): Name of the collection, e.g. 'roads'.
+            data (list[dict]): Documents of the collection.
+        """
+        collection_name: str = self.collection(name)
+        self.db_handler.drop_collection(collection_name=collection_name)
+        self.db_handler.insert_many(data=data, collection_name=collection_name)
+        self.ensure_indexes(name)
+
+    def ensure_indexes(self, name: str):
+        self.db_handler.ensure_indexes(COLLECTION_INDEXES.get(name, []), collection_name=self.collection(name))
+
+    def publish(self, version: Any) -> DatasetVersion:
+        """
+        Make the new version current. The metadata document is updated at once, the current version becomes the previous one.
+
+        Args:
+            version (Any): Version of the dataset, it is also stored in the version attribute of the metadata document.
+
+        Returns:
+            DatasetVersion: The published version.
+        """
+        metadata: dict = load_metadata(self.db_handler)
+        current: dict = (metadata.get('datasets') or dict()).get(self.dataset)
+        if(current is None and self.definition.version_attribute in metadata):
+            # Data written before datasets were versioned become the previous version
+            current = {'version': metadata[self.definition.version_attribute], 'collections': {name: name for name in self.definition.collections}}
+        previous: dict = (metadata.get('previous_datasets') or dict()).get(self.dataset)
+
+        published: dict = {'version': version, 'collections': dict(self.collections)}
+        self.db_handler.update_one({'_id': 0}, {
+            '$set': {
+                f'datasets.{self.dataset}': published,
+                f'previous_datasets.{self.dataset}': current,
+                self.definition.version_attribute: version
+            }
+        }, upsert=True, collection_name='metadata')
+        publish_metadata_changed()
+        self.db_handler.update_one({'_id': PENDING_DATASETS_ID}, {'$unset': {self.dataset: ''}}, collection_name='metadata')
+
+        # The version before the previous one is not needed for a rollback anymore
+        if(previous is not None):
+            self.__drop_unused__(previous, {'datasets': {self.dataset: published}, 'previous_datasets': {self.dataset: current}})
+
+        return current_dataset({'datasets': {self.dataset: published}}, self.dataset)
+
+    def __drop_unused__(self, dataset_doc: dict, metadata: dict):
+        # Drop collections of the given version which are not used by the current or the previous version
+        used: set[str] = set()
+        for key in ('datasets', 'previous_datasets'):
+            doc: dict = (metadata.get(key) or dict()).get(self.dataset)
+            if(doc is not None):
+                used.update(doc['collections'].values())
+
+        for collection_name in dataset_doc['collections'].values():
+            if(collection_name not in used):
+                self.db_handler.drop_collection(collection_name=collection_name)
+
+
+def rollback_dataset(db_handler: DBHandlerInterface, dataset: str) -> bool:
+    """
+    Make the previous version of a dataset current again. The replaced version becomes the previous one, so the rollback can be undone.
+
+    Args:
+        db_handler (DBHandlerInterface): A DBHandlerInterface instance of chosen database.
+        dataset (str): Name of the dataset from :py:data:`DATASETS`.
+
+    Returns:
+        bool: False if there is no previous version.
+    """
+    metadata: dict = load_metadata(db_handler)
+    current: dict = (metadata.get('datasets') or dict()).get(dataset)
+    previous: dict = (metadata.get('previous_datasets') or dict()).get(dataset)
+    if(current is None or previous is None):
+        return False
+
+    db_handler.update_one({'_id': 0}, {
+        '$set': {
+            f'datasets.{dataset}': previous,
+            f'previous_datasets.{dataset}': current,
+            DATASETS[dataset].version_attribute: previous['version']
+        }
+    }, collection_name='metadata')
+    publish_metadata_changed()
+
+    return True
+
+
+def main(dataset: str):
+    """
+    Roll back the given dataset to its previous version.
+    """
+    cfg: ConfigParser = ConfigParser()
+    cfg.read('config/config.cfg')
+    cfg_dict: dict = cfg._sections['base']
+    cfg_dict['collection_name'] = 'metadata'
+
+    handler: DBHandlerInterface = next((handler for handler in DBHandlerInterface.__subclasses__() if handler.name == cfg_dict['used_db']), None)
+    if handler is None:
+        raise Exception(f'DBHandler called "{cfg_dict["used_db"]}" not found.')
+
+    with handler(**cfg_dict) as handler_instance:
+        if(rollback_dataset(handler_instance, dataset)):
+            print(f'Dataset "{dataset}" was rolled back.')
+        else:
+            print(f'Dataset "{dataset}" has no previous version.')
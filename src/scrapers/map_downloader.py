@@ -16,11 +16,22 @@ import time
 import boto3
 from botocore.exceptions import ClientError
 from server_dataclasses.interfaces import DBHandlerInterface
+from server_dataclasses.rest_models import MapGraph
+from server_dataclasses.models import MAP_ARTIFACT_ID, COLLECTION_INDEXES
+from scrapers.buffered_writer import BufferedWriter
+from scrapers.datasets import DatasetWriter
+from datetime import datetime
+import hashlib
+import gzip
+import brotli
 
 # Definitions
 LineCoords = list[tuple[float, float]]
 MultiCoords = list[LineCoords]
 
+# Maximal size of one serialized road graph variant. MongoDB documents are limited to 16 MB, the rest is left for other attributes.
+MAX_ARTIFACT_SIZE: int = 16 * 1024 * 1024 - 64 * 1024
+
 # Define logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -346,15 +357,52 @@ def update_roads_with_nodes(roads: dict[int: dict], road_nodes: dict[int:dict]):
             
         road['geometry']['coordinates'] = nodes
 
-def parse_map_data(folder_path: Path, db_handler: DBHandlerInterface) -> list[dict[int, str]]:
+def create_map_artifacts(roads: dict[int: dict], road_nodes: dict[int: dict]) -> list[dict]:
+    """
+    Serialize the road graph into a ready-to-send JSON artifact and its gzip & brotli variants.
+
+    The JSON has the same format as nodes & roads returned by the REST API so the server can send it without validating or encoding it again.
+    Each variant is stored in its own document so that the documents stay under the size limit of MongoDB documents.
+    Variants over :py:data:`MAX_ARTIFACT_SIZE` are left out, the server serves the road graph without them.
+
+    Args:
+        roads (dict[int: dict]): All roads.
+        road_nodes (dict[int: dict]): All nodes.
+
+    Returns:
+        list[dict]: Artifact documents with the content hash, the encoding and the serialized data.
+    """
+    graph: MapGraph = MapGraph(nodes=list(road_nodes.values()), roads=list(roads.values()))
+    # Same encoding as FastAPI JSONResponse
+    data: bytes = json.dumps(graph.dict(by_alias=True), ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+    content_hash: str = hashlib.sha256(data).hexdigest()
+    created: datetime = datetime.now()
+
+    artifacts: list[dict] = list()
+    for encoding, encoded in (('json', data), ('gzip', gzip.compress(data, compresslevel=9)), ('br', brotli.compress(data, quality=11))):
+        if(len(encoded) > MAX_ARTIFACT_SIZE):
+            logger.error(f'Map artifact "{encoding}" has {len(encoded)} bytes, more than the limit of {MAX_ARTIFACT_SIZE} bytes. It is not stored.')
+            continue
+        artifacts.append({
+            '_id': f'{MAP_ARTIFACT_ID}.{encoding}',
+            'hash': content_hash,
+            'encoding': encoding,
+            'data': encoded,
+            'created': created
+        })
+
+    return artifacts
+
+def parse_map_data(folder_path: Path, db_handler: DBHandlerInterface, dataset_writer: DatasetWriter) -> list[dict[int, str]]:
     """
     Parses GeoJSON data for data that needs to be integrated with Zoo Prague data.
 
-    Most data is stored to MongoDB immediately, animal pens data is returned for further refinement.
+    Most data is stored to the new version of map data immediately, animal pens data is returned for further refinement.
 
     Args:
         folder_path (Path): Path to a parent folder of map data files we downloaded.
         db_handler (DBHandlerInterface): [description]
+        dataset_writer (DatasetWriter): Writer of the new version of 'map' dataset.
 
     Returns:
         list[dict[int, str]]: A list of animal pen data that was parsed from GeoJSONs.
@@ -413,14 +461,12 @@ def parse_map_data(folder_path: Path, db_handler: DBHandlerInterface) -> list[di
     update_roads_with_nodes(roads, road_nodes)
 
     # Add collections to DB
-    db_handler.drop_collection(collection_name='zoo_parts')
-    db_handler.insert_many(data=zoo_parts.values(), collection_name='zoo_parts')
-
-    db_handler.drop_collection(collection_name='roads')
-    db_handler.insert_many(data=roads.values(), collection_name='roads')
+    dataset_writer.replace('zoo_parts', zoo_parts.values())
+    dataset_writer.replace('roads', roads.values())
+    dataset_writer.replace('road_nodes', road_nodes.values())
 
-    db_handler.drop_collection(collection_name='road_nodes')
-    db_handler.insert_many(data=road_nodes.values(), collection_name='road_nodes')
+    # Store the road graph in a form that can be sent by the server directly
+    dataset_writer.replace('map_artifacts', create_map_artifacts(roads, road_nodes))
 
     # Return animal_pens collection since it needs to be processed further
     return animal_pens.values()
@@ -495,7 +541,7 @@ def get_singular(plural: str, session: requests.Session, singular_plural_data: l
     logger.warn(f'No singulars found for a plural "{plural}".')
     return None
 
-def update_animal_tables(session: requests.Session, db_handler: DBHandlerInterface, pens: list[dict[int, str]], min_delay: float):
+def update_animal_tables(session: requests.Session, db_handler: DBHandlerInterface, pens: list[dict[int, str]], min_delay: float, dataset_writer: DatasetWriter):
     """
     Use new map data to update the DB tables that:
     
@@ -507,43 +553,52 @@ def update_animal_tables(session: requests.Session, db_handler: DBHandlerInterfa
         db_handler (DBHandlerInterface): A DBHandlerInterface instance of chosen database used to store data from Zoo Prague lexicon.
         pens (list[dict[int, str]]): Map data of located animal pens in Zoo Prague.
         min_delay (float): Delay between HTTP requests.
+        dataset_writer (DatasetWriter): Writer of the new version of 'map' dataset which gets the animal pens.
     """
     collection_name: str = 'singular_plural'
     if(not db_handler.collection_exists(collection_name=collection_name)):
         # Init singular_plural collection
         data = __get_csv_data__()
         db_handler.insert_many(data, collection_name=collection_name)
+        db_handler.ensure_indexes(COLLECTION_INDEXES[collection_name], collection_name=collection_name)
 
-    singular_plural_data = db_handler.find({}, collection_name=collection_name)
-    singular_plural_data = {d["_id"]:d["singulars"] for d in singular_plural_data}
+    singular_plural_data = {d["_id"]:d["singulars"] for d in db_handler.find_iter({}, collection_name=collection_name)}
     
-    for pen in pens:
-        # Some pens can have multiple animals
-        pen_animal_names: list = list()
-        names = pen['name'].strip().split(',')
-        for name in names:
-            # Some names can have noun and pronoun
-            words = name.strip().split(' ')
-            if(len(words) == 1):
-                # Has only noun
-                singulars = get_singular(words[0], session, singular_plural_data, collection_name=collection_name, min_delay=min_delay)
-                if(singulars is not None):
-                    db_handler.update_one({"_id": words[0]}, {"$set": {"singulars": singulars}}, upsert=True, collection_name=collection_name)
-                    pen_animal_names.append(singulars[0])
-            elif(len(words) == 2):
-                # Has noun and pronoun
-                singular_noun = get_singular(words[0], session, singular_plural_data, collection_name=collection_name, min_delay=min_delay)
-                singular_pronouns = get_singular(words[1], session, singular_plural_data, collection_name=collection_name, min_delay=min_delay)
-                if(singular_noun is not None and singular_pronouns is not None):
-                    db_handler.update_one({"_id": words[0]}, {"$set": {"singulars": singular_noun}}, upsert=True, collection_name=collection_name)
-                    db_handler.update_one({"_id": words[1]}, {"$set": {"singulars": singular_pronouns}}, upsert=True, collection_name=collection_name)
-                    for pair in itertools.product(singular_noun, singular_pronouns):
-                        pen_animal_names.append(' '.join(pair))
-
-        pen["singular_names"] = pen_animal_names
+    # Words whose singulars are written by this run. Each word is written at most once and unchanged words are not written at all.
+    written: set[str] = set()
+
+    def store_singulars(writer: BufferedWriter, word: str, singulars: list[str]):
+        if(word not in written and singular_plural_data.get(word) != singulars):
+            writer.update_one({"_id": word}, {"$set": {"singulars": singulars}}, upsert=True)
+        written.add(word)
+
+    with BufferedWriter(db_handler, collection_name=collection_name) as writer:
+        for pen in pens:
+            # Some pens can have multiple animals
+            pen_animal_names: list = list()
+            names = pen['name'].strip().split(',')
+            for name in names:
+                # Some names can have noun and pronoun
+                words = name.strip().split(' ')
+                if(len(words) == 1):
+                    # Has only noun
+                    singulars = get_singular(words[0], session, singular_plural_data, collection_name=collection_name, min_delay=min_delay)
+                    if(singulars is not None):
+                        store_singulars(writer, words[0], singulars)
+                        pen_animal_names.append(singulars[0])
+                elif(len(words) == 2):
+                    # Has noun and pronoun
+                    singular_noun = get_singular(words[0], session, singular_plural_data, collection_name=collection_name, min_delay=min_delay)
+                    singular_pronouns = get_singular(words[1], session, singular_plural_data, collection_name=collection_name, min_delay=min_delay)
+                    if(singular_noun is not None and singular_pronouns is not None):
+                        store_singulars(writer, words[0], singular_noun)
+                        store_singulars(writer, words[1], singular_pronouns)
+                        for pair in itertools.product(singular_noun, singular_pronouns):
+                            pen_animal_names.append(' '.join(pair))
+
+            pen["singular_names"] = pen_animal_names
     
-    db_handler.drop_collection()
-    db_handler.insert_many(pens)
+    dataset_writer.replace('animal_pens', pens)
 
 def main():
     """
@@ -596,9 +651,13 @@ def main():
     with requests.Session() as session, handler(**cfg_dict) as handler_instance:
         try:
             folder_path: Path = download_map_data(args, os.getenv('AWS_STORAGE_BUCKET_NAME'))
-            pens = parse_map_data(folder_path, handler_instance)
+            dataset_writer: DatasetWriter = DatasetWriter(handler_instance, 'map')
+            pens = parse_map_data(folder_path, handler_instance, dataset_writer)
+
+            update_animal_tables(session, handler_instance, pens, cfg_dict["min_delay"], dataset_writer)
 
-            update_animal_tables(session, handler_instance, pens, cfg_dict["min_delay"])
+            # Readers switch to the new map data at once, the previous version is kept for a rollback
+            dataset_writer.publish(datetime.now())
         except ClientError as ex:
             logger.error('Error occured when uploading files to AWS S3.')
             logger.error(traceback.format_exc())
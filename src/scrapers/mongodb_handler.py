@@ -1,7 +1,10 @@
 from server_dataclasses.interfaces import DBHandlerInterface
-from pymongo import MongoClient
+from server_dataclasses.models import IndexDefinition, WriteOperation
+from pymongo import MongoClient, IndexModel, InsertOne, UpdateOne
 from pymongo.database import Database
 from pymongo.collection import Collection
+from typing import Iterator
+import threading
 import os
 
 
@@ -15,17 +18,82 @@ class MongoDBHandler(DBHandlerInterface):
 
     name: str = 'mongodb'
 
-    def __init__(self, host: str, db_name: str, collection_name: str, **kwargs):
+    # Pooled clients shared by all handler instances created with shared_client=True. Key is the connection URL.
+    _shared_clients: dict[str, MongoClient] = dict()
+    _shared_clients_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, host: str, db_name: str, collection_name: str, shared_client: bool = False, max_pool_size: int = 100, min_pool_size: int = 0, **kwargs):
+        """
+        Initialize MongoDBHandler.
+
+        Args:
+            host (str): URL of the MongoDB server. Overridden by MONGODB_URI environment variable.
+            db_name (str): Name of the database which is used by default.
+            collection_name (str): Name of the collection which is used by default.
+            shared_client (bool, optional): If True then a process-wide pooled client is reused instead of creating a new one.
+                The shared client is not closed when the handler exits, see :py:meth:`close_shared_resources`. Defaults to False.
+            max_pool_size (int, optional): Maximum number of connections in the pool of the client. Defaults to 100.
+            min_pool_size (int, optional): Minimum number of connections kept open in the pool of the client. Defaults to 0.
+        """
         url = os.getenv('MONGODB_URI', host)
-        self.client: MongoClient = MongoClient(url)
+        self.owns_client: bool = not shared_client
+        if(shared_client):
+            self.client: MongoClient = MongoDBHandler.get_shared_client(url, int(max_pool_size), int(min_pool_size))
+        else:
+            self.client: MongoClient = MongoClient(url, maxPoolSize=int(max_pool_size), minPoolSize=int(min_pool_size))
         self.db: Database = self.client[db_name]
         self.coll: Collection = self.db[collection_name]
 
+    @classmethod
+    def get_shared_client(cls, url: str, max_pool_size: int = 100, min_pool_size: int = 0) -> MongoClient:
+        """
+        Returns the process-wide pooled client for the given URL. The client is created on the first call.
+
+        Args:
+            url (str): URL of the MongoDB server.
+            max_pool_size (int, optional): Maximum number of connections in the pool. Used only when the client is created. Defaults to 100.
+            min_pool_size (int, optional): Minimum number of connections in the pool. Used only when the client is created. Defaults to 0.
+
+        Returns:
+            MongoClient: The shared client.
+        """
+        with cls._shared_clients_lock:
+            client: MongoClient = cls._shared_clients.get(url)
+            if(client is None):
+                client = MongoClient(url, maxPoolSize=max_pool_size, minPoolSize=min_pool_size)
+                cls._shared_clients[url] = client
+
+        return client
+
+    @classmethod
+    def open_shared_resources(cls, host: str, max_pool_size: int = 100, min_pool_size: int = 0, **kwargs):
+        """
+        Create the process-wide pooled client so that the first request does not pay for the connection setup.
+
+        Args:
+            host (str): URL of the MongoDB server. Overridden by MONGODB_URI environment variable.
+            max_pool_size (int, optional): Maximum number of connections in the pool. Defaults to 100.
+            min_pool_size (int, optional): Minimum number of connections in the pool. Defaults to 0.
+        """
+        url = os.getenv('MONGODB_URI', host)
+        cls.get_shared_client(url, int(max_pool_size), int(min_pool_size))
+
+    @classmethod
+    def close_shared_resources(cls):
+        """
+        Close all process-wide pooled clients.
+        """
+        with cls._shared_clients_lock:
+            for client in cls._shared_clients.values():
+                client.close()
+            cls._shared_clients.clear()
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.client.close()
+        if(self.owns_client):
+            self.client.close()
         self.db, self.coll, self.client = None, None, None
 
         # suppress errors
@@ -80,6 +148,25 @@ class MongoDBHandler(DBHandlerInterface):
 
         return True
 
+    def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Deletes all documents which match the filter.
+
+        Args:
+            filter_ (dict): Determines which documents are deleted.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        db: Database = self.db if db_name is None else self.client[db_name]
+        coll: Collection = self.coll if collection_name is None else db[collection_name]
+
+        coll.delete_many(filter_)
+
+        return True
+
     def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
         """
         Rename collection.
@@ -117,13 +204,15 @@ class MongoDBHandler(DBHandlerInterface):
 
         return True
 
-    def find(self, filter_: dict, projection: dict = None, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+    def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
         """
         Finds documents in a collection using the defined filter.
 
         Args:
             filter_ (dict): Defines what kinds of documents are to be found.
             projection (dict, optional): Defines columns which are to be returned. Defaults to the property selected during initialization. and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then the order is not defined.
+            limit (int, optional): Maximum number of returned documents. Defaults to 0 which means no limit.
             db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
             collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
 
@@ -133,7 +222,29 @@ class MongoDBHandler(DBHandlerInterface):
         db: Database = self.db if db_name is None else self.client[db_name]
         coll: Collection = self.coll if collection_name is None else db[collection_name]
 
-        return list(coll.find(filter_, projection=projection))
+        # A range filter on '_id' combined with a sort on '_id' uses the default '_id' index
+        return list(coll.find(filter_, projection=projection, sort=sort, limit=limit))
+
+    def find_iter(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, batch_size: int = 100, db_name: str = None, collection_name: str = None, **kwargs) -> Iterator[dict]:
+        """
+        Iterates over documents in a collection using the defined filter. Documents are loaded from a cursor in batches.
+
+        Args:
+            filter_ (dict): Defines what kinds of documents are to be found.
+            projection (dict, optional): Defines columns which are to be returned. Defaults to None and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then the order is not defined.
+            batch_size (int, optional): Number of documents loaded from the DB at once. Defaults to 100.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Yields:
+            Iterator[dict]: Dictionaries which hold document data.
+        """
+        db: Database = self.db if db_name is None else self.client[db_name]
+        coll: Collection = self.coll if collection_name is None else db[collection_name]
+
+        with coll.find(filter_, projection=projection, sort=sort, batch_size=batch_size) as cursor:
+            yield from cursor
 
     def collection_exists(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
         """
@@ -149,4 +260,58 @@ class MongoDBHandler(DBHandlerInterface):
         db: Database = self.db if db_name is None else self.client[db_name]
         coll: Collection = self.coll if collection_name is None else db[collection_name]
 
-        return coll.name in db.list_collection_names()
\ No newline at end of file
+        return coll.name in db.list_collection_names()
+
+    def ensure_indexes(self, indexes: list[IndexDefinition], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Create the given indexes if they do not exist yet. Existing indexes with the same definition are left untouched.
+
+        Indexes are kept up to date by MongoDB and are preserved when the collection is renamed.
+
+        Args:
+            indexes (list[IndexDefinition]): Indexes the collection should have.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: True if the indexes exist.
+        """
+        db: Database = self.db if db_name is None else self.client[db_name]
+        coll: Collection = self.coll if collection_name is None else db[collection_name]
+
+        if(len(indexes) > 0):
+            coll.create_indexes([IndexModel(index.keys, name=index.name, unique=index.unique) for index in indexes])
+
+        return True
+
+    def bulk_write(self, operations: list[WriteOperation], ordered: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Apply many writes to a collection. The driver splits them into batches so that each batch is a single round trip.
+
+        Args:
+            operations (list[WriteOperation]): Writes to apply.
+            ordered (bool, optional): If True then the writes are applied in the given order and the first failed write stops the rest.
+                Unordered writes can be applied by the server in parallel. Defaults to False.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        db: Database = self.db if db_name is None else self.client[db_name]
+        coll: Collection = self.coll if collection_name is None else db[collection_name]
+
+        if(len(operations) > 0):
+            coll.bulk_write([to_mongo_request(operation) for operation in operations], ordered=ordered)
+
+        return True
+
+
+def to_mongo_request(operation: WriteOperation):
+    """
+    Convert a DB-independent write into a pymongo bulk write request.
+    """
+    if(operation.kind == 'insert'):
+        return InsertOne(operation.document)
+
+    return UpdateOne(operation.filter_, operation.update, upsert=operation.upsert)
@@ -0,0 +1,296 @@
+from server_dataclasses.interfaces import AsyncDBHandlerInterface
+from server_dataclasses.models import IndexDefinition, WriteOperation
+from scrapers.mongodb_handler import to_mongo_request
+from pymongo import IndexModel
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from typing import AsyncIterator
+import os
+
+
+class MotorDBHandler(AsyncDBHandlerInterface):
+    """
+    Implementation of an asynchronous DBHandler which uses remote MongoDB through the Motor library.
+
+    Args:
+        AsyncDBHandlerInterface ([type]): Interface it implements.
+    """
+
+    name: str = 'motor'
+
+    # Pooled clients shared by all handler instances created with shared_client=True. Key is the connection URL.
+    _shared_clients: dict[str, AsyncIOMotorClient] = dict()
+
+    def __init__(self, host: str, db_name: str, collection_name: str, shared_client: bool = False, max_pool_size: int = 100, min_pool_size: int = 0, **kwargs):
+        """
+        Initialize MotorDBHandler.
+
+        Args:
+            host (str): URL of the MongoDB server. Overridden by MONGODB_URI environment variable.
+            db_name (str): Name of the database which is used by default.
+            collection_name (str): Name of the collection which is used by default.
+            shared_client (bool, optional): If True then a process-wide pooled client is reused instead of creating a new one. Defaults to False.
+            max_pool_size (int, optional): Maximum number of connections in the pool of the client. Defaults to 100.
+            min_pool_size (int, optional): Minimum number of connections kept open in the pool of the client. Defaults to 0.
+        """
+        url = os.getenv('MONGODB_URI', host)
+        self.owns_client: bool = not shared_client
+        if(shared_client):
+            self.client: AsyncIOMotorClient = MotorDBHandler.get_shared_client(url, int(max_pool_size), int(min_pool_size))
+        else:
+            self.client: AsyncIOMotorClient = AsyncIOMotorClient(url, maxPoolSize=int(max_pool_size), minPoolSize=int(min_pool_size))
+        self.db: AsyncIOMotorDatabase = self.client[db_name]
+        self.coll: AsyncIOMotorCollection = self.db[collection_name]
+
+    @classmethod
+    def get_shared_client(cls, url: str, max_pool_size: int = 100, min_pool_size: int = 0) -> AsyncIOMotorClient:
+        """
+        Returns the process-wide pooled client for the given URL. The client is created on the first call.
+
+        Args:
+            url (str): URL of the MongoDB server.
+            max_pool_size (int, optional): Maximum number of connections in the pool. Used only when the client is created. Defaults to 100.
+            min_pool_size (int, optional): Minimum number of connections in the pool. Used only when the client is created. Defaults to 0.
+
+        Returns:
+            AsyncIOMotorClient: The shared client.
+        """
+        client: AsyncIOMotorClient = cls._shared_clients.get(url)
+        if(client is None):
+            client = AsyncIOMotorClient(url, maxPoolSize=max_pool_size, minPoolSize=min_pool_size)
+            cls._shared_clients[url] = client
+
+        return client
+
+    @classmethod
+    def open_shared_resources(cls, host: str, max_pool_size: int = 100, min_pool_size: int = 0, **kwargs):
+        """
+        Create the process-wide pooled client so that the first request does not pay for the connection setup.
+
+        Args:
+            host (str): URL of the MongoDB server. Overridden by MONGODB_URI environment variable.
+            max_pool_size (int, optional): Maximum number of connections in the pool. Defaults to 100.
+            min_pool_size (int, optional): Minimum number of connections in the pool. Defaults to 0.
+        """
+        url = os.getenv('MONGODB_URI', host)
+        cls.get_shared_client(url, int(max_pool_size), int(min_pool_size))
+
+    @classmethod
+    def close_shared_resources(cls):
+        """
+        Close all process-wide pooled clients.
+        """
+        for client in cls._shared_clients.values():
+            client.close()
+        cls._shared_clients.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if(self.owns_client):
+            self.client.close()
+        self.db, self.coll, self.client = None, None, None
+
+    def __get_collection__(self, db_name: str = None, collection_name: str = None) -> tuple[AsyncIOMotorDatabase, AsyncIOMotorCollection]:
+        db: AsyncIOMotorDatabase = self.db if db_name is None else self.client[db_name]
+        coll: AsyncIOMotorCollection = self.coll if collection_name is None else db[collection_name]
+
+        return db, coll
+
+    async def insert_many(self, data: list[dict], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Stores a list of documents in a DB.
+
+        Args:
+            data (list[dict]): Data to store.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection where to put data to. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        await coll.insert_many(data)
+
+        return True
+
+    async def insert_one(self, data: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Collects one thing and stores it in a DB.
+
+        Args:
+            data (dict): Data to store
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection where to put data to. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        await coll.insert_one(data)
+
+        return True
+
+    async def update_one(self, filter_: dict, data: dict, upsert: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Updates one document. If more then one document is found then only the first is updated.
+
+        Args:
+            filter_ (dict): Determines how to find the document to update.
+            data (dict): Determines how the document is updated.
+            upsert (bool, optional): If set to True and no document is found then a new document is created. Defaults to False.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection where to put data to. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        await coll.update_one(filter_, data, upsert=upsert)
+
+        return True
+
+    async def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Deletes all documents which match the filter.
+
+        Args:
+            filter_ (dict): Determines which documents are deleted.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        await coll.delete_many(filter_)
+
+        return True
+
+    async def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Rename collection.
+
+        Args:
+            collection_new_name (str): New name of the collection
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        await coll.rename(collection_new_name)
+
+        return True
+
+    async def drop_collection(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Drop collection if it exists.
+
+        Args:
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        db, coll = self.__get_collection__(db_name, collection_name)
+        if(coll.name in await db.list_collection_names()):
+            await coll.drop()
+
+        return True
+
+    async def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+        """
+        Finds documents in a collection using the defined filter.
+
+        Args:
+            filter_ (dict): Defines what kinds of documents are to be found.
+            projection (dict, optional): Defines columns which are to be returned. Defaults to None and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then the order is not defined.
+            limit (int, optional): Maximum number of returned documents. Defaults to 0 which means no limit.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            list[dict]: List of dictionaries which hold document data.
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+
+        return await coll.find(filter_, projection=projection, sort=sort, limit=limit).to_list(length=None)
+
+    async def find_iter(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, batch_size: int = 100, db_name: str = None, collection_name: str = None, **kwargs) -> AsyncIterator[dict]:
+        """
+        Iterates over documents in a collection using the defined filter. Documents are loaded from a cursor in batches.
+
+        Args:
+            filter_ (dict): Defines what kinds of documents are to be found.
+            projection (dict, optional): Defines columns which are to be returned. Defaults to None and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then the order is not defined.
+            batch_size (int, optional): Number of documents loaded from the DB at once. Defaults to 100.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Yields:
+            AsyncIterator[dict]: Dictionaries which hold document data.
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        cursor = coll.find(filter_, projection=projection, sort=sort, batch_size=batch_size)
+        try:
+            async for document in cursor:
+                yield document
+        finally:
+            await cursor.close()
+
+    async def collection_exists(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Check if the given collection exists.
+
+        Args:
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: True if the collection exists.
+        """
+        db, coll = self.__get_collection__(db_name, collection_name)
+
+        return coll.name in await db.list_collection_names()
+
+    async def ensure_indexes(self, indexes: list[IndexDefinition], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Create the given indexes if they do not exist yet. Existing indexes with the same definition are left untouched.
+
+        Args:
+            indexes (list[IndexDefinition]): Indexes the collection should have.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: True if the indexes exist.
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        if(len(indexes) > 0):
+            await coll.create_indexes([IndexModel(index.keys, name=index.name, unique=index.unique) for index in indexes])
+
+        return True
+
+    async def bulk_write(self, operations: list[WriteOperation], ordered: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Apply many writes to a collection. The driver splits them into batches so that each batch is a single round trip.
+
+        Args:
+            operations (list[WriteOperation]): Writes to apply.
+            ordered (bool, optional): If True then the writes are applied in the given order and the first failed write stops the rest. Defaults to False.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        _, coll = self.__get_collection__(db_name, collection_name)
+        if(len(operations) > 0):
+            await coll.bulk_write([to_mongo_request(operation) for operation in operations], ordered=ordered)
+
+        return True
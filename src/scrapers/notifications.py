@@ -0,0 +1,25 @@
+import logging
+import os
+import redis
+
+# Redis channel used to tell REST servers that the metadata document was changed
+METADATA_CHANNEL: str = 'metadata_changed'
+
+logger = logging.getLogger(__name__)
+
+
+def publish_metadata_changed():
+    """
+    Notify REST servers that the metadata document was changed so that they drop their cached copy right away.
+
+    Does nothing if REDISTOGO_URL environment variable is not set.
+    A failed notification is only logged since the servers reload the document when their cached copy expires anyway.
+    """
+    redis_url: str = os.getenv('REDISTOGO_URL')
+    if(redis_url is None):
+        return
+
+    try:
+        redis.from_url(redis_url).publish(METADATA_CHANNEL, 'changed')
+    except redis.RedisError:
+        logger.warning('Could not publish a metadata change notification.', exc_info=True)
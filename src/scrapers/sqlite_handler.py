@@ -0,0 +1,668 @@
+from server_dataclasses.interfaces import DBHandlerInterface
+from server_dataclasses.models import WriteOperation
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from datetime import datetime
+from typing import Any, Callable, Iterator
+import copy
+import json
+import os
+import pickle
+import sqlite3
+
+_SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS collections (
+    db TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (db, name)
+);
+CREATE TABLE IF NOT EXISTS documents (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    db TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    key TEXT NOT NULL,
+    document BLOB NOT NULL,
+    UNIQUE (db, collection, key)
+);
+'''
+
+# Rank of value types used when values of different types are sorted, it follows the order of BSON types
+_TYPE_RANKS: list[tuple[type, int]] = [(bool, 8), (int, 1), (float, 1), (str, 2), (dict, 3), (list, 4), (ObjectId, 7), (datetime, 9)]
+
+_MISSING = object()
+
+
+def document_key(value: Any) -> str:
+    """
+    Encode an '_id' value into a string which is equal for values MongoDB considers equal, e.g. 1 and 1.0.
+    """
+    if(isinstance(value, bool)):
+        return f'b:{value}'
+    if(isinstance(value, (int, float))):
+        return f'n:{float(value)!r}'
+    if(isinstance(value, str)):
+        return f's:{value}'
+    if(isinstance(value, datetime)):
+        return f'd:{value.isoformat()}'
+    if(isinstance(value, ObjectId)):
+        return f'o:{value}'
+
+    return f'j:{json.dumps(value, sort_keys=True, default=str)}'
+
+
+def get_values(document: Any, path: str) -> list:
+    """
+    Find all values at a dotted path. Arrays on the path are traversed, so 'coordinates._id' finds IDs of all coordinates.
+
+    Returns:
+        list: Found values, empty if the path does not exist.
+    """
+    values: list = [document]
+    for part in path.split('.'):
+        found: list = list()
+        for value in values:
+            if(isinstance(value, dict)):
+                if(part in value):
+                    found.append(value[part])
+            elif(isinstance(value, list)):
+                if(part.isdigit() and int(part) < len(value)):
+                    found.append(value[int(part)])
+                else:
+                    found.extend(item[part] for item in value if isinstance(item, dict) and part in item)
+        values = found
+
+    return values
+
+
+def sort_key(value: Any) -> tuple:
+    """
+    Create a key which orders values of different types the same way MongoDB does.
+    """
+    if(value is None or value is _MISSING):
+        return (0, 0)
+    for type_, rank in _TYPE_RANKS:
+        if(isinstance(value, type_)):
+            if(isinstance(value, dict)):
+                return (rank, [(k, sort_key(v)) for k, v in value.items()])
+            if(isinstance(value, list)):
+                return (rank, [sort_key(v) for v in value])
+            return (rank, value)
+
+    return (10, str(value))
+
+
+def __compare__(operator: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    # Values of different types are never matched by range operators
+    def compare(value: Any, argument: Any) -> bool:
+        if(sort_key(value)[0] != sort_key(argument)[0]):
+            return False
+        if(value is None):
+            return operator(0, 0)
+        return operator(value, argument)
+
+    return compare
+
+
+def __equals__(value: Any, argument: Any) -> bool:
+    if(isinstance(value, (int, float)) and isinstance(argument, (int, float)) and not isinstance(value, bool) and not isinstance(argument, bool)):
+        return value == argument
+    return type(value) == type(argument) and value == argument
+
+
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    '$eq': __equals__,
+    '$gt': __compare__(lambda a, b: a > b),
+    '$gte': __compare__(lambda a, b: a >= b),
+    '$lt': __compare__(lambda a, b: a < b),
+    '$lte': __compare__(lambda a, b: a <= b)
+}
+
+
+def __candidates__(values: list) -> list:
+    # A condition on an array field matches the array itself or any of its items
+    res: list = list()
+    for value in values:
+        res.append(value)
+        if(isinstance(value, list)):
+            res.extend(value)
+
+    return res
+
+
+def __match_condition__(values: list, condition: Any) -> bool:
+    is_operator: bool = isinstance(condition, dict) and len(condition) > 0 and all(key.startswith('$') for key in condition)
+    if(not is_operator):
+        condition = {'$eq': condition}
+
+    candidates: list = __candidates__(values)
+    for operator, argument in condition.items():
+        if(operator == '$eq' and argument is None):
+            matched = len(values) == 0 or any(value is None for value in candidates)
+        elif(operator in _COMPARISONS):
+            matched = any(_COMPARISONS[operator](value, argument) for value in candidates)
+        elif(operator == '$ne'):
+            matched = not __match_condition__(values, {'$eq': argument})
+        elif(operator == '$in'):
+            matched = any(__match_condition__(values, {'$eq': item}) for item in argument)
+        elif(operator == '$nin'):
+            matched = not any(__match_condition__(values, {'$eq': item}) for item in argument)
+        elif(operator == '$exists'):
+            matched = (len(values) > 0) == bool(argument)
+        elif(operator == '$all'):
+            matched = all(__match_condition__(values, {'$eq': item}) for item in argument)
+        elif(operator == '$size'):
+            matched = any(isinstance(value, list) and len(value) == argument for value in values)
+        elif(operator == '$not'):
+            matched = not __match_condition__(values, argument)
+        else:
+            raise ValueError(f'Query operator "{operator}" is not supported.')
+
+        if(not matched):
+            return False
+
+    return True
+
+
+def match_document(document: dict, filter_: dict) -> bool:
+    """
+    Check whether the document matches a MongoDB filter.
+
+    Supported are equality (also of nested documents and items of arrays), dotted paths, comparison operators,
+    $in, $nin, $exists, $all, $size, $not and logical operators $and, $or and $nor.
+
+    Raises:
+        ValueError: Raised when the filter uses an unsupported operator.
+    """
+    for key, condition in filter_.items():
+        if(key == '$and'):
+            matched = all(match_document(document, item) for item in condition)
+        elif(key == '$or'):
+            matched = any(match_document(document, item) for item in condition)
+        elif(key == '$nor'):
+            matched = not any(match_document(document, item) for item in condition)
+        elif(key.startswith('$')):
+            raise ValueError(f'Query operator "{key}" is not supported.')
+        else:
+            matched = __match_condition__(get_values(document, key), condition)
+
+        if(not matched):
+            return False
+
+    return True
+
+
+def apply_projection(document: dict, projection: dict) -> dict:
+    """
+    Apply a MongoDB inclusion or exclusion projection. '_id' is included unless it is excluded explicitly.
+
+    Raises:
+        ValueError: Raised when the projection mixes included and excluded fields.
+    """
+    if(not projection):
+        return document
+
+    fields: dict[str, bool] = {key: bool(value) for key, value in projection.items()}
+    include_id: bool = fields.pop('_id', True)
+    if(len(set(fields.values())) > 1):
+        raise ValueError('Projection cannot both include and exclude fields.')
+
+    # {'_id': 1} alone is an inclusion projection too
+    inclusion: bool = next(iter(fields.values())) if len(fields) > 0 else bool(projection['_id'])
+    if(inclusion):
+        res: dict = {'_id': document['_id']} if include_id and '_id' in document else dict()
+        for path in fields:
+            __copy_path__(document, res, path.split('.'))
+    else:
+        res: dict = copy.deepcopy(document)
+        for path in fields:
+            __remove_path__(res, path.split('.'))
+        if(not include_id):
+            res.pop('_id', None)
+
+    return res
+
+
+def __copy_path__(source: Any, target: dict, parts: list[str]):
+    if(not isinstance(source, dict) or parts[0] not in source):
+        return
+
+    value = source[parts[0]]
+    if(len(parts) == 1):
+        target[parts[0]] = copy.deepcopy(value)
+    elif(isinstance(value, list)):
+        items: list = list()
+        for item in value:
+            if(isinstance(item, dict)):
+                projected: dict = dict()
+                __copy_path__(item, projected, parts[1:])
+                items.append(projected)
+        target[parts[0]] = items
+    elif(isinstance(value, dict)):
+        __copy_path__(value, target.setdefault(parts[0], dict()), parts[1:])
+
+
+def __remove_path__(target: Any, parts: list[str]):
+    if(isinstance(target, list)):
+        for item in target:
+            __remove_path__(item, parts)
+    elif(isinstance(target, dict) and parts[0] in target):
+        if(len(parts) == 1):
+            del target[parts[0]]
+        else:
+            __remove_path__(target[parts[0]], parts[1:])
+
+
+def __parent__(document: dict, path: str, create: bool) -> tuple[dict, str]:
+    parts: list[str] = path.split('.')
+    for part in parts[:-1]:
+        if(not isinstance(document.get(part), dict)):
+            if(not create):
+                return None, parts[-1]
+            document[part] = dict()
+        document = document[part]
+
+    return document, parts[-1]
+
+
+def apply_update(document: dict, update: dict, inserted: bool = False) -> dict:
+    """
+    Apply a MongoDB update to a copy of the document. An update without operators replaces the document except its '_id'.
+
+    Supported operators are $set, $setOnInsert, $unset, $inc, $push and $addToSet.
+
+    Args:
+        document (dict): The updated document.
+        update (dict): The update.
+        inserted (bool, optional): True if the document is being created by an upsert. Defaults to False.
+
+    Raises:
+        ValueError: Raised when the update uses an unsupported operator or changes '_id'.
+
+    Returns:
+        dict: The updated document.
+    """
+    if(not any(key.startswith('$') for key in update)):
+        res: dict = {'_id': document['_id']} if '_id' in document else dict()
+        res.update(copy.deepcopy({key: value for key, value in update.items() if key != '_id'}))
+        return res
+
+    res: dict = copy.deepcopy(document)
+    for operator, fields in update.items():
+        if(operator == '$setOnInsert' and not inserted):
+            continue
+
+        for path, value in fields.items():
+            if(path == '_id' and operator != '$setOnInsert' and value != res.get('_id')):
+                raise ValueError('The field "_id" cannot be changed.')
+
+            parent, key = __parent__(res, path, create=(operator != '$unset'))
+            if(operator in ('$set', '$setOnInsert')):
+                parent[key] = copy.deepcopy(value)
+            elif(operator == '$unset'):
+                if(parent is not None):
+                    parent.pop(key, None)
+            elif(operator == '$inc'):
+                parent[key] = parent.get(key, 0) + value
+            elif(operator == '$push'):
+                parent.setdefault(key, list()).append(copy.deepcopy(value))
+            elif(operator == '$addToSet'):
+                items: list = parent.setdefault(key, list())
+                if(value not in items):
+                    items.append(copy.deepcopy(value))
+            else:
+                raise ValueError(f'Update operator "{operator}" is not supported.')
+
+    return res
+
+
+def __upsert_document__(filter_: dict) -> dict:
+    # A document created by an upsert holds the equality conditions of the filter
+    res: dict = dict()
+    for key, condition in filter_.items():
+        if(key.startswith('$')):
+            continue
+        if(isinstance(condition, dict) and any(k.startswith('$') for k in condition)):
+            if('$eq' not in condition):
+                continue
+            condition = condition['$eq']
+
+        parent, last = __parent__(res, key, create=True)
+        parent[last] = copy.deepcopy(condition)
+
+    return res
+
+
+class SQLiteDBHandler(DBHandlerInterface):
+    """
+    Implementation of a DBHandler which stores documents in an embedded SQLite database.
+
+    It understands the same filters, projections, sorts and updates the server uses with MongoDB,
+    so the whole stack can be run and benchmarked without a MongoDB server.
+    Documents are stored pickled, queries by '_id' use the primary key, other filters scan the collection.
+
+    Args:
+        DBHandlerInterface ([type]): Interface it implements.
+    """
+
+    name: str = 'sqlite'
+
+    # Connection which keeps a shared in-memory database alive, see open_shared_resources
+    _shared_connection: sqlite3.Connection = None
+
+    def __init__(self, db_name: str, collection_name: str, sqlite_path: str = 'zoo_prague.sqlite3', **kwargs):
+        """
+        Initialize SQLiteDBHandler.
+
+        Args:
+            db_name (str): Name of the database which is used by default.
+            collection_name (str): Name of the collection which is used by default.
+            sqlite_path (str, optional): Path of the SQLite file. Overridden by SQLITE_PATH environment variable.
+                ':memory:' creates an in-memory database shared by all handlers of the process. Defaults to 'zoo_prague.sqlite3'.
+        """
+        self.path: str = os.getenv('SQLITE_PATH', sqlite_path)
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.connection: sqlite3.Connection = SQLiteDBHandler.connect(self.path)
+
+    @staticmethod
+    def connect(path: str) -> sqlite3.Connection:
+        """
+        Open a connection and create tables if they do not exist.
+
+        Connections can be used from other threads, e.g. from the thread pool of the REST server.
+        """
+        if(path == ':memory:'):
+            connection: sqlite3.Connection = sqlite3.connect('file:zoo_prague?mode=memory&cache=shared', uri=True, check_same_thread=False, timeout=30)
+        else:
+            connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            # Readers are not blocked by a running scraper
+            connection.execute('PRAGMA journal_mode=WAL')
+
+        connection.executescript(_SCHEMA)
+        return connection
+
+    @classmethod
+    def open_shared_resources(cls, sqlite_path: str = 'zoo_prague.sqlite3', **kwargs):
+        """
+        Keep a connection open so that a shared in-memory database is not deleted when the last handler exits.
+        """
+        if(cls._shared_connection is None):
+            cls._shared_connection = cls.connect(os.getenv('SQLITE_PATH', sqlite_path))
+
+    @classmethod
+    def close_shared_resources(cls):
+        if(cls._shared_connection is not None):
+            cls._shared_connection.close()
+            cls._shared_connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Errors raised while the handler was open are not suppressed
+        self.connection.close()
+        self.connection = None
+
+    def __namespace__(self, db_name: str, collection_name: str) -> tuple[str, str]:
+        return db_name or self.db_name, collection_name or self.collection_name
+
+    def __create_collection__(self, db: str, collection: str):
+        self.connection.execute('INSERT OR IGNORE INTO collections (db, name) VALUES (?, ?)', (db, collection))
+
+    def __insert__(self, db: str, collection: str, data: dict):
+        if('_id' not in data):
+            # Same as pymongo, the generated ID is added to the inserted dictionary
+            data['_id'] = ObjectId()
+        self.connection.execute('INSERT INTO documents (db, collection, key, document) VALUES (?, ?, ?, ?)',
+            (db, collection, document_key(data['_id']), pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def __update__(self, db: str, collection: str, filter_: dict, data: dict, upsert: bool):
+        row = next(self.__scan__(db, collection, filter_), None)
+        if(row is not None):
+            seq, document = row
+            updated: dict = apply_update(document, data)
+            self.connection.execute('UPDATE documents SET document = ? WHERE seq = ?', (pickle.dumps(updated, protocol=pickle.HIGHEST_PROTOCOL), seq))
+        elif(upsert):
+            self.__insert__(db, collection, apply_update(__upsert_document__(filter_), data, inserted=True))
+
+    def __scan__(self, db: str, collection: str, filter_: dict, batch_size: int = 100) -> Iterator[tuple[int, dict]]:
+        # Yields (seq, document) of matching documents in the order of insertion
+        query: str = 'SELECT seq, document FROM documents WHERE db = ? AND collection = ?'
+        params: list = [db, collection]
+
+        id_condition = filter_.get('_id', _MISSING)
+        if(id_condition is not _MISSING and not isinstance(id_condition, dict)):
+            query += ' AND key = ?'
+            params.append(document_key(id_condition))
+        elif(isinstance(id_condition, dict) and list(id_condition) == ['$in']):
+            if(len(id_condition['$in']) == 0):
+                return
+            query += f' AND key IN ({",".join("?" * len(id_condition["$in"]))})'
+            params.extend(document_key(value) for value in id_condition['$in'])
+
+        cursor: sqlite3.Cursor = self.connection.execute(query + ' ORDER BY seq', params)
+        try:
+            while(len(rows := cursor.fetchmany(batch_size)) > 0):
+                for seq, blob in rows:
+                    document: dict = pickle.loads(blob)
+                    if(match_document(document, filter_)):
+                        yield seq, document
+        finally:
+            cursor.close()
+
+    def insert_many(self, data: list[dict], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Stores a list of documents in a DB."""
+        db, collection = self.__namespace__(db_name, collection_name)
+        with self.connection:
+            self.__create_collection__(db, collection)
+            for document in data:
+                self.__insert__(db, collection, document)
+
+        return True
+
+    def insert_one(self, data: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Collects one thing and stores it in a DB.
+
+        Args:
+            data (dict): Data to store
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection where to put data to. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        return self.insert_many([data], db_name=db_name, collection_name=collection_name)
+
+    def update_one(self, filter_: dict, data: dict, upsert: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Updates one document. If more then one document is found then only the first is updated.
+
+        Args:
+            filter_ (dict): Determines how to find the document to update.
+            data (dict): Determines how the document is updated.
+            upsert (bool, optional): If set to True and no document is found then a new document is created. Defaults to False.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection where to put data to. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        db, collection = self.__namespace__(db_name, collection_name)
+        with self.connection:
+            self.__create_collection__(db, collection)
+            self.__update__(db, collection, filter_, data, upsert)
+
+        return True
+
+    def bulk_write(self, operations: list[WriteOperation], ordered: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Apply many writes in a single transaction.
+
+        Args:
+            operations (list[WriteOperation]): Writes to apply.
+            ordered (bool, optional): If True then the first failed write stops the rest, otherwise the remaining writes are applied. Defaults to False.
+
+        Raises:
+            BulkWriteError: Raised after the successful writes are committed if some writes failed, like in MongoDB.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        db, collection = self.__namespace__(db_name, collection_name)
+        write_errors: list[dict] = list()
+        with self.connection:
+            self.__create_collection__(db, collection)
+            for index, operation in enumerate(operations):
+                try:
+                    if(operation.kind == 'insert'):
+                        self.__insert__(db, collection, operation.document)
+                    else:
+                        self.__update__(db, collection, operation.filter_, operation.update, operation.upsert)
+                except (sqlite3.IntegrityError, ValueError) as ex:
+                    # 11000 is the MongoDB code of duplicate key errors
+                    write_errors.append({'index': index, 'code': 11000 if isinstance(ex, sqlite3.IntegrityError) else 2, 'errmsg': str(ex), 'op': operation.document or operation.filter_})
+                    if(ordered):
+                        break
+
+        if(len(write_errors) > 0):
+            raise BulkWriteError({'writeErrors': write_errors, 'nInserted': 0, 'nUpserted': 0, 'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'upserted': []})
+
+        return True
+
+    def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Rename collection.
+
+        Args:
+            collection_new_name (str): New name of the collection
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Raises:
+            ValueError: Raised when the collection does not exist or when the new name is already used.
+
+        Returns:
+            bool: [description]
+        """
+        db, collection = self.__namespace__(db_name, collection_name)
+        if(not self.collection_exists(db_name=db, collection_name=collection)):
+            raise ValueError(f'Collection "{collection}" does not exist.')
+        if(self.collection_exists(db_name=db, collection_name=collection_new_name)):
+            raise ValueError(f'Collection "{collection_new_name}" already exists.')
+
+        with self.connection:
+            self.connection.execute('UPDATE collections SET name = ? WHERE db = ? AND name = ?', (collection_new_name, db, collection))
+            self.connection.execute('UPDATE documents SET collection = ? WHERE db = ? AND collection = ?', (collection_new_name, db, collection))
+
+        return True
+
+    def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Deletes all documents which match the filter.
+
+        Args:
+            filter_ (dict): Determines which documents are deleted.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        db, collection = self.__namespace__(db_name, collection_name)
+        with self.connection:
+            sequences: list[tuple[int]] = [(seq,) for seq, _ in self.__scan__(db, collection, filter_)]
+            self.connection.executemany('DELETE FROM documents WHERE seq = ?', sequences)
+
+        return True
+
+    def drop_collection(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Drop collection if it exists.
+
+        Args:
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: [description]
+        """
+        db, collection = self.__namespace__(db_name, collection_name)
+        with self.connection:
+            self.connection.execute('DELETE FROM documents WHERE db = ? AND collection = ?', (db, collection))
+            self.connection.execute('DELETE FROM collections WHERE db = ? AND name = ?', (db, collection))
+
+        return True
+
+    def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+        """
+        Finds documents in a collection using the defined filter.
+
+        Args:
+            filter_ (dict): Defines what kinds of documents are to be found.
+            projection (dict, optional): Defines columns which are to be returned. Defaults to None and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then documents are in the order of insertion.
+            limit (int, optional): Maximum number of returned documents. Defaults to 0 which means no limit.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            list[dict]: List of dictionaries which hold document data.
+        """
+        res: list[dict] = list()
+        for document in self.find_iter(filter_, projection=projection, sort=sort, db_name=db_name, collection_name=collection_name):
+            res.append(document)
+            if(len(res) == limit):
+                break
+
+        return res
+
+    def find_iter(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, batch_size: int = 100, db_name: str = None, collection_name: str = None, **kwargs) -> Iterator[dict]:
+        """
+        Iterates over documents in a collection using the defined filter. Without a sort only one batch of rows is held in memory.
+
+        Args:
+            filter_ (dict): Defines what kinds of documents are to be found.
+            projection (dict, optional): Defines columns which are to be returned. Defaults to None and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then documents are in the order of insertion.
+            batch_size (int, optional): Number of rows loaded from the DB at once. Defaults to 100.
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Yields:
+            Iterator[dict]: Dictionaries which hold document data.
+        """
+        db, collection = self.__namespace__(db_name, collection_name)
+        documents: Iterator[dict] = (document for _, document in self.__scan__(db, collection, filter_, batch_size))
+
+        if(sort):
+            documents: list[dict] = list(documents)
+            # Stable sorts from the least significant key, arrays are compared by their smallest or largest item
+            for key, direction in reversed(sort):
+                def value_key(document: dict) -> tuple:
+                    values: list = __candidates__(get_values(document, key)) or [_MISSING]
+                    keys: list[tuple] = [sort_key(value) for value in values if not isinstance(value, list)] or [sort_key(values[0])]
+                    return min(keys) if direction == 1 else max(keys)
+
+                documents.sort(key=value_key, reverse=(direction == -1))
+
+        for document in documents:
+            yield apply_projection(document, projection)
+
+    def collection_exists(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Check if the given collection exists.
+
+        Args:
+            db_name (str, optional): Name of the database where the collection is. Defaults to the property selected during initialization.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to the property selected during initialization.
+
+        Returns:
+            bool: True if the collection exists.
+        """
+        db, collection = self.__namespace__(db_name, collection_name)
+        row = self.connection.execute('SELECT 1 FROM collections WHERE db = ? AND name = ?', (db, collection)).fetchone()
+
+        return row is not None
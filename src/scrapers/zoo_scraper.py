@@ -1,5 +1,8 @@
 from server_dataclasses.interfaces import DBHandlerInterface
-from server_dataclasses.models import AnimalData, SchedulerStates
+from server_dataclasses.models import AnimalData, SchedulerStates, WriteOperation, ANIMAL_FILTERS
+from scrapers.notifications import publish_metadata_changed
+from scrapers.buffered_writer import BufferedWriter
+from scrapers.datasets import DatasetVersion, DatasetWriter, current_dataset, load_metadata
 import requests
 import time
 import re
@@ -9,7 +12,9 @@ from bs4 import BeautifulSoup, Tag
 from urllib.parse import urlparse, urljoin, ParseResult
 import traceback
 import logging
-from datetime import datetime
+import hashlib
+import json
+from datetime import datetime, timedelta
 
 # Define global vars
 _URL: ParseResult = urlparse(
@@ -20,6 +25,13 @@ _MULTI_WHITESPACE = re.compile(r"\s+")
 # Group 1 matches everything before the first '(', group 2 matches everything inside outermost '()'
 _OUTSIDE_INSIDE_PARANTHESIS = re.compile(r'([^\(]*)\((.*)\)$')
 
+# Facets of animals stored in 'facets' collection. Key is the facet name, value is the animal attribute and whether it holds comma-separated values
+_FACETS: dict[str, tuple[str, bool]] = {
+    'classes': ('class_', False),
+    'biotops': ('biotop', True),
+    'foods': ('food', True)
+}
+
 # Define logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -259,47 +271,173 @@ def parse_animal_data(soup: BeautifulSoup, url: ParseResult, animal_pens: list[d
     # Add map locations
     __add_map_locations__(res, animal_pens, buildings)
 
+    res.filter_values = {attr: split_multi_value(getattr(res, attr), split=split) for attr, split in ANIMAL_FILTERS.items()}
+
+    return res
+
+
+def split_multi_value(value: str, split: bool = True) -> list[str]:
+    """
+    Transform a raw value of an animal attribute such as :py:attr:`AnimalData.biotop` into a list of unique capitalized values.
+
+    Args:
+        value (str): Raw value, e.g. 'savany, lesy'.
+        split (bool, optional): If True then the value is split by commas. Defaults to True.
+
+    Returns:
+        list[str]: Unique capitalized values, e.g. ['Savany', 'Lesy'].
+    """
+    if(not value):
+        return []
+
+    parts: list[str] = value.split(',') if split else [value]
+    res: list[str] = list()
+    for part in parts:
+        part = part.strip().capitalize()
+        if(part != '' and part not in res):
+            res.append(part)
+
+    return res
+
+
+def compute_facets(animals: list[dict]) -> dict[str, list[dict]]:
+    """
+    Compute sorted lists of unique values of class, biotop and food attributes with the number of animals for each value.
+
+    Args:
+        animals (list[dict]): Data of all animals.
+
+    Returns:
+        dict[str, list[dict]]: Key is the facet name, value is a sorted list of {'value': str, 'count': int} dictionaries.
+    """
+    res: dict[str, list[dict]] = dict()
+    for facet, (attr, split) in _FACETS.items():
+        counts: dict[str, int] = dict()
+        for animal in animals:
+            for value in split_multi_value(animal.get(attr), split=split):
+                counts[value] = counts.get(value, 0) + 1
+
+        res[facet] = [{'value': value, 'count': counts[value]} for value in sorted(counts)]
+
     return res
 
 
-def run_web_scraper(session: requests.Session, db_handler: DBHandlerInterface, collection_name: str, min_delay: float = 10, **kwargs):
+def content_hash(data: dict) -> str:
+    """
+    Compute a hash of all attributes of an animal so that changed animals can be found by comparing hashes of two dataset versions.
+
+    Args:
+        data (dict): Data of one animal.
+
+    Returns:
+        str: Hex digest of the data.
+    """
+    serialized: str = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+
+    return hashlib.sha256(serialized.encode('utf8')).hexdigest()
+
+
+def compute_changes(previous_hashes: dict[str, str], hashes: dict[str, str]) -> dict[str, list[int]]:
+    """
+    Compare content hashes of animals of two dataset versions.
+
+    Args:
+        previous_hashes (dict[str, str]): Hashes of the previous version. Key is the stringified animal ID.
+        hashes (dict[str, str]): Hashes of the new version. Key is the stringified animal ID.
+
+    Returns:
+        dict[str, list[int]]: Sorted IDs of 'inserted', 'updated' and 'removed' animals.
+    """
+    return {
+        'inserted': sorted(int(id_) for id_ in hashes if id_ not in previous_hashes),
+        'updated': sorted(int(id_) for id_, hash_ in hashes.items() if id_ in previous_hashes and previous_hashes[id_] != hash_),
+        'removed': sorted(int(id_) for id_ in previous_hashes if id_ not in hashes)
+    }
+
+
+def run_web_scraper(session: requests.Session, db_handler: DBHandlerInterface, collection_name: str, min_delay: float = 10, change_log_days: float = 90, **kwargs):
     """
     Run a Zoo Prague lexicon web scraper to fill the provided DB with data about animals.
 
+    Animals and facets are written as a new version of 'animals' dataset which is published when the run is complete.
+
     Args:
         session (requests.Session): HTTP session for running requests.
         db_handler (DBHandlerInterface): A DBHandlerInterface instance of chosen database used to store data from Zoo Prague lexicon.
         min_delay (float): Minimum time in seconds to wait between downloads of pages to scrape.
+        change_log_days (float, optional): Number of days change logs of animals are kept for. Defaults to 90.
     """
-    animal_pens: list[dict] = db_handler.find(filter_={}, collection_name='animal_pens')
-    buildings: list[dict] = db_handler.find(filter_={}, collection_name='zoo_parts')
-    tmp_coll_name: str = f'tmp_{collection_name}'
+    map_dataset: DatasetVersion = current_dataset(load_metadata(db_handler), 'map')
+    animal_pens: list[dict] = db_handler.find(filter_={}, collection_name=map_dataset.collection('animal_pens'))
+    buildings: list[dict] = db_handler.find(filter_={}, collection_name=map_dataset.collection('zoo_parts'))
     db_handler.update_one({'_id': 0}, {'$set': {'last_update_start': datetime.now()}}, upsert=True, collection_name='metadata')
-    db_handler.drop_collection(collection_name=tmp_coll_name)
-
-    for i, url in enumerate(get_animal_urls(session)):
-        page = session.get(url.geturl())
-        start_time: float = time.time()
-        soup: BeautifulSoup = BeautifulSoup(page.content, 'html.parser')
-
-        logger.info(f'{i}. {url.geturl()}')
-        try:
-            animal_data = parse_animal_data(soup, url, animal_pens, buildings)
-            db_handler.insert_one(animal_data.__dict__, collection_name=tmp_coll_name)
-        except:
-            logger.error(f'Error occured when parsing: {url.geturl()}')
-            logger.error(traceback.format_exc())
-            continue
-
-        elapsed_time: float = time.time() - start_time
-        time_to_sleep: float = min_delay - elapsed_time
-        logger.info(f'\t\tElapsed time: {elapsed_time} s')
-        if time_to_sleep > 0:
-            time.sleep(time_to_sleep)
-    
-    db_handler.drop_collection(collection_name=collection_name)
-    db_handler.rename_collection(collection_new_name=collection_name, collection_name=tmp_coll_name)
-    db_handler.update_one({'_id': 0}, {'$set': {'last_update_end': datetime.now()}}, upsert=True, collection_name='metadata')
+    publish_metadata_changed()
+    dataset_writer: DatasetWriter = DatasetWriter(db_handler, 'animals')
+    # Facet attributes and content hashes of scraped animals, key is the stringified ID since MongoDB keys have to be strings
+    animals: dict[str, dict] = dict()
+    hashes: dict[str, str] = dict()
+
+    # The new version is not read before it is published so animals are written only in large batches
+    with BufferedWriter(db_handler, collection_name=dataset_writer.collection(collection_name), max_delay=None) as writer:
+        for i, url in enumerate(get_animal_urls(session)):
+            page = session.get(url.geturl())
+            start_time: float = time.time()
+            soup: BeautifulSoup = BeautifulSoup(page.content, 'html.parser')
+
+            logger.info(f'{i}. {url.geturl()}')
+            try:
+                animal_data = parse_animal_data(soup, url, animal_pens, buildings)
+                hashes[str(animal_data._id)] = content_hash(animal_data.__dict__)
+                writer.insert_one(animal_data.__dict__)
+                animals[str(animal_data._id)] = {attr: getattr(animal_data, attr) for attr, _ in _FACETS.values()}
+            except:
+                logger.error(f'Error occured when parsing: {url.geturl()}')
+                logger.error(traceback.format_exc())
+                continue
+
+            elapsed_time: float = time.time() - start_time
+            time_to_sleep: float = min_delay - elapsed_time
+            logger.info(f'\t\tElapsed time: {elapsed_time} s')
+            if time_to_sleep > 0:
+                time.sleep(time_to_sleep)
+
+    # Animals whose writes failed are not part of the new version
+    for operation in writer.failed:
+        hashes.pop(str(operation.document['_id']), None)
+        animals.pop(str(operation.document['_id']), None)
+
+    # Indexes are created before publishing so that filtered queries are indexed right away
+    dataset_writer.ensure_indexes(collection_name)
+
+    # Precompute facets so that the server can return them using a single read
+    facets: list[WriteOperation] = [WriteOperation.update({'_id': facet}, {'$set': {'values': values}}, upsert=True) for facet, values in compute_facets(list(animals.values())).items()]
+    db_handler.bulk_write(facets, collection_name=dataset_writer.collection('facets'))
+
+    # Store a change log keyed by the new dataset version so that clients can download only changed animals.
+    # Changes are computed against the published version, which differs from the newest log after a rollback.
+    # MongoDB stores dates with millisecond precision so the version is truncated to be equal to the stored one.
+    update_end: datetime = datetime.now()
+    update_end = update_end.replace(microsecond=update_end.microsecond // 1000 * 1000)
+    metadata: dict = load_metadata(db_handler)
+    published_version: datetime = current_dataset(metadata, 'animals').version
+    published: list[dict] = db_handler.find({'_id': published_version}, collection_name='animals_changes') if published_version is not None else []
+    previous_hashes: dict[str, str] = published[0].get('hashes') if len(published) > 0 else None
+    # Without hashes of the published version the changes are unknown and clients have to download all animals
+    previous_version: datetime = published_version if previous_hashes is not None else None
+    changes: dict = compute_changes(previous_hashes or {}, hashes) | {'previous': previous_version, 'hashes': hashes}
+    db_handler.update_one({'_id': update_end}, {'$set': changes}, upsert=True, collection_name='animals_changes')
+
+    # Hashes are kept only for the versions that can be published, i.e. the new one and the one a rollback restores
+    replaced: dict = (metadata.get('previous_datasets') or dict()).get('animals')
+    if(replaced is not None and replaced['version'] != published_version):
+        db_handler.update_one({'_id': replaced['version']}, {'$unset': {'hashes': ''}}, collection_name='animals_changes')
+    try:
+        db_handler.delete_many({'_id': {'$lt': update_end - timedelta(days=float(change_log_days))}}, collection_name='animals_changes')
+    except NotImplementedError:
+        logger.warning('Old change logs were not deleted.', exc_info=True)
+
+    # Readers switch to the new version at once, the previous one is kept for a rollback
+    dataset_writer.publish(update_end)
 
 
 def main():
@@ -334,6 +472,7 @@ def main():
             # Work is done either successfully or unsuccessfully. Update scheduler_state
             logger.info('Setting scheduler_state to WORK_DONE.')
             handler_instance.update_one({"_id": 0}, {"$set": {"scheduler_state": SchedulerStates.WORK_DONE}}, collection_name='metadata')
+            publish_metadata_changed()
 
 
 def run_test_job():
@@ -1,5 +1,7 @@
+from typing import AsyncIterator, Iterator
 import abc
 import pkg_resources
+from server_dataclasses.models import IndexDefinition, WriteOperation
 
 
 class DBHandlerInterface(metaclass=abc.ABCMeta):
@@ -39,6 +41,22 @@ class DBHandlerInterface(metaclass=abc.ABCMeta):
         ]
         return (False in demands) or NotImplemented
 
+    @classmethod
+    def open_shared_resources(cls, **kwargs):
+        """
+        Create resources (e.g. a pooled DB client) that are shared by all instances created with `shared_client=True`.
+
+        Used by long-running processes such as the REST server which create a handler for every request. Does nothing by default.
+        """
+        pass
+
+    @classmethod
+    def close_shared_resources(cls):
+        """
+        Close all resources created by :py:meth:`open_shared_resources`. Does nothing by default.
+        """
+        pass
+
     @abc.abstractmethod
     def __enter__(self):
         raise NotImplementedError
@@ -84,6 +102,22 @@ class DBHandlerInterface(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Deletes all documents which match the filter.
+
+        Handlers that do not implement it raise NotImplementedError when it is called.
+
+        Args:
+            filter_ (dict): Determines which documents are deleted.
+            db_name (str, optional): Name of the database where the collection is. Defaults to None.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to None.
+
+        Returns:
+            bool: [description]
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support delete_many.')
+
     @abc.abstractmethod
     def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
         """
@@ -114,13 +148,15 @@ class DBHandlerInterface(metaclass=abc.ABCMeta):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def find(self, filter_: dict, projection: dict = None, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+    def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
         """
         Finds documents in a collection using the defined filter.
 
         Args:
             filter_ (dict): Defines what kinds of documents are to be found.
             projection (dict, optional): Defines columns which are to be returned. Defaults to None and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then the order is not defined.
+            limit (int, optional): Maximum number of returned documents. Defaults to 0 which means no limit.
             db_name (str, optional): Name of the database where the collection is. Defaults to None.
             collection_name (str, optional): Name of the collection which is to be used. Defaults to None.
 
@@ -129,6 +165,25 @@ class DBHandlerInterface(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def find_iter(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, batch_size: int = 100, db_name: str = None, collection_name: str = None, **kwargs) -> Iterator[dict]:
+        """
+        Iterates over documents in a collection using the defined filter. Unlike :py:meth:`find` only one batch of documents is held in memory.
+
+        By default all documents are loaded using :py:meth:`find`.
+
+        Args:
+            filter_ (dict): Defines what kinds of documents are to be found.
+            projection (dict, optional): Defines columns which are to be returned. Defaults to None and then all columns are returned.
+            sort (list[tuple[str, int]], optional): List of (key, direction) pairs the documents are sorted by, direction is 1 or -1. Defaults to None and then the order is not defined.
+            batch_size (int, optional): Number of documents loaded from the DB at once. Defaults to 100.
+            db_name (str, optional): Name of the database where the collection is. Defaults to None.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to None.
+
+        Yields:
+            Iterator[dict]: Dictionaries which hold document data.
+        """
+        yield from self.find(filter_, projection=projection, sort=sort, db_name=db_name, collection_name=collection_name, **kwargs)
+
     @abc.abstractmethod
     def collection_exists(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
         """
@@ -143,6 +198,164 @@ class DBHandlerInterface(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def ensure_indexes(self, indexes: list[IndexDefinition], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Create the given indexes if they do not exist yet. Does nothing by default.
+
+        Args:
+            indexes (list[IndexDefinition]): Indexes the collection should have.
+            db_name (str, optional): Name of the database where the collection is. Defaults to None.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to None.
+
+        Returns:
+            bool: True if the indexes exist.
+        """
+        return True
+
+    def bulk_write(self, operations: list[WriteOperation], ordered: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Apply many writes to a collection. Implementations should send them in as few round trips as possible.
+
+        By default the writes are applied one by one using :py:meth:`insert_one` and :py:meth:`update_one`.
+
+        Args:
+            operations (list[WriteOperation]): Writes to apply.
+            ordered (bool, optional): If True then the writes are applied in the given order and the first failed write stops the rest. Defaults to False.
+            db_name (str, optional): Name of the database where the collection is. Defaults to None.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to None.
+
+        Returns:
+            bool: [description]
+        """
+        for operation in operations:
+            if(operation.kind == 'insert'):
+                self.insert_one(operation.document, db_name=db_name, collection_name=collection_name, **kwargs)
+            else:
+                self.update_one(operation.filter_, operation.update, upsert=operation.upsert, db_name=db_name, collection_name=collection_name, **kwargs)
+
+        return True
+
+    def bulk_upsert(self, documents: list[dict], key: str = '_id', db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """
+        Insert documents or update existing documents with the same key using a single :py:meth:`bulk_write`.
+
+        Args:
+            documents (list[dict]): Documents to store, each has to contain the key.
+            key (str, optional): Attribute which identifies documents. Defaults to '_id'.
+            db_name (str, optional): Name of the database where the collection is. Defaults to None.
+            collection_name (str, optional): Name of the collection which is to be used. Defaults to None.
+
+        Returns:
+            bool: [description]
+        """
+        operations: list[WriteOperation] = [
+            WriteOperation.update({key: document[key]}, {'$set': {k: v for k, v in document.items() if k != key}}, upsert=True) for document in documents
+        ]
+
+        return self.bulk_write(operations, db_name=db_name, collection_name=collection_name, **kwargs)
+
+
+class AsyncDBHandlerInterface(metaclass=abc.ABCMeta):
+    """An interface class for all asynchronous DBHandler classes which stand between server and concrete DB solution.
+
+    It is an asynchronous sibling of :py:class:`DBHandlerInterface` which is used by async FastAPI endpoints so that DB calls do not block the event loop.
+
+    Args:
+        metaclass ([type], optional): [description]. Defaults to abc.ABCMeta.
+    """
+
+    @classmethod
+    def name() -> str:
+        raise NotImplementedError
+
+    @classmethod
+    def open_shared_resources(cls, **kwargs):
+        """
+        Create resources (e.g. a pooled DB client) that are shared by all instances created with `shared_client=True`. Does nothing by default.
+        """
+        pass
+
+    @classmethod
+    def close_shared_resources(cls):
+        """
+        Close all resources created by :py:meth:`open_shared_resources`. Does nothing by default.
+        """
+        pass
+
+    @abc.abstractmethod
+    async def __aenter__(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def insert_many(self, data: list[dict], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.insert_many`."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def insert_one(self, data: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.insert_one`."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def update_one(self, filter_: dict, data: dict, upsert: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.update_one`."""
+        raise NotImplementedError
+
+    async def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.delete_many`. Raises NotImplementedError by default."""
+        raise NotImplementedError(f'{type(self).__name__} does not support delete_many.')
+
+    @abc.abstractmethod
+    async def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.rename_collection`."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def drop_collection(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.drop_collection`."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.find`."""
+        raise NotImplementedError
+
+    async def find_iter(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, batch_size: int = 100, db_name: str = None, collection_name: str = None, **kwargs) -> AsyncIterator[dict]:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.find_iter`. By default all documents are loaded using :py:meth:`find`."""
+        for document in await self.find(filter_, projection=projection, sort=sort, db_name=db_name, collection_name=collection_name, **kwargs):
+            yield document
+
+    @abc.abstractmethod
+    async def collection_exists(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.collection_exists`."""
+        raise NotImplementedError
+
+    async def ensure_indexes(self, indexes: list[IndexDefinition], db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.ensure_indexes`. Does nothing by default."""
+        return True
+
+    async def bulk_write(self, operations: list[WriteOperation], ordered: bool = False, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.bulk_write`. By default the writes are applied one by one."""
+        for operation in operations:
+            if(operation.kind == 'insert'):
+                await self.insert_one(operation.document, db_name=db_name, collection_name=collection_name, **kwargs)
+            else:
+                await self.update_one(operation.filter_, operation.update, upsert=operation.upsert, db_name=db_name, collection_name=collection_name, **kwargs)
+
+        return True
+
+    async def bulk_upsert(self, documents: list[dict], key: str = '_id', db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        """Asynchronous version of :py:meth:`DBHandlerInterface.bulk_upsert`."""
+        operations: list[WriteOperation] = [
+            WriteOperation.update({key: document[key]}, {'$set': {k: v for k, v in document.items() if k != key}}, upsert=True) for document in documents
+        ]
+
+        return await self.bulk_write(operations, db_name=db_name, collection_name=collection_name, **kwargs)
+
 
 def load_interface_subclasses():
     """
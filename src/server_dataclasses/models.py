@@ -1,6 +1,105 @@
 from dataclasses import dataclass, field
 from enum import IntEnum
 
+# ID of the document in 'map_artifacts' collection which holds the serialized road graph
+MAP_ARTIFACT_ID: str = 'map_graph'
+
+# Attributes of animals that can be used to filter animals. Value is True if the attribute holds comma-separated values.
+# Normalized values are stored in AnimalData.filter_values.
+ANIMAL_FILTERS: dict[str, bool] = {
+    'class_': False,
+    'biotop': True,
+    'food': True,
+    'continent': True,
+    'location_in_zoo': True
+}
+
+
+@dataclass
+class IndexDefinition():
+    """
+    Describes an index of a DB collection independently of the used DB.
+    """
+
+    name: str
+
+    # List of (key, direction) pairs, direction is 1 or -1
+    keys: list[tuple[str, int]]
+    unique: bool = False
+
+
+# Indexes of 'animals_data' collection. Filters are sorted by ID so that filtered pages are read from the index.
+ANIMALS_DATA_INDEXES: list[IndexDefinition] = [
+    # /animals without currently unavailable animals: {'is_currently_available': True} sorted by '_id'
+    IndexDefinition(name='available', keys=[('is_currently_available', 1), ('_id', 1)])
+] + [
+    # /animals filtered by an attribute: {'filter_values.<attr>': {'$in': [...]}} sorted by '_id'
+    IndexDefinition(name=f'filter_{attr}', keys=[(f'filter_values.{attr}', 1), ('_id', 1)]) for attr in ANIMAL_FILTERS
+]
+
+# Indexes every collection needs besides the default '_id' index. Key is the collection name.
+# Only indexes that back filters or sorts of actual queries are declared, every index slows down writes of a new dataset version.
+# Collections that are only read whole or by '_id' have no additional indexes.
+COLLECTION_INDEXES: dict[str, list[IndexDefinition]] = {
+    'animals_data': ANIMALS_DATA_INDEXES,
+    'animal_pens': [],
+    'zoo_parts': [],
+    'roads': [],
+    'road_nodes': [],
+    'singular_plural': [],
+    'facets': [],
+    'animals_changes': [],
+    'map_artifacts': [],
+    'metadata': []
+}
+
+
+@dataclass
+class DatasetDefinition():
+    """
+    Describes collections which are written by one scraper run and published together as one version.
+    """
+
+    # Attribute of the metadata document which holds the version of the published dataset
+    version_attribute: str
+
+    collections: list[str]
+
+
+# Versioned datasets, see scrapers.datasets. Key is the dataset name.
+DATASETS: dict[str, DatasetDefinition] = {
+    'animals': DatasetDefinition(version_attribute='last_update_end', collections=['animals_data', 'facets']),
+    'map': DatasetDefinition(version_attribute='map_last_update', collections=['zoo_parts', 'roads', 'road_nodes', 'animal_pens', 'map_artifacts'])
+}
+
+
+@dataclass
+class WriteOperation():
+    """
+    Describes one write of a bulk write independently of the used DB.
+
+    Use :py:meth:`insert` and :py:meth:`update` to create it.
+    """
+
+    # 'insert' or 'update'
+    kind: str
+
+    # Inserted document
+    document: dict = None
+
+    # Filter and update of an updated document
+    filter_: dict = None
+    update: dict = None
+    upsert: bool = False
+
+    @classmethod
+    def insert(cls, document: dict) -> 'WriteOperation':
+        return cls(kind='insert', document=document)
+
+    @classmethod
+    def update(cls, filter_: dict, update: dict, upsert: bool = False) -> 'WriteOperation':
+        return cls(kind='update', filter_=filter_, update=update, upsert=upsert)
+
 
 @dataclass
 class AnimalData():
@@ -58,6 +157,9 @@ class AnimalData():
     # IDs of locations of the animal's pens in map data
     map_locations: list[dict] = field(default_factory=list)
 
+    # Normalized values of attributes from ANIMAL_FILTERS used by indexed queries. Key is the attribute name.
+    filter_values: dict[str, list[str]] = field(default_factory=dict)
+
 class SchedulerStates(IntEnum):
     """
     Contains all possible states of the scheduler script.
@@ -68,11 +68,26 @@ class Metadata(BaseModel):
 class AnimalsResult(BaseModel):
     metadata: Metadata
     data: list[AnimalDataOutput]
+    # Cursor of the next page, None if this is the last page or if the result is not paginated
+    next: str = None
+
+class AnimalChangesResult(BaseModel):
+    metadata: Metadata
+    # True if changes since the requested version are not known, data then holds all animals and the client has to replace its copy
+    full_sync: bool = False
+    # Inserted and updated animals
+    data: list[AnimalDataOutput]
+    # IDs of removed animals
+    removed: list[int] = list()
 
 class BaseResult(BaseModel):
     metadata: Metadata
     data: list[str]
 
+class FacetResult(BaseResult):
+    # Number of animals for each value in data
+    counts: dict[str, int]
+
 ### Map metadata ###
 
 class RoadNode(BaseModel):
@@ -91,7 +106,40 @@ class Road(BaseModel):
     geometry: Geometry
     properties: dict
 
+class MapGraph(BaseModel):
+    nodes: list[RoadNode]
+    roads: list[Road]
+
 class MapMetadata(BaseModel):
     metadata: Metadata
     nodes: list[RoadNode]
-    roads: list[Road]
\ No newline at end of file
+    roads: list[Road]
+
+class RoutePoint(BaseModel):
+    id: int = Field(..., alias='_id')
+    lon: float
+    lat: float
+
+class RouteResult(BaseModel):
+    metadata: Metadata
+    # Length of the route in meters
+    distance: float
+    # Road nodes of the route from the start to the destination
+    nodes: list[RoutePoint]
+
+class MapLocationOutput(BaseModel):
+    """
+    An animal pen or a zoo part found by a spatial query.
+    """
+    id: int = Field(..., alias='_id')
+    name: str = None
+    is_animal_pen: bool = False
+    is_building: bool = False
+    # Distance from the queried point in meters, None for bounding box queries
+    distance: float = None
+    # IDs of animals located there
+    animal_ids: list[int] = list()
+
+class MapLocationsResult(BaseModel):
+    metadata: Metadata
+    data: list[MapLocationOutput]
@@ -5,6 +5,29 @@ from pathlib import Path
 import os
 
 
+def matches(value, condition) -> bool:
+    """
+    Check a document value against a filter condition. Supports equality and a few query operators.
+    """
+    if(not isinstance(condition, dict)):
+        return value == condition
+
+    operators = {
+        '$gt': lambda arg: value is not None and value > arg,
+        # An array value matches if any of its items is accepted
+        '$in': lambda arg: any(item in arg for item in value) if isinstance(value, list) else value in arg
+    }
+    return all(operators[operator](arg) for operator, arg in condition.items())
+
+def get_path(document: dict, key: str):
+    """
+    Get a value of a possibly nested key such as 'filter_values.biotop'.
+    """
+    for part in key.split('.'):
+        document = document.get(part) if isinstance(document, dict) else None
+
+    return document
+
 class JSONTestHandler(DBHandlerInterface):
     """Implementation of a testing DBHandler which uses local filesystem.
 
@@ -91,20 +114,29 @@ class BaseTestHandler(DBHandlerInterface):
         """Collects one thing and stores it in a DB."""
         return True
 
+    def delete_many(self, filter_: dict, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
+        return True
+
     def rename_collection(self, collection_new_name: str, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
         return True
 
     def drop_collection(self, db_name: str = None, collection_name: str = None, **kwargs) -> bool:
         return True
 
-    def find(self, filter_: dict, projection: dict = None, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
+    def find(self, filter_: dict, projection: dict = None, sort: list[tuple[str, int]] = None, limit: int = 0, db_name: str = None, collection_name: str = None, **kwargs) -> list[dict]:
         if(self.find_output is None):
             return []
 
         res = self.find_output.get(collection_name, [])
 
         for key, value in filter_.items():
-            res = [d for d in res if d[key] == value]
+            res = [d for d in res if matches(get_path(d, key), value)]
+
+        for key, direction in reversed(sort or []):
+            res = sorted(res, key=lambda d: d[key], reverse=(direction == -1))
+
+        if(limit > 0):
+            res = res[:limit]
         
         return res
 
@@ -1,12 +1,32 @@
 from fastapi.testclient import TestClient
 from rest.main import app
 import pytest
-from server_dataclasses.rest_models import AnimalsResult, Metadata, BaseResult, AnimalDataOutput
+from server_dataclasses.rest_models import AnimalsResult, Metadata, BaseResult, AnimalDataOutput, MapGraph
 from rest.config import get_settings
 from fixtures.fixtures import BaseTestHandler
 from types import SimpleNamespace
 from datetime import datetime
+import json
+import gzip
 from fixtures.utils import compare_lists
+from rest.cache import get_animals_cache, get_facets_cache, get_metadata_cache
+from rest.map_artifacts import get_map_artifact_cache
+from rest.mbtiles import MBTilesCache, get_mbtiles_cache
+from rest.search import get_search_index_cache
+from rest.routing import get_road_graph_cache
+from rest.spatial import get_spatial_index_cache
+from rest.compression import get_compression_cache
+from rest.db import SyncHandlerAdapter
+from scrapers.sqlite_handler import SQLiteDBHandler
+from scrapers.datasets import DatasetWriter, rollback_dataset
+import rest.compression
+from pytest_mock.plugin import MockerFixture
+from pathlib import Path
+import asyncio
+import time
+import sqlite3
+from contextlib import closing
+from fastapi.encoders import jsonable_encoder
 
 client = TestClient(app)
 handler = BaseTestHandler
@@ -18,6 +38,18 @@ metadata: dict = {
     'scheduler_state': 0
 }
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Every test uses its own data with the same metadata version
+    get_animals_cache().clear()
+    get_facets_cache().clear()
+    get_map_artifact_cache().clear()
+    get_search_index_cache().clear()
+    get_metadata_cache().invalidate()
+    get_road_graph_cache().clear()
+    get_spatial_index_cache().clear()
+    get_compression_cache().clear()
+
 def test_read_main():
     response = client.get("/")
     assert response.status_code == 200
@@ -187,4 +219,683 @@ def test_foods():
     data_res = ['Trees', 'Carcasses', 'Small people']
     assert response.status_code == 200
     assert len(response_data['data']) == len(data_res)
-    assert compare_lists(response_data['data'], data_res)
\ No newline at end of file
+    assert compare_lists(response_data['data'], data_res)
+
+def test_biotops_precomputed():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'facets': [
+            {'_id': 'biotops', 'values': [{'value': 'Les', 'count': 2}, {'value': 'Savana', 'count': 1}]}
+        ]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response = client.get("/api/biotops")
+    response_data: dict = response.json()
+
+    # Assert
+    assert response.status_code == 200
+    assert response_data['data'] == ['Les', 'Savana']
+    assert response_data['counts'] == {'Les': 2, 'Savana': 1}
+
+def test_animals_snapshot_reused_until_new_version():
+    animals_data = [AnimalDataOutput(_id=0, is_currently_available=True).dict()]
+    for animal_data in animals_data:
+        animal_data['_id'] = animal_data.pop('id')
+
+    find_res: dict[str, list] = {
+        'metadata': [dict(metadata)],
+        'animals_data': animals_data
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response = client.get("/api/animals")
+    find_res['animals_data'] = animals_data + [{'_id': 1, 'is_currently_available': True}]
+    response_cached = client.get("/api/animals")
+    find_res['metadata'] = [dict(metadata, last_update_end=datetime.now())]
+    response_stale = client.get("/api/animals")
+    # The scraper notifies the server about the new version
+    get_metadata_cache().invalidate()
+    response_new = client.get("/api/animals")
+
+    # Assert
+    assert len(response.json()['data']) == 1
+    assert len(response_cached.json()['data']) == 1
+    assert len(response_stale.json()['data']) == 1
+    assert len(response_new.json()['data']) == 2
+
+def test_animals_not_modified():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [{'_id': 0, 'is_currently_available': True}]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response = client.get("/api/animals")
+    etag: str = response.headers['ETag']
+    last_modified: str = response.headers['Last-Modified']
+    response_etag = client.get("/api/animals", headers={'If-None-Match': etag})
+    response_date = client.get("/api/classes", headers={'If-Modified-Since': last_modified})
+    response_changed = client.get("/api/animals", headers={'If-None-Match': '"outdated"'})
+
+    # Assert
+    assert response.status_code == 200
+    assert response_etag.status_code == 304
+    assert response_etag.content == b''
+    assert response_date.status_code == 304
+    assert response_changed.status_code == 200
+    assert response_changed.headers['ETag'] == etag
+
+def test_animals_paginated():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [{'_id': i, 'is_currently_available': i != 2} for i in reversed(range(5))]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    first_page: dict = client.get("/api/animals?limit=2").json()
+    second_page: dict = client.get(f"/api/animals?limit=2&after={first_page['next']}").json()
+    response_invalid = client.get("/api/animals?limit=2&after=invalid")
+
+    # Assert
+    assert [d['_id'] for d in first_page['data']] == [0, 1]
+    assert [d['_id'] for d in second_page['data']] == [3, 4]
+    assert second_page['next'] is None
+    assert response_invalid.status_code == 400
+
+def test_animals_ndjson():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [{'_id': i, 'is_currently_available': True} for i in range(250)]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response = client.get("/api/animals", headers={'Accept': 'application/x-ndjson'})
+    lines: list[dict] = [json.loads(line) for line in response.text.splitlines()]
+    response_refused = client.get("/api/animals", headers={'Accept': 'application/x-ndjson;q=0, application/json'})
+    response_preferred_json = client.get("/api/animals", headers={'Accept': 'application/json, application/x-ndjson;q=0.5'})
+    response_json_etag = client.get("/api/animals", headers={'If-None-Match': response.headers['etag']})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert 'Accept' in response.headers['vary']
+    assert 'metadata' in lines[0]
+    assert [line['animal']['_id'] for line in lines[1:]] == list(range(250))
+    assert response_refused.headers['content-type'] == 'application/json'
+    assert response_preferred_json.headers['content-type'] == 'application/json'
+    assert response_refused.headers['etag'] != response.headers['etag']
+    # The ETag of the NDJSON response does not validate the JSON one
+    assert response_json_etag.status_code == 200
+
+def test_find_iter_batches():
+    find_res: dict[str, list] = {'animals_data': [{'_id': i} for i in range(6)]}
+    adapter = SyncHandlerAdapter(BaseTestHandler(list(), find_res))
+
+    async def collect(batch_size: int) -> list[int]:
+        return [d['_id'] async for d in adapter.find_iter({}, batch_size=batch_size, collection_name='animals_data')]
+
+    iterators: list = list()
+
+    class ClosingHandler(BaseTestHandler):
+        def find_iter(self, filter_: dict, **kwargs):
+            # The reference keeps the generator from being closed by the garbage collector
+            iterators.append(document for document in self.find(filter_, **kwargs))
+            return iterators[-1]
+
+    async def collect_first() -> int:
+        documents = SyncHandlerAdapter(ClosingHandler(list(), find_res)).find_iter({}, batch_size=2, collection_name='animals_data')
+        document: dict = await documents.__anext__()
+        await documents.aclose()
+        return document['_id']
+
+    # Act & Assert
+    assert asyncio.run(collect(3)) == list(range(6))
+    assert asyncio.run(collect(4)) == list(range(6))
+    # The consumer stopped early, the iterator of the handler is closed anyway
+    assert asyncio.run(collect_first()) == 0
+    assert iterators[0].gi_frame is None
+
+def test_map_metadata_artifact():
+    road_nodes: list[dict] = [
+        {'_id': 1, 'lon': 14.1, 'lat': 50.1, 'road_ids': [10], 'is_connector': False},
+        {'_id': 2, 'lon': 14.2, 'lat': 50.2, 'road_ids': [10], 'is_connector': False}
+    ]
+    roads: list[dict] = [{'_id': 10, 'type': 'Feature', 'properties': {'name': 'Road'}, 'geometry': {'type': 'LineString', 'coordinates': road_nodes}}]
+    graph_json: bytes = json.dumps(MapGraph(nodes=road_nodes, roads=roads).dict(by_alias=True), separators=(',', ':')).encode()
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'roads': roads,
+        'road_nodes': road_nodes
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response_validated = client.get("/api/map/metadata")
+    response_graph_missing = client.get("/api/map/graph")
+    get_map_artifact_cache().clear()
+    # The brotli variant was too large to be stored
+    find_res['map_artifacts'] = [
+        {'_id': 'map_graph.json', 'hash': 'abc', 'encoding': 'json', 'data': graph_json},
+        {'_id': 'map_graph.gzip', 'hash': 'abc', 'encoding': 'gzip', 'data': gzip.compress(graph_json)}
+    ]
+    response_artifact = client.get("/api/map/metadata")
+    response_graph = client.get("/api/map/graph", headers={'Accept-Encoding': 'br, gzip'})
+    response_graph_cached = client.get("/api/map/graph", headers={'If-None-Match': 'W/"abc"'})
+
+    # Assert
+    assert response_validated.status_code == 200
+    assert response_graph_missing.status_code == 404
+    assert response_artifact.json() == response_validated.json()
+    assert response_graph.headers['content-encoding'] == 'gzip'
+    assert response_graph.json() == json.loads(graph_json)
+    assert response_graph_cached.status_code == 304
+
+def test_map_data_range(tmp_path: Path):
+    mbtiles_cache = MBTilesCache(cache_dir=tmp_path)
+    mbtiles_path: Path = mbtiles_cache.local_path('zoo')
+    mbtiles_path.parent.mkdir(parents=True)
+    mbtiles_path.write_bytes(bytes(range(256)) * 4)
+    res = {
+        'map_file_prefix': 'zoo',
+        'aws_storage_bucket_name': 'bucket'
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+    app.dependency_overrides[get_mbtiles_cache] = lambda: mbtiles_cache
+
+    # Act
+    response = client.get("/api/map/data")
+    response_range = client.get("/api/map/data", headers={'Range': 'bytes=1000-'})
+    response_if_range = client.get("/api/map/data", headers={'Range': 'bytes=0-9', 'If-Range': '"outdated"'})
+    response_invalid_range = client.get("/api/map/data", headers={'Range': 'bytes=5000-'})
+    response_cached = client.get("/api/map/data", headers={'If-None-Match': response.headers['ETag']})
+    app.dependency_overrides.pop(get_mbtiles_cache)
+
+    # Assert
+    assert response.status_code == 200
+    assert len(response.content) == 1024
+    assert response_range.status_code == 206
+    assert response_range.content == bytes(range(232, 256))
+    assert response_range.headers['Content-Range'] == 'bytes 1000-1023/1024'
+    assert response_if_range.status_code == 200
+    assert response_invalid_range.status_code == 416
+    assert response_cached.status_code == 304
+
+def test_mbtiles_single_download(tmp_path: Path, mocker: MockerFixture):
+    mbtiles_cache = MBTilesCache(cache_dir=tmp_path)
+
+    def download(bucket_name: str, filename: str, path: Path):
+        time.sleep(0.1)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'data')
+    download_mock = mocker.patch('rest.mbtiles.download_file', side_effect=download)
+
+    # Act
+    async def get_paths():
+        return await asyncio.gather(*[mbtiles_cache.get_path('bucket', 'zoo') for _ in range(5)])
+    paths: list[Path] = asyncio.run(get_paths())
+
+    # Assert
+    assert download_mock.call_count == 1
+    assert all(path.read_bytes() == b'data' for path in paths)
+
+def test_map_tile(tmp_path: Path):
+    mbtiles_cache = MBTilesCache(cache_dir=tmp_path)
+    mbtiles_path: Path = mbtiles_cache.local_path('zoo')
+    mbtiles_path.parent.mkdir(parents=True)
+    with closing(sqlite3.connect(mbtiles_path)) as conn:
+        conn.execute('CREATE TABLE metadata (name TEXT, value TEXT)')
+        conn.execute('CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)')
+        conn.execute("INSERT INTO metadata VALUES ('format', 'json')")
+        # Row 1 in TMS scheme is row 2 in XYZ scheme on zoom level 2
+        conn.execute("INSERT INTO tiles VALUES (2, 3, 1, ?)", (b'{"tile": 1}',))
+        conn.commit()
+    res = {
+        'map_file_prefix': 'zoo',
+        'aws_storage_bucket_name': 'bucket',
+        'tile_cache_size': 16
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+    app.dependency_overrides[get_mbtiles_cache] = lambda: mbtiles_cache
+
+    # Act
+    response = client.get("/api/map/tiles/2/3/2")
+    response_missing = client.get("/api/map/tiles/2/3/1")
+    response_outside = client.get("/api/map/tiles/2/4/2")
+    app.dependency_overrides.pop(get_mbtiles_cache)
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {'tile': 1}
+    assert 'max-age' in response.headers['Cache-Control']
+    assert response_missing.status_code == 404
+    assert response_outside.status_code == 404
+
+def test_animal_changes():
+    version_1: datetime = datetime(2021, 5, 1)
+    version_2: datetime = datetime(2021, 5, 8)
+    version_3: datetime = datetime(2021, 5, 15)
+    # Version published after version_2 and then rolled back, version_3 was computed against version_2
+    version_rolled_back: datetime = datetime(2021, 5, 10)
+    find_res: dict[str, list] = {
+        'metadata': [dict(metadata, last_update_end=version_3)],
+        'animals_data': [{'_id': i, 'is_currently_available': i != 3} for i in range(5)],
+        'animals_changes': [
+            {'_id': version_1, 'previous': None, 'inserted': [0, 1, 2, 5], 'updated': [], 'removed': []},
+            {'_id': version_2, 'previous': version_1, 'inserted': [], 'updated': [1], 'removed': [5]},
+            {'_id': version_rolled_back, 'previous': version_2, 'inserted': [], 'updated': [], 'removed': [0]},
+            {'_id': version_3, 'previous': version_2, 'inserted': [4], 'updated': [2, 3], 'removed': []}
+        ]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response = client.get("/api/animals/changes", params={'since': version_1.isoformat()})
+    response_current = client.get("/api/animals/changes", params={'since': version_3.isoformat()})
+    response_unknown = client.get("/api/animals/changes", params={'since': datetime(2021, 1, 1).isoformat()})
+    response_rolled_back = client.get("/api/animals/changes", params={'since': version_rolled_back.isoformat()})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()['full_sync'] == False
+    assert [d['_id'] for d in response.json()['data']] == [1, 2, 3, 4]
+    assert response.json()['removed'] == [5]
+    assert response_current.json()['data'] == []
+    assert response_current.json()['removed'] == []
+    assert response_unknown.json()['full_sync'] == True
+    assert len(response_unknown.json()['data']) == 5
+    assert response_rolled_back.json()['full_sync'] == True
+
+def test_animals_filtered():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [
+            {'_id': 2, 'is_currently_available': True, 'filter_values': {'class_': ['Savci'], 'biotop': ['Savany', 'Lesy']}},
+            {'_id': 0, 'is_currently_available': True, 'filter_values': {'class_': ['Savci'], 'biotop': ['Lesy']}},
+            {'_id': 1, 'is_currently_available': True, 'filter_values': {'class_': ['Ptáci'], 'biotop': ['Savany']}},
+            {'_id': 3, 'is_currently_available': False, 'filter_values': {'class_': ['Savci'], 'biotop': ['Savany']}}
+        ]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response_single = client.get("/api/animals?biotop=savany")
+    response_multi = client.get("/api/animals?biotop=savany,lesy&class_=Savci&include_currently_unavailable=True")
+    response_page = client.get("/api/animals?biotop=savany&limit=1")
+
+    # Assert
+    assert [d['_id'] for d in response_single.json()['data']] == [1, 2]
+    assert [d['_id'] for d in response_multi.json()['data']] == [0, 2, 3]
+    assert [d['_id'] for d in response_page.json()['data']] == [1]
+    assert response_page.json()['next'] is not None
+
+def test_animals_search():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [
+            {'_id': 0, 'name': 'Žirafa severní', 'latin_name': 'Giraffa camelopardalis', 'base_summary': 'Nejvyšší zvíře.'},
+            {'_id': 1, 'name': 'Okapi', 'latin_name': 'Okapia johnstoni', 'base_summary': 'Příbuzný žirafy.'},
+            {'_id': 2, 'name': 'Tygr ussurijský', 'latin_name': 'Panthera tigris altaica', 'base_summary': 'Kočkovitá šelma.'},
+            {'_id': 3, 'name': 'Žirafa Rothschildova', 'is_currently_available': False}
+        ]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response_folded = client.get("/api/animals/search?q=zirafa")
+    response_prefix = client.get("/api/animals/search?q=ZIR&include_currently_unavailable=True")
+    response_all_terms = client.get("/api/animals/search?q=panthera tyg")
+    response_none = client.get("/api/animals/search?q=slon")
+
+    # Assert
+    assert [d['_id'] for d in response_folded.json()['data']] == [0]
+    # Name matches rank above summary matches
+    assert [d['_id'] for d in response_prefix.json()['data']] == [0, 3, 1]
+    assert [d['_id'] for d in response_all_terms.json()['data']] == [2]
+    assert response_none.json()['data'] == []
+
+def test_animals_by_ids():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [{'_id': i, 'is_currently_available': i != 3} for i in reversed(range(10))]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response = client.get("/api/animals?ids=7,1,3,42&include_currently_unavailable=True")
+    response_available = client.get("/api/animals?ids=7,1,3")
+    response_page = client.get("/api/animals?ids=7,1,3&limit=1")
+    response_invalid = client.get("/api/animals?ids=1,abc")
+
+    # Assert
+    assert [d['_id'] for d in response.json()['data']] == [1, 3, 7]
+    assert [d['_id'] for d in response_available.json()['data']] == [1, 7]
+    assert [d['_id'] for d in response_page.json()['data']] == [1]
+    assert response_invalid.status_code == 400
+
+def test_map_route():
+    # Two paths from node 1 to node 4, the one through node 3 is shorter
+    nodes: dict[int, dict] = {
+        1: {'_id': 1, 'lon': 14.400, 'lat': 50.110},
+        2: {'_id': 2, 'lon': 14.405, 'lat': 50.115},
+        3: {'_id': 3, 'lon': 14.405, 'lat': 50.110},
+        4: {'_id': 4, 'lon': 14.410, 'lat': 50.110},
+        5: {'_id': 5, 'lon': 14.420, 'lat': 50.120}
+    }
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'roads': [
+            {'_id': 10, 'geometry': {'type': 'LineString', 'coordinates': [nodes[1], nodes[2], nodes[4]]}},
+            {'_id': 11, 'geometry': {'type': 'LineString', 'coordinates': [nodes[1], nodes[3], nodes[4]]}},
+            {'_id': 12, 'geometry': {'type': 'LineString', 'coordinates': [nodes[5]]}}
+        ],
+        'animal_pens': [{'_id': 100, 'geometry': {'_type': 'Polygon', 'coordinates': [[[14.4101, 50.1101], [14.4102, 50.1102]]]}}],
+        'zoo_parts': []
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response = client.get("/api/map/route?from=1&to=4")
+    response_point = client.get("/api/map/route?from=50.1099,14.3999&to=100")
+    response_disconnected = client.get("/api/map/route?from=1&to=5")
+    response_missing = client.get("/api/map/route?from=1&to=42")
+    response_invalid = client.get("/api/map/route?from=a,b&to=4")
+    response_invalid_point = [client.get(f"/api/map/route?from={point}&to=4").status_code for point in ('0,0', 'nan,14.4', '50.11,inf', '91,14.4')]
+
+    # Assert
+    assert response.status_code == 200
+    assert [node['_id'] for node in response.json()['nodes']] == [1, 3, 4]
+    assert 700 < response.json()['distance'] < 750
+    assert [node['_id'] for node in response_point.json()['nodes']] == [1, 3, 4]
+    assert response_disconnected.status_code == 404
+    assert response_missing.status_code == 404
+    assert response_invalid.status_code == 400
+    assert response_invalid_point == [400, 400, 400, 400]
+
+def test_map_validators_follow_map_version():
+    map_metadata: dict = dict(metadata, last_update_end=datetime(2021, 5, 1), map_last_update=datetime(2021, 6, 1))
+    find_res: dict[str, list] = {
+        'metadata': [map_metadata],
+        'roads': [{'_id': 10, 'geometry': {'type': 'LineString', 'coordinates': [{'_id': 1, 'lon': 14.400, 'lat': 50.110}, {'_id': 2, 'lon': 14.405, 'lat': 50.110}]}}],
+        'animal_pens': [],
+        'zoo_parts': [],
+        'facets': []
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    animals_modified: str = client.get("/api/classes").headers['Last-Modified']
+    response = client.get("/api/map/route?from=1&to=2", headers={'If-Modified-Since': animals_modified})
+    response_cached = client.get("/api/map/route?from=1&to=2", headers={'If-Modified-Since': response.headers['Last-Modified']})
+
+    # Assert
+    assert animals_modified == 'Sat, 01 May 2021 00:00:00 GMT'
+    assert response.status_code == 200
+    assert response.headers['Last-Modified'] == 'Tue, 01 Jun 2021 00:00:00 GMT'
+    assert response_cached.status_code == 304
+
+def test_map_nearby():
+    pen: dict = {'_id': 100, 'name': 'Pen', 'is_animal_pen': True, 'is_building': False,
+        'geometry': {'_type': 'Polygon', 'coordinates': [[[14.400, 50.110], [14.401, 50.110], [14.401, 50.111], [14.400, 50.111], [14.400, 50.110]]]}}
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animal_pens': [pen],
+        'zoo_parts': [
+            {'_id': 200, 'name': 'Gate', 'is_animal_pen': False, 'is_building': False, 'geometry': {'_type': 'Point', 'coordinates': [[[14.4025, 50.1105]]]}},
+            {'_id': 300, 'name': 'Far away', 'is_animal_pen': False, 'is_building': True, 'geometry': {'_type': 'Point', 'coordinates': [[[14.420, 50.120]]]}}
+        ],
+        'animals_data': [
+            {'_id': 1, 'map_locations': [pen]},
+            {'_id': 2, 'map_locations': [pen], 'is_currently_available': False}
+        ]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    response_inside = client.get("/api/map/nearby?lat=50.1105&lon=14.4005&radius=50")
+    response_outside = client.get("/api/map/nearby?lat=50.1105&lon=14.4015&radius=100")
+    response_bbox = client.get("/api/map/locations?bbox=14.3,50.0,14.41,50.2")
+    response_world = client.get("/api/map/locations?bbox=-180,-90,180,90")
+    response_invalid = [client.get(f"/api/map/locations?bbox={bbox}").status_code for bbox in ('inf,50,14.41,50.2', '14.3,nan,14.41,50.2', '14.3,50,14.41,1e300')]
+
+    # Assert
+    assert [(d['_id'], d['distance'], d['animal_ids']) for d in response_inside.json()['data']] == [(100, 0.0, [1])]
+    # The point is about 35 meters east of the pen and 70 meters west of the gate
+    assert [d['_id'] for d in response_outside.json()['data']] == [100, 200]
+    assert 30 < response_outside.json()['data'][0]['distance'] < 40
+    assert [d['_id'] for d in response_bbox.json()['data']] == [100, 200]
+    assert [d['_id'] for d in response_world.json()['data']] == [100, 200, 300]
+    assert response_invalid == [400, 400, 400]
+
+def test_animals_fast_serialization_matches_schema():
+    animals_data: list[dict] = [
+        {'_id': 1, 'name': 'Žirafa', 'class_': 'Savci', 'map_locations': [{'_id': 100, 'name': 'Pen'}], 'filter_values': {'class_': ['Savci']}},
+        {'_id': 0, 'name': 'Okapi', 'is_currently_available': False}
+    ]
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': animals_data
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+    expected: dict = jsonable_encoder(AnimalsResult(metadata=Metadata(**metadata), data=sorted(animals_data, key=lambda d: d['_id'])), by_alias=True)
+
+    # Act
+    response_snapshot = client.get("/api/animals?include_currently_unavailable=True")
+    response_paginated = client.get("/api/animals?include_currently_unavailable=True&limit=10")
+    response_single = client.get("/api/animals/1")
+
+    # Assert
+    assert response_snapshot.json() == expected
+    assert response_paginated.json() == expected
+    assert response_single.json()['data'] == expected['data'][1:]
+
+def test_compression(mocker: MockerFixture):
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [{'_id': i, 'name': f'Animal {i}', 'base_summary': 'Text ' * 50} for i in range(20)]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+    compress_spy = mocker.spy(rest.compression, 'compress_body')
+
+    # Act
+    response_plain = client.get("/api/animals", headers={'Accept-Encoding': 'identity'})
+    response_gzip = client.get("/api/animals", headers={'Accept-Encoding': 'gzip'})
+    response_cached = client.get("/api/animals", headers={'Accept-Encoding': 'gzip'})
+    response_br = client.get("/api/animals", headers={'Accept-Encoding': 'br, gzip'})
+    response_not_modified = client.get("/api/animals", headers={'Accept-Encoding': 'gzip', 'If-None-Match': response_gzip.headers['ETag']})
+
+    # Assert
+    assert 'content-encoding' not in response_plain.headers
+    assert response_gzip.headers['content-encoding'] == 'gzip'
+    assert response_gzip.headers['ETag'] == f'W/{response_plain.headers["ETag"]}'
+    assert response_gzip.json() == response_plain.json()
+    assert response_cached.json() == response_plain.json()
+    assert response_br.headers['content-encoding'] == 'br'
+    assert 'Accept-Encoding' in response_gzip.headers['Vary']
+    assert response_not_modified.status_code == 304
+    # The same dataset version is compressed once for each encoding
+    assert compress_spy.call_count == 2
+
+def test_metrics():
+    find_res: dict[str, list] = {
+        'metadata': [metadata],
+        'animals_data': [{'_id': 0}]
+    }
+    res = {
+        'handler_class': handler,
+        'config_data': {
+            'output': list(),
+            'find_output': find_res
+        }
+    }
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(**res)
+
+    # Act
+    client.get("/api/animals/0")
+    client.get("/unknown/path")
+    response = client.get("/metrics")
+
+    # Assert
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/animals/{animal_id}",status="200"}' in response.text
+    assert 'route="<unmatched>"' in response.text
+    assert 'db_calls_per_request_count{route="/api/animals/{animal_id}"}' in response.text
+    assert 'db_call_duration_seconds_count{collection="animals_data",operation="find"}' in response.text
+
+def test_sqlite_handler_serves_api(tmp_path: Path):
+    config_data: dict = {'db_name': 'zoo', 'collection_name': 'animals_data', 'sqlite_path': str(tmp_path / 'db.sqlite3')}
+    with SQLiteDBHandler(**config_data) as db_handler:
+        db_handler.insert_one(dict(metadata), collection_name='metadata')
+        db_handler.insert_many([
+            {'_id': 1, 'name': 'Lev', 'is_currently_available': True, 'filter_values': {'biotop': ['Savany']}},
+            {'_id': 0, 'name': 'Žirafa', 'is_currently_available': True, 'filter_values': {'biotop': ['Savany', 'Lesy']}},
+            {'_id': 2, 'name': 'Tučňák', 'is_currently_available': True, 'filter_values': {'biotop': ['Moře']}}
+        ])
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(handler_class=SQLiteDBHandler, config_data=config_data)
+
+    # Act
+    response_filtered = client.get("/api/animals?biotop=savany")
+    response_animal = client.get("/api/animals/2")
+
+    # Assert
+    assert [d['_id'] for d in response_filtered.json()['data']] == [0, 1]
+    assert response_animal.json()['data'][0]['name'] == 'Tučňák'
+
+
+def test_dataset_publish_rollback(tmp_path: Path):
+    config_data: dict = {'db_name': 'zoo', 'collection_name': 'animals_data', 'sqlite_path': str(tmp_path / 'db.sqlite3')}
+    with SQLiteDBHandler(**config_data) as db_handler:
+        # Data written before datasets were versioned
+        db_handler.insert_one(dict(metadata), collection_name='metadata')
+        db_handler.insert_one({'_id': 1, 'name': 'Lev', 'is_currently_available': True}, collection_name='animals_data')
+
+        for names in (['Žirafa'], ['Tučňák', 'Lemur']):
+            writer = DatasetWriter(db_handler, 'animals')
+            writer.replace('animals_data', [{'_id': i, 'name': name, 'is_currently_available': True} for i, name in enumerate(names)])
+            writer.publish(datetime.now())
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(handler_class=SQLiteDBHandler, config_data=config_data)
+
+    # Act
+    published = [d['name'] for d in client.get("/api/animals").json()['data']]
+    with SQLiteDBHandler(**config_data) as db_handler:
+        rolled_back = rollback_dataset(db_handler, 'animals')
+        legacy_exists = db_handler.collection_exists(collection_name='animals_data')
+    get_metadata_cache().invalidate()
+    restored = [d['name'] for d in client.get("/api/animals").json()['data']]
+
+    # Assert
+    assert published == ['Tučňák', 'Lemur']
+    assert rolled_back
+    assert restored == ['Žirafa']
+    # Only the current and the previous version are kept
+    assert not legacy_exists
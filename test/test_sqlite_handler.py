@@ -0,0 +1,58 @@
+from scrapers.sqlite_handler import SQLiteDBHandler
+from server_dataclasses.models import WriteOperation
+from pathlib import Path
+from datetime import datetime
+import pytest
+
+
+@pytest.fixture
+def db_handler(tmp_path: Path) -> SQLiteDBHandler:
+    with SQLiteDBHandler(db_name='zoo', collection_name='animals_data', sqlite_path=str(tmp_path / 'db.sqlite3')) as handler:
+        yield handler
+
+
+def test_find_filters_projection_sort(db_handler: SQLiteDBHandler):
+    db_handler.insert_many([
+        {'_id': 2, 'name': 'Žirafa', 'is_currently_available': True, 'filter_values': {'biotop': ['Savany', 'Lesy']}},
+        {'_id': 1, 'name': 'Lev', 'is_currently_available': True, 'filter_values': {'biotop': ['Savany']}},
+        {'_id': 3, 'name': 'Tučňák', 'is_currently_available': False, 'filter_values': {'biotop': ['Moře']}}
+    ])
+
+    # Act
+    savany = db_handler.find({'filter_values.biotop': {'$in': ['Savany']}, '_id': {'$gt': 1}})
+    available = db_handler.find({'is_currently_available': True}, projection={'name': 1}, sort=[('_id', 1)])
+    not_available = db_handler.find({'$or': [{'is_currently_available': False}, {'name': {'$exists': False}}]}, projection={'filter_values': 0, '_id': 0})
+    ids = db_handler.find({'_id': {'$in': [3, 1.0]}}, projection={'_id': 1}, sort=[('_id', -1)], limit=1)
+
+    # Assert
+    assert [d['_id'] for d in savany] == [2]
+    assert available == [{'_id': 1, 'name': 'Lev'}, {'_id': 2, 'name': 'Žirafa'}]
+    assert not_available == [{'name': 'Tučňák', 'is_currently_available': False}]
+    assert ids == [{'_id': 3}]
+
+
+def test_update_upsert_rename(db_handler: SQLiteDBHandler):
+    version = datetime(2021, 3, 1, 12, 0)
+    db_handler.update_one({'_id': 0}, {'$set': {'last_update_end': version}}, upsert=True, collection_name='metadata')
+    db_handler.update_one({'_id': 0}, {'$inc': {'runs': 1}, '$unset': {'missing': ''}}, collection_name='metadata')
+    db_handler.update_one({'_id': 1}, {'$set': {'ignored': True}}, collection_name='metadata')
+    db_handler.bulk_write([WriteOperation.insert({'_id': 'a'}), WriteOperation.update({'_id': 'b'}, {'$set': {'v': 1}}, upsert=True)], collection_name='tmp')
+    db_handler.rename_collection('words', collection_name='tmp')
+
+    # Assert
+    assert db_handler.find({}, collection_name='metadata') == [{'_id': 0, 'last_update_end': version, 'runs': 1}]
+    assert not db_handler.collection_exists(collection_name='tmp')
+    assert db_handler.find({}, collection_name='words') == [{'_id': 'a'}, {'_id': 'b', 'v': 1}]
+    with pytest.raises(ValueError):
+        db_handler.rename_collection('metadata', collection_name='words')
+
+
+def test_delete_many(db_handler: SQLiteDBHandler):
+    db_handler.insert_many([{'_id': datetime(2021, 3, day), 'hashes': {}} for day in (1, 2, 3)], collection_name='animals_changes')
+
+    # Act
+    db_handler.delete_many({'_id': {'$lt': datetime(2021, 3, 2)}}, collection_name='animals_changes')
+    db_handler.delete_many({'_id': {'$in': []}}, collection_name='animals_changes')
+
+    # Assert
+    assert [d['_id'] for d in db_handler.find({}, collection_name='animals_changes')] == [datetime(2021, 3, 2), datetime(2021, 3, 3)]
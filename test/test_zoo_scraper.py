@@ -7,6 +7,8 @@ from pytest_mock.plugin import MockerFixture
 import os
 from urllib.parse import urlparse, ParseResult
 import scrapers.zoo_scraper as zoo_scraper
+from scrapers.buffered_writer import BufferedWriter
+from scrapers.sqlite_handler import SQLiteDBHandler
 from fixtures.fixtures import BaseTestHandler
 from server_dataclasses.models import AnimalData
 from pathlib import Path
@@ -53,6 +55,46 @@ def test_get_animal_urls(betamax_session: requests.Session):
     ids_set: set[int] = {zoo_scraper.get_animal_id(url.query) for url in urls}
     assert len(ids_set) == len(urls)
 
+def test_compute_facets():
+    animals: list[dict] = [
+        {'class_': 'savci', 'biotop': 'savany, lesy', 'food': 'maso'},
+        {'class_': 'Savci', 'biotop': 'lesy', 'food': None},
+        {'class_': 'ptáci', 'biotop': '', 'food': 'hmyz, maso, hmyz'}
+    ]
+
+    facets: dict[str, list[dict]] = zoo_scraper.compute_facets(animals)
+
+    assert facets['classes'] == [{'value': 'Ptáci', 'count': 1}, {'value': 'Savci', 'count': 2}]
+    assert facets['biotops'] == [{'value': 'Lesy', 'count': 2}, {'value': 'Savany', 'count': 1}]
+    assert facets['foods'] == [{'value': 'Hmyz', 'count': 1}, {'value': 'Maso', 'count': 2}]
+
+def test_buffered_writer(mocker: MockerFixture):
+    output: list[dict] = list()
+    handler = BaseTestHandler(output)
+    bulk_write = mocker.spy(handler, 'bulk_write')
+
+    with BufferedWriter(handler, collection_name='animals', max_size=2, max_delay=None) as writer:
+        for i in range(5):
+            writer.insert_one({'_id': i})
+
+        # Two full batches were sent, the last write is still buffered
+        assert bulk_write.call_count == 2
+        assert len(output) == 4
+
+    assert bulk_write.call_count == 3
+    assert output == [{'_id': i} for i in range(5)]
+
+def test_buffered_writer_skips_failed_writes(tmp_path: Path):
+    with SQLiteDBHandler(db_name='zoo', collection_name='animals', sqlite_path=str(tmp_path / 'db.sqlite3')) as handler:
+        with BufferedWriter(handler, max_size=3, max_delay=None) as writer:
+            # The duplicate fails, other writes of the same flush are stored
+            for i in (0, 1, 1, 2):
+                writer.insert_one({'_id': i})
+        stored = handler.find({})
+
+    assert stored == [{'_id': i} for i in range(3)]
+    assert [operation.document for operation in writer.failed] == [{'_id': 1}]
+
 def test_run_web_scraper_pavilon_animals(betamax_session: requests.Session, mocker: MockerFixture):
     """
     Test the whole workflow of Zoo Prague lexicon web scraper. Tests animals that are in zoo houses, not in animal pens.